@@ -3,20 +3,75 @@ News Aggregator Service
 Fetches news from Kazakh websites, filters by keywords, and stores for moderation
 """
 import asyncio
-import httpx
+import multiprocessing
 import os
-import re
-from datetime import datetime
-from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property, partial
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from config import (
-    SOURCES, KEYWORDS_KZ, KEYWORDS_RU, CATEGORY_MAPPING,
-    DATA_DIR, NEWS_FILE, SEEN_URLS_FILE, MAX_ARTICLES_PER_SOURCE,
-    PROXY_URL, API_BASE_URL, API_SUBMIT_ENDPOINT, SEND_TO_API
+    SOURCES, KEYWORD_PROFILES,
+    DATA_DIR, NEWS_FILE, SEEN_URLS_FILE, SOURCE_YIELD_FILE, CHECKPOINT_FILE, LEASE_DB_FILE, HISTORY_DB_FILE,
+    TERM_INDEX_FILE, SEARCH_INDEX_FILE,
+    MAX_ARTICLES_PER_SOURCE, MIN_ARTICLES_PER_SOURCE, RUN_ARTICLE_BUDGET, YIELD_DECAY,
+    PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE, PIPELINE_PERSIST_BATCH, PIPELINE_FETCH_DELAY,
+    RUN_DEADLINE_MARGIN, METRICS_DIR, METRICS_KEEP_RUNS, PROFILE_DIR, METADATA_PRECHECK, CRM_EXPORT_DIR,
+    ARCHIVE_PAGES, ARCHIVE_DIR,
+    API_BASE_URL, API_SUBMIT_ENDPOINT, SEND_TO_API
 )
-from models import NewsArticle, NewsStorage, SeenURLsTracker
-from parsers import get_parser
+from crm_export import CRMExporter
+from history import RunHistory, print_history, print_source_history
+from keywords import ProfileClassifier, ProfileMatch, is_kazakh, words
+from logs import get_logger, setup_logging
+from metrics import (
+    METRICS, HTTP_BYTES, STAGE_SECONDS, ARTICLES, PROFILE_MATCHES, SUBMISSIONS, RUNS, LAST_RUN,
+    match_rates, write_run_summary
+)
+from proxy_pool import ProxyPool
+from models import NewsArticle, NewsStorage, SeenURLsTracker, SourceYieldTracker, RunCheckpoint
+from page_archive import PageArchive, read_record
+from pipeline import Pipeline, Stage
+from profiling import RunProfiler
+from search_index import SearchIndex
+from sharding import default_worker_id
+from term_index import TermIndex
+
+if TYPE_CHECKING:  # imported where used: only commands that fetch need httpx, lxml and trafilatura
+    import httpx
+    from parsers import BaseParser, FetchedPage
+
+log = get_logger('aggregator')
+
+
+def _extract_archived(task: tuple) -> Tuple[int, Optional[Dict]]:
+    """reextract worker (runs in a process pool): extract one archived page with the current parser"""
+    from parsers import FetchedPage, get_parser
+    article_id, source_name, source_url, url, location = task
+    try:
+        # A missing, truncated or corrupt record fails this article only
+        page_url, content, encoding = read_record(*location)
+        data = get_parser(source_name, source_url).extract_article(
+            FetchedPage(url=page_url or url, content=content, encoding=encoding), url)
+    except Exception as e:
+        log.warning(f"Re-extraction failed for {url}: {e}", source=source_name, url=url, stage='extract')
+        data = None
+    return article_id, data
+
+
+@dataclass
+class ArticleJob:
+    """One article URL moving through the processing pipeline"""
+    source: dict
+    parser: 'BaseParser'
+    url: str
+    page: Optional['FetchedPage'] = None
+    data: Optional[Dict] = None
+    article: Optional[NewsArticle] = None
 
 
 class NewsAggregator:
@@ -26,22 +81,49 @@ class NewsAggregator:
         # Ensure data directory exists
         os.makedirs(DATA_DIR, exist_ok=True)
         
-        # Initialize storage
-        self.storage = NewsStorage(os.path.join(DATA_DIR, NEWS_FILE))
+        # Initialize storage; stored articles are indexed for `search` as they are written
+        # (the index opens its database on the first write or search)
+        self.search_index = SearchIndex(os.path.join(DATA_DIR, SEARCH_INDEX_FILE))
+        self.storage = NewsStorage(os.path.join(DATA_DIR, NEWS_FILE), index=self.search_index)
         self.seen_urls = SeenURLsTracker(os.path.join(DATA_DIR, SEEN_URLS_FILE))
+        self.source_yield = SourceYieldTracker(os.path.join(DATA_DIR, SOURCE_YIELD_FILE), YIELD_DECAY)
+        
+        # Per-source counters from the latest fetch of each source
+        self.source_stats: Dict[str, dict] = {}
+        # Work skipped in the latest pipeline run because its deadline was reached
+        self.deferred = {'sources': [], 'articles': {}}
+        
+        # With profile=True each run is sampled and a report is written under DATA_DIR/profiles
+        self.profile = False
+        self.profiler: Optional[RunProfiler] = None
         
-        # Compile keyword patterns for faster matching
-        self.kz_patterns = self._compile_patterns(KEYWORDS_KZ)
-        self.ru_patterns = self._compile_patterns(KEYWORDS_RU)
     
-    def _compile_patterns(self, keywords: List[str]) -> List[Tuple[re.Pattern, str]]:
-        """Compile keyword patterns for case-insensitive matching"""
-        patterns = []
-        for kw in keywords:
-            # Create pattern that matches the keyword as a whole word
-            pattern = re.compile(rf'\b{re.escape(kw)}\b', re.IGNORECASE | re.UNICODE)
-            patterns.append((pattern, kw))
-        return patterns
+    @cached_property
+    def checkpoint(self) -> RunCheckpoint:
+        """Progress of the current full run; only fetches read or write it"""
+        return RunCheckpoint(os.path.join(DATA_DIR, CHECKPOINT_FILE))
+    
+    @cached_property
+    def history(self) -> RunHistory:
+        """Finished runs; opened by the first run or `history` command, not by every command"""
+        return RunHistory(os.path.join(DATA_DIR, HISTORY_DB_FILE))
+    
+    @cached_property
+    def page_archive(self) -> PageArchive:
+        """Fetched article HTML for `reextract`; written to by fetches only with ARCHIVE_PAGES"""
+        return PageArchive(os.path.join(DATA_DIR, ARCHIVE_DIR))
+    
+    @cached_property
+    def proxy_pool(self) -> ProxyPool:
+        """Proxy health, kept across scheduled runs"""
+        return ProxyPool()
+    
+    @cached_property
+    def classifier(self) -> ProfileClassifier:
+        """All keyword profiles in one keyword trie and one category trie; keywords match
+        inflected forms, category terms match as word prefixes. Built on first use, so
+        commands that never classify do not pay for it."""
+        return ProfileClassifier(KEYWORD_PROFILES)
     
     def detect_language(self, text: str) -> str:
         """Detect if text is primarily Kazakh or Russian"""
@@ -70,41 +152,170 @@ class NewsAggregator:
                 return "kz"
             return "ru"
     
+    def extract_article(self, parser, page, url: str) -> Optional[Dict]:
+        """Run the parser's extraction; with METADATA_PRECHECK, return None without touching the
+        body when the page's metadata title and description match no keyword"""
+        if METADATA_PRECHECK:
+            metadata = page.metadata()
+            if metadata['title'] and not self.match_keywords(f"{metadata['title']} {metadata['description']}"):
+                return None
+        return parser.extract_article(page, url)
+    
     def match_keywords(self, text: str) -> List[str]:
-        """Find all matching keywords in text"""
-        if not text:
-            return []
+        """Find all matching keywords of any profile in text, including inflected forms"""
+        return self.classifier.keyword_matcher.match(text)
+    
+    def determine_category(self, text: str, matched_keywords: List[str]) -> str:
+        """Determine article category (of the first profile) based on content and matched keywords"""
+        if not text and not matched_keywords:
+            return "general"
         
-        matches = set()
+        combined_text = text + ' ' + ' '.join(matched_keywords)
+        return self.classifier.category(self.classifier.names[0], self.classifier.category_matcher.match(combined_text))
+    
+    def profile_fields(self, matches: Dict[str, ProfileMatch], terms: List[str]) -> dict:
+        """Article fields for profile matches; the first matching profile fills matched_keywords/category"""
+        primary = next(iter(matches.values()), None)
+        return {
+            'matched_keywords': primary.keywords if primary else [],
+            'category': primary.category if primary else self.classifier.category(self.classifier.names[0], terms),
+            'profiles': {name: {'keywords': match.keywords, 'category': match.category}
+                         for name, match in matches.items()},
+        }
+    
+    def reclassify(self, dry_run: bool = False) -> dict:
+        """Recompute matched keywords, category and profiles of every stored article with the current config.
         
-        # Check Kazakh keywords
-        for pattern, keyword in self.kz_patterns:
-            if pattern.search(text):
-                matches.add(keyword)
+        Articles are tokenized once into data/term_index.db; each distinct word
+        is then matched against the keyword and category tries once for the
+        whole store, and articles are matched as word ids. Only articles whose
+        keywords, category or profiles changed are written back.
+        """
+        started = time.monotonic()
+        self.storage.reload()
+        articles = {article.id: article for article in self.storage.get_all()}
+        index = TermIndex(os.path.join(DATA_DIR, TERM_INDEX_FILE))
+        try:
+            tokenized = index.update(list(articles.values()))
+            vocabulary = index.vocabulary()
+            keyword_matcher, category_matcher = self.classifier.keyword_matcher, self.classifier.category_matcher
+            # Kazakh endings only apply in texts with a Kazakh-specific letter (see keywords.is_kazakh)
+            keyword_heads = {kazakh: keyword_matcher.heads(vocabulary, kazakh) for kazakh in (True, False)}
+            category_heads = category_matcher.heads(vocabulary)
+            kazakh_words = {word_id for word_id, word in enumerate(vocabulary) if is_kazakh(word)}
+            
+            changes = {}
+            unmatched = 0
+            for article_id, tokens, breaks in index.documents():
+                article = articles[article_id]
+                kazakh = not kazakh_words.isdisjoint(tokens)
+                keywords = keyword_matcher.match_encoded(tokens, breaks, vocabulary, keyword_heads[kazakh], kazakh)
+                terms = category_matcher.match_encoded(tokens, breaks, vocabulary, category_heads)
+                matches = self.classifier.assign(keywords, terms)
+                if not matches:
+                    unmatched += 1
+                fields = self.profile_fields(matches, terms)
+                if (set(fields['matched_keywords']) != set(article.matched_keywords)
+                        or fields['category'] != article.category or fields['profiles'] != article.profiles):
+                    changes[article_id] = fields
+        finally:
+            index.close()
         
-        # Check Russian keywords
-        for pattern, keyword in self.ru_patterns:
-            if pattern.search(text):
-                matches.add(keyword)
+        if not dry_run:
+            self.storage.update_many(changes)
+        return {
+            'articles': len(articles),
+            'tokenized': tokenized,
+            'vocabulary': len(vocabulary),
+            'changed': changes,
+            'unmatched': unmatched,
+            'seconds': time.monotonic() - started,
+        }
+    
+    def reextracted_fields(self, article: NewsArticle, data: Dict) -> dict:
+        """Article fields from a fresh extraction of a stored article's page, classified as in
+        build_article; the stored date and image are kept when the page has none"""
+        title = data['title']
+        content = data.get('content', '')
+        full_text = f"{title} {data.get('description', '')} {content}"
+        description = data.get('description', '') or self.create_description(content)
+        lang = self.detect_language(full_text) or article.language
+        
+        date_str = data.get('date', '')
+        try:
+            date_str = datetime.fromisoformat(date_str.replace('Z', '+00:00')).isoformat() if date_str else article.date
+        except ValueError:
+            date_str = article.date
         
-        return list(matches)
+        fields = {
+            'title': title,
+            'description': description,
+            'content_text': content,
+            'photo_url': data.get('image', '') or article.photo_url,
+            'date': date_str,
+            'language': lang,
+        }
+        if lang in ('kz', 'ru'):
+            fields.update({f'title_{lang}': title, f'description_{lang}': description, f'content_text_{lang}': content})
+        matches = self.classifier.classify(full_text)
+        fields.update(self.profile_fields(matches, [] if matches else self.classifier.category_matcher.match(full_text)))
+        return fields
     
-    def determine_category(self, text: str, matched_keywords: List[str]) -> str:
-        """Determine article category based on content and matched keywords"""
-        if not text and not matched_keywords:
-            return "general"
+    def reextract(self, source: Optional[str] = None, workers: Optional[int] = None, dry_run: bool = False) -> dict:
+        """Run the current parsers over the archived HTML of stored articles and write back what changed.
         
-        combined_text = text.lower() + ' ' + ' '.join(matched_keywords).lower()
+        Pages are read from the page archive only - nothing is downloaded.
+        Extraction runs in `workers` processes (default: one per CPU); the
+        results are classified again and saved with one storage write.
+        Articles whose page is not archived or no longer extracts are left alone.
+        """
+        started = time.monotonic()
+        self.storage.reload()
+        articles = [a for a in self.storage.get_all() if not source or a.source_name == source]
+        locations = self.page_archive.locations([a.source_url for a in articles])
+        source_urls = {s['name']: s['url'] for s in SOURCES}
+        tasks = []
+        for a in articles:
+            if a.source_url in locations:
+                parsed = urlparse(a.source_url)
+                source_url = source_urls.get(a.source_name) or f"{parsed.scheme}://{parsed.netloc}"
+                tasks.append((a.id, a.source_name, source_url, a.source_url, locations[a.source_url]))
         
-        category_scores = {}
-        for category, keywords in CATEGORY_MAPPING.items():
-            score = sum(1 for kw in keywords if kw.lower() in combined_text)
-            if score > 0:
-                category_scores[category] = score
+        workers = workers or os.cpu_count() or 1
+        changes = {}
+        failed = unmatched = 0
+        executor = None
+        if workers > 1 and len(tasks) > 1:
+            # spawn, not fork: the log writer thread must not be copied mid-write into the workers
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            results = executor.map(_extract_archived, tasks, chunksize=16) if executor else map(_extract_archived, tasks)
+            for article_id, data in results:
+                article = self.storage.get_by_id(article_id)
+                if not data or not data.get('title'):
+                    failed += 1
+                    continue
+                fields = self.reextracted_fields(article, data)
+                if not fields['profiles']:
+                    unmatched += 1
+                changed = {name: value for name, value in fields.items() if getattr(article, name) != value}
+                if changed:
+                    changes[article_id] = changed
+        finally:
+            if executor:
+                executor.shutdown()
         
-        if category_scores:
-            return max(category_scores, key=category_scores.get)
-        return "general"
+        if not dry_run:
+            self.storage.update_many(changes)
+        return {
+            'articles': len(articles),
+            'archived': len(tasks),
+            'changed': changes,
+            'failed': failed,
+            'unmatched': unmatched,
+            'workers': workers if executor else 1,
+            'seconds': time.monotonic() - started,
+        }
     
     def create_description(self, content: str, max_length: int = 200) -> str:
         """Create a description from content if not provided"""
@@ -134,14 +345,34 @@ class NewsAggregator:
         
         return truncated + '...'
 
-    async def send_to_api(self, article: NewsArticle, client: httpx.AsyncClient) -> bool:
-        """Send article to backend API"""
-        if not SEND_TO_API:
-            return False
-
+    def submission_targets(self, article: NewsArticle) -> List[Tuple[str, str]]:
+        """(profile, submit URL) for each of the article's profiles that submits to a backend.
+        
+        Profiles sharing a backend get one submission, under the first of them;
+        articles stored before profiles existed go to the first profile.
+        """
+        targets = {}
+        for name in article.profiles or self.classifier.names[:1]:
+            profile = KEYWORD_PROFILES.get(name)
+            if profile is None or not profile.get('send_to_api', SEND_TO_API):
+                continue
+            url = f"{profile.get('api_base_url', API_BASE_URL)}{profile.get('api_submit_endpoint', API_SUBMIT_ENDPOINT)}"
+            targets.setdefault(url, name)
+        return [(name, url) for url, name in targets.items()]
+    
+    async def send_to_api(self, article: NewsArticle, client: 'httpx.AsyncClient') -> bool:
+        """Send article to the backend of every profile it matched; True if any created it"""
+        created = False
+        for profile, url in self.submission_targets(article):
+            created = await self.submit_to(article, profile, url, client) or created
+        return created
+    
+    async def submit_to(self, article: NewsArticle, profile: str, url: str, client: 'httpx.AsyncClient') -> bool:
+        """Send article to one backend, with the keywords and category of `profile`"""
+        import httpx
+        match = article.profiles.get(profile) or {'keywords': article.matched_keywords, 'category': article.category}
+        fields = {'source': article.source_name, 'url': article.source_url, 'stage': 'submit', 'profile': profile}
         try:
-            url = f"{API_BASE_URL}{API_SUBMIT_ENDPOINT}"
-
             # Prepare payload matching NewsSubmit schema
             payload = {
                 "title_kz": article.title_kz,
@@ -153,199 +384,621 @@ class NewsAggregator:
                 "source_url": article.source_url,
                 "source_name": article.source_name,
                 "language": article.language,
-                "category": article.category,
-                "keywords_matched": ', '.join(article.matched_keywords) if article.matched_keywords else "",
+                "category": match['category'],
+                "keywords_matched": ', '.join(match['keywords']) if match['keywords'] else "",
                 "photo_url": article.photo_url
             }
 
             # Log the attempt to send to backend
-            print(f"  📤 Sending to backend API: {url}")
-            print(f"     Title: {article.title[:60]}...")
-            print(f"     Source: {article.source_name}")
-            print(f"     Category: {article.category} | Language: {article.language}")
+            log.debug(f"  📤 Sending to backend API: {url} [{profile}: {match['category']}/{article.language}] "
+                      f"{article.title[:60]}...", **fields)
             
+            started = time.monotonic()
             response = await client.post(url, json=payload, timeout=10.0)
+            fields['duration'] = round(time.monotonic() - started, 3)
+            fields['status'] = response.status_code
 
             if response.status_code == 201:
-                print(f"  ✅ Successfully sent to backend (Status: 201 Created)")
+                log.info("  ✅ Successfully sent to backend (Status: 201 Created)", **fields)
+                SUBMISSIONS.inc(article.source_name, 'created')
                 return True
             elif response.status_code == 409:
-                print(f"  ℹ️  Article already exists in backend (Status: 409 Conflict)")
+                log.info("  ℹ️  Article already exists in backend (Status: 409 Conflict)", **fields)
+                SUBMISSIONS.inc(article.source_name, 'conflict')
                 return False
             else:
-                print(f"  ⚠️  Backend returned status {response.status_code}")
-                print(f"     Response: {response.text[:150]}")
+                log.warning(f"  ⚠️  Backend returned status {response.status_code}: {response.text[:150]}", **fields)
+                SUBMISSIONS.inc(article.source_name, f'status_{response.status_code}')
                 return False
 
         except httpx.ConnectError as e:
-            print(f"  ❌ Connection error sending to API: Cannot reach {API_BASE_URL}")
-            print(f"     Error: {e}")
+            log.error(f"  ❌ Connection error sending to API: Cannot reach {url}: {e}", **fields)
+            SUBMISSIONS.inc(article.source_name, 'connect_error')
             return False
         except httpx.TimeoutException:
-            print(f"  ❌ Timeout sending to API: Backend did not respond within 10 seconds")
+            log.error("  ❌ Timeout sending to API: Backend did not respond within 10 seconds", **fields)
+            SUBMISSIONS.inc(article.source_name, 'timeout')
             return False
         except Exception as e:
-            print(f"  ❌ Unexpected error sending to API: {type(e).__name__}: {e}")
+            log.error(f"  ❌ Unexpected error sending to API: {type(e).__name__}: {e}", **fields)
+            SUBMISSIONS.inc(article.source_name, 'error')
             return False
 
-    async def fetch_source(self, source: dict, client: httpx.AsyncClient) -> List[NewsArticle]:
-        """Fetch and process news from a single source"""
+    def build_article(self, source: dict, url: str, data: Dict) -> Optional[NewsArticle]:
+        """Classify extracted data; returns the article, or None if it is skipped"""
         source_name = source['name']
-        source_url = source['url']
         source_lang = source.get('lang', 'unknown')
         
-        print(f"\n📰 Processing: {source_name}")
+        title = data.get('title', '')
+        content = data.get('content', '')
+        
+        if not title:
+            log.warning(f"  ⚠️  No title found: {url}", source=source['name'], url=url, stage='classify', throttle=True)
+            return None
+        
+        # Combine text for keyword matching
+        full_text = f"{title} {data.get('description', '')} {content}"
+        
+        # Match the keywords of every profile in one pass
+        matches = self.classifier.classify(full_text)
+        
+        # Only include if some profile matches
+        if not matches:
+            log.info(f"  ⏭️  Skipping (no keyword match): {title[:80]}...",
+                     source=source['name'], url=url, stage='classify', throttle=True)
+            self.seen_urls.mark_seen(url)
+            return None
+        
+        fields = self.profile_fields(matches, [])
+        matched_keywords = fields['matched_keywords']
+        log.info(f"  ✨ Keywords matched: {', '.join(matched_keywords[:3])}... [{', '.join(matches)}]",
+                 source=source['name'], url=url, stage='classify', keywords=matched_keywords,
+                 profiles=list(matches), forms={name: match.forms for name, match in matches.items()})
+        
+        # Detect language
+        lang = self.detect_language(full_text) or source_lang
         
-        articles = []
-        parser = get_parser(source_name, source_url)
+        # Category of the first matching profile
+        category = fields['category']
         
+        # Create description if not present
+        description = data.get('description', '') or self.create_description(content)
+        
+        # Parse date
+        date_str = data.get('date', '')
+        if date_str:
+            try:
+                # Try to parse and normalize date
+                parsed_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                date_str = parsed_date.isoformat()
+            except:
+                date_str = datetime.now().isoformat()
+        else:
+            date_str = datetime.now().isoformat()
+        
+        # Create article object
+        article = NewsArticle(
+            title=title,
+            description=description,
+            content_text=content,
+            photo_url=data.get('image', ''),
+            category=category,
+            date=date_str,
+            source_url=url,
+            source_name=source_name,
+            language=lang,
+            matched_keywords=matched_keywords,
+            profiles=fields['profiles'],
+            status='pending'
+        )
+        
+        # Fill language-specific fields
+        if lang == 'kz':
+            article.title_kz = title
+            article.description_kz = description
+            article.content_text_kz = content
+        elif lang == 'ru':
+            article.title_ru = title
+            article.description_ru = description
+            article.content_text_ru = content
+        
+        return article
+    
+    @asynccontextmanager
+    async def profiling(self, label: str):
+        """Profile the enclosed run when self.profile is set; overlapping runs share one profiler"""
+        if not self.profile or self.profiler is not None:
+            yield
+            return
+        profiler = self.profiler = RunProfiler(label)
+        profiler.start()
         try:
+            yield
+        finally:
+            profiler.stop()
+            self.profiler = None
+            report = profiler.report()
+            report_file, stacks_file = profiler.save(os.path.join(DATA_DIR, PROFILE_DIR), report)
+            log.info("\n" + report)
+            log.info(f"🔬 Profile: {report_file}", report=report_file)
+            log.info(f"   Collapsed stacks (flamegraph.pl / speedscope): {stacks_file}", stacks=stacks_file)
+    
+    async def process_sources(self, plan: List[Tuple[dict, int]], client: 'httpx.AsyncClient',
+                              checkpoint: Optional[RunCheckpoint] = None,
+                              stop_at: Optional[float] = None) -> Tuple[List[NewsArticle], Pipeline]:
+        """Run sources through the discover → fetch → extract → classify → persist → submit pipeline.
+        
+        `plan` is a list of (source, article budget) pairs, best source first.
+        Stages are joined by bounded queues, so a slow stage only holds up the
+        stages feeding it. Matched articles are written to storage (and their
+        URLs marked seen) in batches, and at the latest when their source
+        finishes; with a checkpoint, finished sources and URLs are recorded so
+        an interrupted run can pick up where it stopped.
+        
+        `stop_at` is a time.monotonic() cut-off: after it no new listing or
+        article fetches start, while everything already fetched still goes
+        through extraction, storage and submission. Skipped work is counted
+        in self.deferred.
+        """
+        from parsers import get_parser, order_by_freshness
+        loop = asyncio.get_running_loop()
+        profiler = self.profiler
+        articles: List[NewsArticle] = []
+        unsaved: List[ArticleJob] = []
+        started: Dict[str, float] = {}
+        finished: Dict[str, float] = {}
+        outstanding: Dict[str, int] = {}
+        parsers = {}
+        requests_before: Dict[str, int] = {}  # parsers are shared across runs; count this run's requests
+        carry_over = 0
+        self.deferred = {'sources': [], 'articles': {}}
+        
+        def past_deadline() -> bool:
+            return stop_at is not None and time.monotonic() >= stop_at
+        
+        if checkpoint is not None and checkpoint.state['unsubmitted']:
+            await self._submit_unsubmitted(checkpoint, client)
+        
+        def flush() -> List[ArticleJob]:
+            if not unsaved:
+                return []
+            jobs = list(unsaved)
+            unsaved.clear()
+            flush_started = time.monotonic()
+            try:
+                self.storage.add_many([job.article for job in jobs])
+                self.seen_urls.mark_many_seen([job.url for job in jobs])
+                if checkpoint is not None:
+                    checkpoint.add_unsubmitted([job.article.id for job in jobs])
+                    checkpoint.save()
+            except Exception as e:
+                # The whole batch failed: finish every job in it, not just the one that triggered
+                # the write, so each source still completes. The URLs stay unseen, so a later
+                # run fetches them again.
+                log.error(f"  ✗ Error storing {len(jobs)} articles: {e}", stage='persist', articles=len(jobs))
+                failed_articles = {id(job.article) for job in jobs}
+                articles[:] = [article for article in articles if id(article) not in failed_articles]
+                for job in jobs:
+                    stats = self.source_stats[job.source['name']]
+                    stats['matched'] -= 1
+                    stats['errors'] += 1
+                    done(job, final=True, deferred=True)
+                return []
+            # One write covers the whole batch; charge each article its share
+            per_article = (time.monotonic() - flush_started) / len(jobs)
+            for job in jobs:
+                STAGE_SECONDS.observe(job.source['name'], 'persist', value=per_article)
+            return jobs
+        
+        def source_done(source_name: str):
+            # Matched jobs only finish after submit, so by now the source is fully stored
+            stats = self.source_stats[source_name]
+            stats['requests'] = parsers[source_name].request_count - requests_before[source_name]
+            stats['duration'] = round(finished[source_name] - started[source_name], 2)
+            # A source whose articles were all deferred says nothing about its yield
+            if stats['processed'] or source_name not in self.deferred['articles']:
+                self.source_yield.record(
+                    source_name, stats['requests'], stats['processed'], stats['matched'],
+                    stats['new_links'], stats['duration']
+                )
+            if checkpoint is not None:
+                checkpoint.mark_source_done(source_name)
+        
+        def done(job: ArticleJob, final: bool = False, deferred: bool = False):
+            source_name = job.source['name']
+            finished[source_name] = time.monotonic()
+            if not final:
+                return
+            if checkpoint is not None and not deferred:
+                checkpoint.mark_url_done(source_name, job.url)
+            outstanding[source_name] -= 1
+            if outstanding[source_name] == 0:
+                source_done(source_name)
+        
+        async def discover(entry: Tuple[dict, int]) -> List[ArticleJob]:
+            nonlocal carry_over
+            source, budget = entry
+            source_name = source['name']
+            started[source_name] = finished[source_name] = time.monotonic()
+            outstanding[source_name] = 0
+            parser = parsers[source_name] = get_parser(source_name, source['url'])
+            parser.archive = self.page_archive if ARCHIVE_PAGES else None
+            requests_before[source_name] = parser.request_count
+            stats = self.source_stats[source_name] = {
+                'links': 0, 'new_links': 0, 'processed': 0, 'matched': 0, 'errors': 0,
+                'requests': 0, 'budget': budget, 'duration': 0.0,
+            }
+            
+            if past_deadline():
+                # Not fetched at all, so nothing to record in the yield history
+                log.info(f"\n⏳ Deferred (deadline): {source_name}", source=source_name, stage='discover')
+                self.deferred['sources'].append(source_name)
+                return []
+            
+            log.info(f"\n📰 Processing: {source_name}", source=source_name, stage='discover')
+            
             # Get article links
+            listing_started = time.monotonic()
             links = await parser.get_article_links(client)
-            print(f"  Found {len(links)} potential articles")
+            listing_seconds = time.monotonic() - listing_started
+            STAGE_SECONDS.observe(source_name, 'listing', value=listing_seconds)
+            log.info(f"  Found {len(links)} potential articles",
+                     source=source_name, stage='discover', links=len(links), duration=round(listing_seconds, 3))
             
-            # Filter out already seen URLs
-            new_links = [url for url in links if not self.seen_urls.is_seen(url)]
-            print(f"  {len(new_links)} new articles to process")
+            # Filter out already seen URLs (and, when resuming, URLs finished before the restart)
+            already_done = set(checkpoint.done_urls(source_name)) if checkpoint is not None else set()
+            new_links = [url for url in links if not self.seen_urls.is_seen(url) and url not in already_done]
+            log.info(f"  {len(new_links)} new articles to process",
+                     source=source_name, stage='discover', new_links=len(new_links))
+            stats['links'] = len(links)
+            stats['new_links'] = len(new_links)
+            budget = max(budget - len(already_done), 0)
             
-            # Limit articles per source
-            new_links = new_links[:MAX_ARTICLES_PER_SOURCE]
+            # Budget a source could not use (too few new links) passes to the next one
+            limit = min(budget + carry_over, MAX_ARTICLES_PER_SOURCE)
+            new_links = order_by_freshness(new_links)[:limit]
+            carry_over = budget + carry_over - len(new_links)
+            stats['budget'] = limit
+            finished[source_name] = time.monotonic()
             
-            # Process each article
-            for url in new_links:
-                try:
-                    data = await parser.parse_article(url, client)
-                    if not data:
-                        print(f"  ⚠️  Failed to parse: {url}")
-                        continue
-                    
-                    title = data.get('title', '')
-                    content = data.get('content', '')
-                    
-                    if not title:
-                        print(f"  ⚠️  No title found: {url}")
-                        continue
-                    
-                    # Combine text for keyword matching
-                    full_text = f"{title} {data.get('description', '')} {content}"
-                    
-                    # Match keywords
-                    matched_keywords = self.match_keywords(full_text)
-                    
-                    # Only include if keywords match
-                    if not matched_keywords:
-                        print(f"  ⏭️  Skipping (no keyword match): {title[:80]}...")
-                        self.seen_urls.mark_seen(url)
-                        continue
-                    
-                    print(f"  ✨ Keywords matched: {', '.join(matched_keywords[:3])}...")
-                    
-                    # Detect language
-                    lang = self.detect_language(full_text) or source_lang
-                    
-                    # Determine category
-                    category = self.determine_category(full_text, matched_keywords)
-                    
-                    # Create description if not present
-                    description = data.get('description', '') or self.create_description(content)
-                    
-                    # Parse date
-                    date_str = data.get('date', '')
-                    if date_str:
-                        try:
-                            # Try to parse and normalize date
-                            parsed_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                            date_str = parsed_date.isoformat()
-                        except:
-                            date_str = datetime.now().isoformat()
-                    else:
-                        date_str = datetime.now().isoformat()
-                    
-                    # Create article object
-                    article = NewsArticle(
-                        title=title,
-                        description=description,
-                        content_text=content,
-                        photo_url=data.get('image', ''),
-                        category=category,
-                        date=date_str,
-                        source_url=url,
-                        source_name=source_name,
-                        language=lang,
-                        matched_keywords=matched_keywords,
-                        status='pending'
-                    )
-                    
-                    # Fill language-specific fields
-                    if lang == 'kz':
-                        article.title_kz = title
-                        article.description_kz = description
-                        article.content_text_kz = content
-                    elif lang == 'ru':
-                        article.title_ru = title
-                        article.description_ru = description
-                        article.content_text_ru = content
-                    
-                    # Send to API if enabled
-                    if SEND_TO_API:
-                        print(f"\n  📝 Article processed: {title[:60]}...")
-                        print(f"     Category: [{category}] | Keywords: {len(matched_keywords)} | Language: {lang}")
-                        api_success = await self.send_to_api(article, client)
-                    else:
-                        api_success = False
-                        print(f"  ✓ {title[:50]}... [{category}] ({len(matched_keywords)} keywords) → JSON only (API disabled)")
-
-                    # Always save to JSON as backup
-                    articles.append(article)
-                    self.seen_urls.mark_seen(url)
-                    
-                except Exception as e:
-                    print(f"  ✗ Error processing {url}: {e}")
-                    continue
-                
-                # Small delay between articles
-                await asyncio.sleep(0.5)
+            outstanding[source_name] = len(new_links)
+            if not new_links:
+                source_done(source_name)
+            return [ArticleJob(source, parser, url) for url in new_links]
         
-        except Exception as e:
-            print(f"  ✗ Error with source {source_name}: {e}")
+        async def fetch(job: ArticleJob) -> List[ArticleJob]:
+            if past_deadline():
+                deferred = self.deferred['articles']
+                deferred[job.source['name']] = deferred.get(job.source['name'], 0) + 1
+                done(job, final=True, deferred=True)
+                return []
+            source_name = job.source['name']
+            self.source_stats[source_name]['processed'] += 1
+            fetch_started = time.monotonic()
+            job.page = await job.parser.fetch_page(job.url, client)
+            fetch_seconds = time.monotonic() - fetch_started
+            STAGE_SECONDS.observe(source_name, 'fetch', value=fetch_seconds)
+            # Small delay between articles
+            await asyncio.sleep(PIPELINE_FETCH_DELAY)
+            if not job.page:
+                log.warning(f"  ⚠️  Failed to fetch: {job.url}", source=source_name, url=job.url,
+                            stage='fetch', duration=round(fetch_seconds, 3), throttle=True)
+                ARTICLES.inc(source_name, 'fetch_failed')
+                done(job, final=True)
+                return []
+            ARTICLES.inc(source_name, 'fetched')
+            done(job)
+            return [job]
+        
+        async def extract(job: ArticleJob) -> List[ArticleJob]:
+            # CPU-bound parsing runs in the default thread pool to keep the loop responsive
+            extract_started = time.monotonic()
+            extract_article = partial(self.extract_article, job.parser)
+            if profiler is not None:
+                extract_article = profiler.thread_tagged('extract', job.source['name'], extract_article)
+            job.data = await loop.run_in_executor(None, extract_article, job.page, job.url)
+            extract_seconds = time.monotonic() - extract_started
+            STAGE_SECONDS.observe(job.source['name'], 'extract', value=extract_seconds)
+            job.page = None
+            if job.data is None:
+                log.info(f"  ⏭️  Skipping (no keyword in metadata): {job.url}", source=job.source['name'],
+                         url=job.url, stage='extract', throttle=True)
+                ARTICLES.inc(job.source['name'], 'prechecked_out')
+                done(job, final=True)
+                return []
+            if not job.data:
+                log.warning(f"  ⚠️  Failed to parse: {job.url}", source=job.source['name'], url=job.url,
+                            stage='extract', duration=round(extract_seconds, 3), throttle=True)
+                ARTICLES.inc(job.source['name'], 'parse_failed')
+                done(job, final=True)
+                return []
+            done(job)
+            return [job]
+        
+        async def classify(job: ArticleJob) -> List[ArticleJob]:
+            match_started = time.monotonic()
+            job.article = self.build_article(job.source, job.url, job.data)
+            STAGE_SECONDS.observe(job.source['name'], 'match', value=time.monotonic() - match_started)
+            job.data = None
+            ARTICLES.inc(job.source['name'], 'matched' if job.article else 'skipped')
+            if not job.article:
+                done(job, final=True)
+                return []
+            for profile in job.article.profiles:
+                PROFILE_MATCHES.inc(job.source['name'], profile)
+            done(job)
+            return [job]
+        
+        async def persist(job: ArticleJob) -> List[ArticleJob]:
+            # Always save to JSON as backup; batch writes while more matches are queued
+            articles.append(job.article)
+            unsaved.append(job)
+            self.source_stats[job.source['name']]['matched'] += 1
+            done(job)
+            if len(unsaved) >= PIPELINE_PERSIST_BATCH or persist_stage.queue.empty():
+                return flush()
+            return []
+        
+        async def submit(job: ArticleJob) -> List[ArticleJob]:
+            article = job.article
+            # Send to the API of each matching profile that has it enabled
+            if self.submission_targets(article):
+                log.info(f"\n  📝 Article processed: {article.title[:60]}... [{article.category}] "
+                         f"| Keywords: {len(article.matched_keywords)} | Language: {article.language} "
+                         f"| Profiles: {', '.join(article.profiles)}",
+                         source=article.source_name, url=article.source_url, stage='submit', throttle=True)
+                submit_started = time.monotonic()
+                await self.send_to_api(article, client)
+                STAGE_SECONDS.observe(job.source['name'], 'submit', value=time.monotonic() - submit_started)
+            else:
+                log.info(f"  ✓ {article.title[:50]}... [{article.category}] ({len(article.matched_keywords)} keywords) → JSON only (API disabled)",
+                         source=article.source_name, url=article.source_url, stage='submit', throttle=True)
+            if checkpoint is not None:
+                checkpoint.mark_submitted(article.id)
+            done(job, final=True)
+            return []
+        
+        def failed(item, error: Exception):
+            if isinstance(item, tuple):
+                source_name = item[0]['name']
+                log.error(f"  ✗ Error with source {source_name}: {error}", source=source_name, stage='discover')
+                if source_name in self.source_stats:
+                    self.source_stats[source_name]['errors'] += 1
+                    source_done(source_name)
+            else:
+                log.error(f"  ✗ Error processing {item.url}: {error}", source=item.source['name'], url=item.url)
+                self.source_stats[item.source['name']]['errors'] += 1
+                done(item, final=True)
+        
+        handlers = [
+            ('discover', discover), ('fetch', fetch), ('extract', extract),
+            ('classify', classify), ('persist', persist), ('submit', submit),
+        ]
+        if profiler is not None:
+            def source_of(item) -> str:
+                return item[0]['name'] if isinstance(item, tuple) else item.source['name']
+            handlers = [(name, profiler.tagged(name, handler, source_of)) for name, handler in handlers]
+        pipeline = Pipeline([
+            Stage(name, handler, PIPELINE_WORKERS.get(name, 1), PIPELINE_QUEUE_SIZE, on_error=failed)
+            for name, handler in handlers
+        ])
+        persist_stage = pipeline.stages[4]
+        try:
+            await pipeline.run(plan)
+        finally:
+            # On cancellation, keep whatever matched so far; the checkpoint lists it as unsubmitted
+            flush()
         
+        return articles, pipeline
+    
+    async def _submit_unsubmitted(self, checkpoint: RunCheckpoint, client: 'httpx.AsyncClient'):
+        """Send articles that were stored but not yet submitted when the last run stopped"""
+        article_ids = list(checkpoint.state['unsubmitted'])
+        log.info(f"\n📤 Resuming {len(article_ids)} stored but unsubmitted articles", stage='submit')
+        for article_id in article_ids:
+            article = self.storage.get_by_id(article_id)
+            if article is not None:
+                await self.send_to_api(article, client)
+            checkpoint.mark_submitted(article_id)
+        checkpoint.save()
+    
+    async def fetch_source(self, source: dict, client: 'httpx.AsyncClient',
+                           limit: int = MAX_ARTICLES_PER_SOURCE) -> List[NewsArticle]:
+        """Fetch, process and store up to `limit` new articles from a single source"""
+        articles, _ = await self.process_sources([(source, limit)], client)
         return articles
     
-    async def run(self, sources: List[dict] = None) -> dict:
-        """Run the aggregator for all or specified sources"""
+    async def run_source(self, source: dict, client: 'httpx.AsyncClient') -> dict:
+        """Fetch a single source on a shared client; used by per-source scheduler jobs.
+        
+        All jobs run on one event loop and the storage/seen-URL updates happen
+        without awaiting in between, so overlapping jobs for different sources
+        cannot interleave those writes. Each job is one run in the run history.
+        """
+        run_started = time.monotonic()
+        started_at = time.time()
+        metrics_before = METRICS.snapshot()
+        async with self.profiling(f"source {source['name']}"):
+            articles = await self.fetch_source(source, client)
+        # Metrics are keyed by source, so jobs for other sources overlapping this one don't leak in
+        self.record_history([source['name']], started_at, time.monotonic() - run_started,
+                            len(articles), METRICS.summary(since=metrics_before))
+        return dict(self.source_stats[source['name']])
+    
+    def plan_budgets(self, sources: List[dict], total: int = RUN_ARTICLE_BUDGET) -> List[Tuple[dict, int]]:
+        """Split a run's article budget across sources by expected matches per request.
+        
+        Every source gets MIN_ARTICLES_PER_SOURCE for exploration; the rest goes
+        to the highest-yield sources first, capped by MAX_ARTICLES_PER_SOURCE and
+        by how many new links the source usually has. Returns sources in the
+        order they should be fetched (best yield first) with their budgets.
+        """
+        ranked = sorted(sources, key=lambda s: self.source_yield.yield_per_request(s['name']), reverse=True)
+        floor = min(MIN_ARTICLES_PER_SOURCE, MAX_ARTICLES_PER_SOURCE)
+        budgets = {s['name']: floor for s in ranked}
+        remaining = max(total - floor * len(ranked), 0)
+        
+        for source in ranked:
+            if remaining <= 0:
+                break
+            expected = self.source_yield.expected_new_links(source['name'])
+            cap = MAX_ARTICLES_PER_SOURCE if expected is None else min(MAX_ARTICLES_PER_SOURCE, max(round(expected), floor))
+            extra = min(cap - budgets[source['name']], remaining)
+            if extra > 0:
+                budgets[source['name']] += extra
+                remaining -= extra
+        
+        return [(s, budgets[s['name']]) for s in ranked]
+    
+    def record_history(self, source_names: List[str], started_at: float, duration: float,
+                       new_articles: int, metrics: dict) -> Dict[str, List[str]]:
+        """Append this run's per-source figures to the run history; returns regression flags"""
+        def by_source(metric, labels: Tuple[str, ...] = ()) -> Dict[str, float]:
+            totals: Dict[str, float] = {}
+            for key, value in metrics.get(metric.name, {}).items():
+                source, label = key.split('|', 1)
+                if not labels or label in labels:
+                    totals[source] = totals.get(source, 0) + value
+            return totals
+        
+        received = by_source(HTTP_BYTES)
+        submitted = by_source(SUBMISSIONS, ('created',))
+        failed = by_source(ARTICLES, ('fetch_failed', 'parse_failed'))
+        sources = {}
+        for name in source_names:
+            # Deferred sources were never fetched, so they say nothing about the site
+            if name not in self.source_stats or name in self.deferred['sources']:
+                continue
+            stats = self.source_stats[name]
+            sources[name] = {
+                'duration': stats['duration'], 'requests': stats['requests'], 'bytes': received.get(name, 0),
+                'links': stats['links'], 'new_links': stats['new_links'], 'processed': stats['processed'],
+                'matched': stats['matched'], 'submitted': submitted.get(name, 0), 'failed': failed.get(name, 0),
+                'errors': stats['errors'],
+            }
+        deferred = len(self.deferred['sources']) + sum(self.deferred['articles'].values())
+        self.history.record(started_at, duration, default_worker_id(), new_articles, deferred, sources)
+        
+        regressions = {}
+        for name in sources:
+            flags = self.history.trend(name)['flags']
+            if flags:
+                regressions[name] = flags
+                for flag in flags:
+                    log.warning(f"   📉 {name}: {flag}", source=name, regression=flag)
+        return regressions
+    
+    async def run(self, sources: List[dict] = None, deadline: Optional[datetime] = None) -> dict:
+        """Run the aggregator for all or specified sources.
+        
+        With a `deadline`, new fetches stop RUN_DEADLINE_MARGIN seconds before
+        it so in-flight articles can still be stored and submitted in time;
+        sources go best-yield first and articles newest first, so what gets
+        deferred is the least valuable work.
+        """
+        from http_client import ConnectionStats, create_client
+        run_started = time.monotonic()
+        started_at = time.time()
+        metrics_before = METRICS.snapshot()
+        
+        # Other workers may share the data directory - start from their latest writes
+        self.storage.reload()
+        self.seen_urls.reload()
+        self.source_yield.reload()
+        
+        # Only full runs are checkpointed; an unfinished one is resumed instead of restarted
+        full_run = sources is None
         sources = sources or SOURCES
+        resuming = full_run and self.checkpoint.active
         
-        print("=" * 60)
-        print(f"🚀 News Aggregator Started at {datetime.now().isoformat()}")
-        print(f"   Sources: {len(sources)}")
-        print(f"   Keywords: {len(KEYWORDS_KZ)} KZ, {len(KEYWORDS_RU)} RU")
-        print("=" * 60)
+        log.info("=" * 60)
+        log.info(f"🚀 News Aggregator Started at {datetime.now().isoformat()}")
+        log.info(f"   Sources: {len(sources)}")
+        for name, profile in KEYWORD_PROFILES.items():
+            log.info(f"   Keywords [{name}]: {len(profile.get('keywords_kz', []))} KZ, "
+                     f"{len(profile.get('keywords_ru', []))} RU")
+        stop_at = None
+        if deadline is not None:
+            remaining = (deadline - datetime.now()).total_seconds()
+            stop_at = time.monotonic() + remaining - RUN_DEADLINE_MARGIN
+            log.info(f"   Deadline: {deadline.isoformat(timespec='seconds')} ({remaining / 60:.1f} min)")
+        log.info("=" * 60)
         
-        all_articles = []
+        connection_stats = ConnectionStats()
+        if resuming:
+            by_name = {s['name']: s for s in sources}
+            plan = [
+                (by_name[entry['source']], entry['budget'])
+                for entry in self.checkpoint.state['plan']
+                if entry['source'] in by_name and not self.checkpoint.is_source_done(entry['source'])
+            ]
+            log.info(f"♻️  Resuming interrupted run from {self.checkpoint.state['started_at']}: "
+                     f"{len(plan)} sources left")
+        else:
+            plan = self.plan_budgets(sources)
+            if full_run:
+                self.checkpoint.start(plan)
         
-        async with httpx.AsyncClient(proxy=PROXY_URL) as client:
-            for source in sources:
-                articles = await self.fetch_source(source, client)
-                all_articles.extend(articles)
-                
-                # Delay between sources
-                await asyncio.sleep(1)
+        # Articles are stored by the pipeline's persist stage as they match
+        label = 'full run' if full_run else ', '.join(s['name'] for s in sources)
+        async with self.profiling(label), create_client(connection_stats, self.proxy_pool) as client:
+            all_articles, pipeline = await self.process_sources(
+                plan, client, self.checkpoint if full_run else None, stop_at
+            )
+        if full_run:
+            self.checkpoint.finish()
         
-        # Save new articles
-        if all_articles:
-            self.storage.add_many(all_articles)
+        budget_log = []
+        for source, _ in plan:
+            stats = self.source_stats.get(source['name'], {})
+            budget_log.append({
+                'source': source['name'],
+                'yield_per_request': round(self.source_yield.yield_per_request(source['name']), 3),
+                'budget': stats.get('budget', 0),
+                'fetched': stats.get('processed', 0),
+                'matched': stats.get('matched', 0),
+            })
         
         # Summary
         counts = self.storage.count()
         
-        print("\n" + "=" * 60)
-        print("📊 Summary:")
-        print(f"   New articles found: {len(all_articles)}")
-        print(f"   Total in storage: {counts['total']}")
-        print(f"   Pending moderation: {counts['pending']}")
-        print(f"   Approved: {counts['approved']}")
-        print(f"   Rejected: {counts['rejected']}")
-        print("=" * 60)
+        log.info("\n" + "=" * 60)
+        log.info("📊 Summary:")
+        log.info(f"   New articles found: {len(all_articles)}", new_articles=len(all_articles),
+                 duration=round(time.monotonic() - run_started, 2))
+        log.info(f"   Total in storage: {counts['total']}")
+        log.info(f"   Pending moderation: {counts['pending']}")
+        log.info(f"   Approved: {counts['approved']}")
+        log.info(f"   Rejected: {counts['rejected']}")
+        log.info(f"   Article budget: {RUN_ARTICLE_BUDGET} (min {MIN_ARTICLES_PER_SOURCE}/source)")
+        for entry in budget_log:
+            log.info(f"     {entry['source']}: {entry['fetched']}/{entry['budget']} fetched, "
+                     f"{entry['matched']} matched (yield {entry['yield_per_request']:.2f}/req)",
+                     source=entry['source'], budget=entry['budget'], fetched=entry['fetched'], matched=entry['matched'])
+        deferred_articles = sum(self.deferred['articles'].values())
+        if self.deferred['sources'] or deferred_articles:
+            log.info(f"   Deferred by deadline: {len(self.deferred['sources'])} sources, {deferred_articles} articles")
+            if self.deferred['sources']:
+                log.info(f"     Sources: {', '.join(self.deferred['sources'])}")
+            for name, count in self.deferred['articles'].items():
+                log.info(f"     {name}: {count} articles")
+        pipeline.print_report()
+        connection_stats.print_report()
+        self.proxy_pool.print_report()
+        
+        RUNS.inc()
+        LAST_RUN.set('timestamp', value=time.time())
+        LAST_RUN.set('duration_seconds', value=round(time.monotonic() - run_started, 2))
+        LAST_RUN.set('new_articles', value=len(all_articles))
+        metrics = METRICS.summary(since=metrics_before)
+        metrics['match_rate'] = match_rates(metrics)
+        metrics_file = write_run_summary(os.path.join(DATA_DIR, METRICS_DIR), metrics, METRICS_KEEP_RUNS)
+        log.info(f"   Metrics: {metrics_file}")
+        regressions = self.record_history(
+            [source['name'] for source, _ in plan], started_at, time.monotonic() - run_started,
+            len(all_articles), metrics
+        )
+        log.info("=" * 60)
         
         return {
             'new_articles': len(all_articles),
@@ -353,13 +1006,20 @@ class NewsAggregator:
             'pending': counts['pending'],
             'approved': counts['approved'],
             'rejected': counts['rejected'],
+            'budgets': budget_log,
+            'deferred': self.deferred,
+            'pipeline': pipeline.stats(),
+            'connections': connection_stats.to_dict(),
+            'proxies': self.proxy_pool.to_dict(),
+            'metrics': metrics,
+            'regressions': regressions,
         }
     
     async def run_single_source(self, source_name: str) -> dict:
         """Run aggregator for a single source by name"""
         source = next((s for s in SOURCES if s['name'] == source_name), None)
         if not source:
-            print(f"Source '{source_name}' not found")
+            log.error(f"Source '{source_name}' not found", source=source_name)
             return {'error': 'Source not found'}
         
         return await self.run([source])
@@ -376,25 +1036,160 @@ class NewsAggregator:
         """Reject an article"""
         return self.storage.update_status(article_id, 'rejected')
     
+    def select_articles(self, article_ids: Optional[List[int]] = None, status: Optional[str] = None,
+                        source: Optional[str] = None, category: Optional[str] = None,
+                        keyword: Optional[str] = None, older_than_days: Optional[float] = None) -> List[NewsArticle]:
+        """Stored articles with the given ids (all if None) that pass every given filter.
+        
+        `keyword` matches any matched keyword of the article or of its profiles,
+        compared by normalised words; `older_than_days` is counted from fetched_at.
+        """
+        if article_ids is None:
+            candidates = self.storage.get_all()
+        else:
+            candidates = [a for a in map(self.storage.get_by_id, dict.fromkeys(article_ids)) if a is not None]
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat() if older_than_days is not None else None
+        phrase = words(keyword) if keyword else None
+        phrases: Dict[str, Tuple[str, ...]] = {}
+        
+        def wanted(article: NewsArticle) -> bool:
+            if status and article.status != status:
+                return False
+            if source and article.source_name != source:
+                return False
+            if category and article.category != category:
+                return False
+            if cutoff and article.fetched_at >= cutoff:
+                return False
+            if phrase:
+                found = list(article.matched_keywords)
+                for match in article.profiles.values():
+                    found.extend(match.get('keywords', ()))
+                return any(phrases.setdefault(k, words(k)) == phrase for k in found)
+            return True
+        
+        return [a for a in candidates if wanted(a)]
+    
+    def moderate(self, new_status: str, article_ids: Optional[List[int]] = None, dry_run: bool = False,
+                 **filters) -> dict:
+        """Set `new_status` on every article select_articles() picks, with one write of news.json.
+        
+        Returns the selected articles and counts: changed, already in that
+        status, and requested ids that do not exist.
+        """
+        started = time.monotonic()
+        self.storage.reload()
+        selected = self.select_articles(article_ids, **filters)
+        to_change = [a.id for a in selected if a.status != new_status]
+        missing = 0
+        if article_ids is not None:
+            missing = sum(1 for i in set(article_ids) if self.storage.get_by_id(i) is None)
+        changed = len(to_change) if dry_run else self.storage.update_status_many(to_change, new_status)
+        return {
+            'selected': selected,
+            'changed': changed,
+            'unchanged': len(selected) - len(to_change),
+            'missing': missing,
+            'seconds': time.monotonic() - started,
+        }
+    
+    def search_articles(self, query: str = '', reindex: bool = False, **filters) -> Tuple[int, List[dict]]:
+        """Full-text search of stored articles (see SearchIndex.search for the filters).
+        
+        Articles the index is missing, e.g. stored before it existed, are indexed
+        first; reindex=True also re-checks the status and category of every article.
+        """
+        articles = self.storage.get_all()
+        if reindex or self.search_index.count() != len(articles):
+            indexed = self.search_index.sync(articles)
+            if indexed:
+                log.info(f"🔎 Indexed {indexed} articles for search")
+        return self.search_index.search(query, **filters)
+    
     def get_approved_for_crm(self) -> List[dict]:
         """Get approved articles in CRM format"""
         articles = self.storage.get_by_status('approved')
         return [a.to_crm_format() for a in articles]
+    
+    def export_crm(self, full: bool = False, compress: bool = False) -> dict:
+        """Stream approved articles to an NDJSON file under DATA_DIR/crm_export: those approved
+        since the previous export, or all of them with full=True"""
+        self.storage.reload()
+        exporter = CRMExporter(os.path.join(DATA_DIR, CRM_EXPORT_DIR))
+        return exporter.export(self.storage.get_all(), full=full, compress=compress)
 
 
 # CLI interface
+MODERATION_OPTIONS = {'--status': 'status', '--source': 'source', '--category': 'category',
+                      '--keyword': 'keyword', '--older-than': 'older_than_days'}
+
+
+def parse_moderation_args(args: List[str]) -> Tuple[Optional[List[int]], dict, bool]:
+    """(article ids or None, select_articles filters, dry run) from approve/reject arguments.
+    
+    IDs are given as ID, FROM-TO and comma-separated lists of those. Raises
+    ValueError on anything malformed - including ids that select nothing,
+    such as "10-8" - rather than fall back to the whole moderation queue.
+    Without any id argument, filters pick from pending articles only.
+    """
+    article_ids = None
+    filters = {}
+    dry_run = False
+    args = iter(args)
+    for arg in args:
+        if arg in MODERATION_OPTIONS:
+            value = next(args, None)
+            if value is None or value.startswith('--'):
+                raise ValueError(f"{arg} needs a value")
+            if arg == '--older-than':
+                try:
+                    filters['older_than_days'] = float(value)
+                except ValueError:
+                    raise ValueError(f"--older-than needs a number of days, not {value!r}") from None
+            else:
+                filters[MODERATION_OPTIONS[arg]] = value
+        elif arg == '--dry-run':
+            dry_run = True
+        elif arg.startswith('--'):
+            raise ValueError(f"unknown option {arg}")
+        else:
+            ids = []
+            for part in filter(None, arg.split(',')):
+                first, dash, last = part.partition('-')
+                if not first.isdigit() or (dash and not last.isdigit()):
+                    raise ValueError(f"invalid article id or range {part!r}")
+                if dash and int(first) > int(last):
+                    raise ValueError(f"empty range {part!r}: {first} is after {last}")
+                ids.extend(range(int(first), int(last or first) + 1))
+            if not ids:
+                raise ValueError(f"no article ids in {arg!r}")
+            article_ids = (article_ids or []) + ids
+    if article_ids is None and 'status' not in filters:
+        filters['status'] = 'pending'  # filters alone only pick from the moderation queue
+    return article_ids, filters, dry_run
+
+
 async def main():
     """Main entry point"""
     import sys
     
+    setup_logging()
     aggregator = NewsAggregator()
+    # --profile: sample the run and report time/allocations per stage and source
+    if '--profile' in sys.argv:
+        aggregator.profile = True
+        sys.argv.remove('--profile')
     
     if len(sys.argv) > 1:
         command = sys.argv[1]
         
         if command == 'fetch':
-            # Fetch all sources
-            await aggregator.run()
+            # Fetch all sources, optionally within a time budget: fetch --time-budget MINUTES
+            deadline = None
+            if '--time-budget' in sys.argv:
+                minutes = float(sys.argv[sys.argv.index('--time-budget') + 1])
+                deadline = datetime.now() + timedelta(minutes=minutes)
+            await aggregator.run(deadline=deadline)
         
         elif command == 'fetch-source' and len(sys.argv) > 2:
             # Fetch single source
@@ -411,30 +1206,131 @@ async def main():
                 print(f"      Keywords: {', '.join(a.matched_keywords[:5])}")
                 print()
         
-        elif command == 'approve' and len(sys.argv) > 2:
-            # Approve article
-            article_id = int(sys.argv[2])
-            if aggregator.approve_article(article_id):
-                print(f"✓ Article {article_id} approved")
+        elif command in ('approve', 'reject') and len(sys.argv) > 2:
+            # Moderate in bulk: approve|reject [ID | FROM-TO | ID,ID ...] [--source NAME] [--category C]
+            #                   [--keyword K] [--older-than DAYS] [--status S] [--dry-run]
+            status = 'approved' if command == 'approve' else 'rejected'
+            try:
+                article_ids, filters, dry_run = parse_moderation_args(sys.argv[2:])
+            except ValueError as e:
+                print(f"✗ {e}")
+                sys.exit(2)
+            result = aggregator.moderate(status, article_ids, dry_run=dry_run, **filters)
+            
+            article_ids = article_ids or []
+            single = len(article_ids) == 1 and not dry_run
+            if single and result['missing']:
+                print(f"✗ Article {article_ids[0]} not found")
+            elif single and result['selected']:
+                print(f"✓ Article {article_ids[0]} {status}")
+            else:
+                for a in result['selected'][:20]:
+                    print(f"  [{a.id}] {a.title[:60]}  ({a.source_name}, {a.status})")
+                if len(result['selected']) > 20:
+                    print(f"  ... and {len(result['selected']) - 20} more")
+                verb = 'would be' if dry_run else 'were'
+                print(f"✓ {result['changed']} articles {verb} {status} in {result['seconds'] * 1000:.0f} ms "
+                      f"({len(result['selected'])} selected, {result['unchanged']} already {status}, "
+                      f"{result['missing']} ids not found)")
+        
+        elif command == 'export-crm':
+            # Export articles approved since the last export as NDJSON: export-crm [--full] [--gzip]
+            result = aggregator.export_crm(full='--full' in sys.argv, compress='--gzip' in sys.argv)
+            if result['file']:
+                kind = 'full snapshot' if result['full'] else 'approved since the last export'
+                print(f"✓ Exported {result['articles']} articles ({kind}) to {result['file']} "
+                      f"({result['bytes'] / 1024:.0f} KB, {result['seconds']:.2f}s)")
             else:
-                print(f"✗ Article {article_id} not found")
+                print("✓ No articles approved since the last export")
+        
+        elif command == 'leases':
+            # Show which sharded worker owns which source
+            from sharding import LeaseStore
+            store = LeaseStore(os.path.join(DATA_DIR, LEASE_DB_FILE))
+            leases = store.leases()
+            print(f"\n🔒 Source leases ({len(leases)}/{len(SOURCES)} sources owned):")
+            for source, (worker, remaining) in leases.items():
+                print(f"   {source}: {worker} (expires in {remaining:.0f}s)")
+            store.close()
         
-        elif command == 'reject' and len(sys.argv) > 2:
-            # Reject article
-            article_id = int(sys.argv[2])
-            if aggregator.reject_article(article_id):
-                print(f"✓ Article {article_id} rejected")
+        elif command == 'history':
+            # Run trends and regression flags: history [SOURCE] [--runs N]
+            limit = int(sys.argv[sys.argv.index('--runs') + 1]) if '--runs' in sys.argv else None
+            if len(sys.argv) > 2 and not sys.argv[2].startswith('--'):
+                print_source_history(aggregator.history, sys.argv[2], limit or 20)
             else:
-                print(f"✗ Article {article_id} not found")
+                print_history(aggregator.history, limit or 10)
         
-        elif command == 'export-crm':
-            # Export approved articles in CRM format
-            import json
-            articles = aggregator.get_approved_for_crm()
-            output_file = os.path.join(DATA_DIR, 'crm_export.json')
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(articles, f, ensure_ascii=False, indent=2)
-            print(f"✓ Exported {len(articles)} articles to {output_file}")
+        elif command == 'reclassify':
+            # Re-match stored articles after keyword/category edits: reclassify [--dry-run]
+            dry_run = '--dry-run' in sys.argv
+            result = aggregator.reclassify(dry_run=dry_run)
+            changed = result['changed']
+            print(f"\n🔁 Reclassified {result['articles']} articles in {result['seconds']:.2f}s "
+                  f"({result['tokenized']} tokenized, {result['vocabulary']} distinct words)")
+            for article_id, fields in list(changed.items())[:20]:
+                article = aggregator.storage.get_by_id(article_id)
+                print(f"   [{article_id}] {article.title[:50]}  →  {fields['category']}: "
+                      f"{', '.join(fields['matched_keywords'][:5]) or '(no keywords)'}")
+            if len(changed) > 20:
+                print(f"   ... and {len(changed) - 20} more")
+            verb = 'would change' if dry_run else 'changed'
+            print(f"   {len(changed)} {verb}, {result['unmatched']} no longer match any keyword")
+        
+        elif command == 'search':
+            # Full-text search: search [WORDS...] [--status S] [--source NAME] [--category C]
+            #                          [--since YYYY-MM-DD] [--prefix] [--page N] [--per-page N] [--reindex]
+            options = {'--status': None, '--source': None, '--category': None, '--since': None,
+                       '--page': '1', '--per-page': '20'}
+            flags = {'--prefix', '--reindex'}
+            terms = []
+            args = iter(sys.argv[2:])
+            for arg in args:
+                if arg in options:
+                    options[arg] = next(args, None)
+                elif arg not in flags:
+                    terms.append(arg)
+            query = ' '.join(terms)
+            page, per_page = max(1, int(options['--page'])), int(options['--per-page'])
+            started = time.perf_counter()
+            total, hits = aggregator.search_articles(
+                query, reindex='--reindex' in sys.argv, status=options['--status'], source=options['--source'],
+                category=options['--category'], since=options['--since'], prefix='--prefix' in sys.argv,
+                limit=per_page, offset=(page - 1) * per_page,
+            )
+            pages = max(1, -(-total // per_page))
+            label = f'"{query}"' if query else 'all articles'
+            print(f"\n🔎 {total} results for {label} (page {page}/{pages}, "
+                  f"{(time.perf_counter() - started) * 1000:.1f} ms)\n")
+            for hit in hits:
+                score = f"  ({hit['score']})" if query else ''
+                print(f"  [{hit['id']}] {hit['title'][:60]}{score}")
+                print(f"      Source: {hit['source']} | Category: {hit['category']} | "
+                      f"Status: {hit['status']} | {hit['fetched_at'][:10]}")
+                if hit['snippet']:
+                    print(f"      {hit['snippet']}")
+                print()
+            if page < pages:
+                print(f"   More: add --page {page + 1}")
+        
+        elif command == 'reextract':
+            # Re-run the current parsers over archived pages: reextract [--source NAME] [--workers N] [--dry-run]
+            source = sys.argv[sys.argv.index('--source') + 1] if '--source' in sys.argv else None
+            workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+            dry_run = '--dry-run' in sys.argv
+            result = aggregator.reextract(source=source, workers=workers, dry_run=dry_run)
+            changed = result['changed']
+            print(f"\n🗃️  Re-extracted {result['archived']} of {result['articles']} articles from the archive "
+                  f"in {result['seconds']:.2f}s ({result['workers']} workers, no downloads)")
+            for article_id, fields in list(changed.items())[:20]:
+                article = aggregator.storage.get_by_id(article_id)
+                print(f"   [{article_id}] {article.title[:50]}  →  {', '.join(fields)}")
+            if len(changed) > 20:
+                print(f"   ... and {len(changed) - 20} more")
+            verb = 'would change' if dry_run else 'changed'
+            print(f"   {len(changed)} {verb}, {result['failed']} failed to extract, "
+                  f"{result['unmatched']} no longer match any keyword, "
+                  f"{result['articles'] - result['archived']} not archived")
         
         elif command == 'stats':
             # Show statistics
@@ -448,11 +1344,21 @@ async def main():
         else:
             print("Usage:")
             print("  python aggregator.py fetch              - Fetch from all sources")
+            print("  python aggregator.py fetch --time-budget MIN - Fetch, stopping new work before MIN minutes")
             print("  python aggregator.py fetch-source NAME  - Fetch from specific source")
+            print("  python aggregator.py fetch --profile    - Fetch and report time/allocations per stage")
             print("  python aggregator.py pending            - List pending articles")
-            print("  python aggregator.py approve ID         - Approve article")
-            print("  python aggregator.py reject ID          - Reject article")
-            print("  python aggregator.py export-crm         - Export approved to CRM format")
+            print("  python aggregator.py approve ID...      - Approve articles (IDs, FROM-TO ranges)")
+            print("  python aggregator.py reject ID...       - Reject articles (IDs, FROM-TO ranges)")
+            print("  python aggregator.py reject --source NAME --older-than DAYS [--category C] [--keyword K] [--dry-run]")
+            print("                                          - Moderate pending articles matching filters")
+            print("  python aggregator.py export-crm [--full] [--gzip] - Export newly approved (or all) to CRM NDJSON")
+            print("  python aggregator.py leases             - Show sharded worker leases")
+            print("  python aggregator.py history [NAME]     - Run history, source trends and regressions")
+            print("  python aggregator.py reclassify [--dry-run] - Re-match stored articles with the current keywords")
+            print("  python aggregator.py search WORDS [--status S] [--source NAME] [--category C] [--prefix] [--page N]")
+            print("                                          - Full-text search of stored articles")
+            print("  python aggregator.py reextract [--source NAME] [--dry-run] - Re-extract stored articles from archived HTML")
             print("  python aggregator.py stats              - Show statistics")
     else:
         # Default: fetch all
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the parsing, matching and storage hot paths.
+
+Run from the repository root:  python -m benchmarks.run
+"""
@@ -0,0 +1,202 @@
+"""
+Benchmark corpus: recorded listing/article pages per source, or a synthetic stand-in
+"""
+import hashlib
+import json
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from config import SOURCES, KEYWORDS_KZ, KEYWORDS_RU
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@dataclass
+class Page:
+    """One stored response: the URL it was requested as, and its decoded body"""
+    url: str
+    content: bytes
+    encoding: Optional[str] = None
+
+
+@dataclass
+class SourceCorpus:
+    """Listing and article pages of one source"""
+    source: dict
+    listings: List[Page] = field(default_factory=list)
+    articles: List[Page] = field(default_factory=list)
+
+
+@dataclass
+class Corpus:
+    sources: List[SourceCorpus]
+    recorded: bool    # False for the synthetic stand-in
+
+    @property
+    def pages(self) -> Dict[str, Page]:
+        return {page.url: page for sc in self.sources for page in sc.listings + sc.articles}
+
+    def fingerprint(self) -> str:
+        """Stable hash of the corpus, stored with the baseline so results are only compared like-for-like"""
+        digest = hashlib.sha1()
+        for url, page in sorted(self.pages.items()):
+            digest.update(url.encode('utf-8'))
+            digest.update(page.content)
+        return ('recorded:' if self.recorded else 'synthetic:') + digest.hexdigest()[:12]
+
+
+def source_slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+# ---------------------------------------------------------------------------
+# Recorded fixtures (benchmarks/record_fixtures.py)
+# ---------------------------------------------------------------------------
+
+def load_recorded(directory: str = FIXTURES_DIR) -> Optional[Corpus]:
+    """Load fixtures/<source>/manifest.json files, None if nothing was recorded"""
+    if not os.path.isdir(directory):
+        return None
+    by_name = {s['name']: s for s in SOURCES}
+    sources = []
+    for slug in sorted(os.listdir(directory)):
+        manifest_path = os.path.join(directory, slug, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            continue
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        source = by_name.get(manifest['source'], {'name': manifest['source'], 'url': manifest['base_url'], 'lang': ''})
+        sc = SourceCorpus(source)
+        for kind, pages in (('listings', sc.listings), ('articles', sc.articles)):
+            for entry in manifest[kind]:
+                with open(os.path.join(directory, slug, entry['file']), 'rb') as f:
+                    pages.append(Page(entry['url'], f.read(), entry.get('encoding')))
+        sources.append(sc)
+    return Corpus(sources, recorded=True) if sources else None
+
+
+# ---------------------------------------------------------------------------
+# Synthetic stand-in, shaped like each site's URLs and markup
+# ---------------------------------------------------------------------------
+
+# Article URL shapes that pass each dedicated parser's link patterns
+URL_SHAPES = {
+    'Stan.kz': 'https://stan.kz/news/{id}',
+    'Baq.kz': 'https://baq.kz/kz/news/{slug}-{id}',
+    'InformBuro': 'https://informburo.kz/novosti/{slug}-{id}',
+    'Orda.kz': 'https://orda.kz/posts/{slug}-{id}/',
+    'Sputnik KZ': 'https://ru.sputnik.kz/{ymd}/{slug}-{id}.html',
+    '24.kz': 'https://24.kz/kz/zha-aly-tar/{id}-{slug}',
+    'Zakon.kz': 'https://kaz.zakon.kz/news/{id}-{slug}.html',
+}
+GENERIC_SHAPE = '/news/{y}/{m}/{slug}-{id}'
+
+# Listing URLs the dedicated parsers request
+LISTING_URLS = {
+    'Stan.kz': ['https://stan.kz/'],
+    'Baq.kz': ['https://baq.kz/'],
+    'InformBuro': ['https://informburo.kz/'],
+    'Orda.kz': ['https://orda.kz/', 'https://orda.kz/posts', 'https://orda.kz/news'],
+    'Sputnik KZ': ['https://ru.sputnik.kz/'],
+    '24.kz': ['https://24.kz/kz/zha-aly-tar'],
+    'Zakon.kz': ['https://kaz.zakon.kz/'],
+}
+
+FILLER_KZ = [
+    "Бүгін облыс орталығында кезекті жиын өтті",
+    "Іс-шараға жергілікті тұрғындар мен сала мамандары қатысты",
+    "Жоба аясында бірнеше бағыт бойынша жұмыс жүргізіледі",
+    "Ұйымдастырушылардың айтуынша, бастама алдағы жылы да жалғасады",
+    "Кездесу барысында өзекті мәселелер талқыланды",
+]
+FILLER_RU = [
+    "Сегодня в областном центре прошло очередное заседание",
+    "В мероприятии приняли участие жители и профильные специалисты",
+    "В рамках проекта работа ведётся сразу по нескольким направлениям",
+    "По словам организаторов, инициатива продолжится и в следующем году",
+    "В ходе встречи обсудили наиболее актуальные вопросы",
+]
+NAV_LINKS = [
+    '/tag/zhanalyqtar', '/category/sayasat', '/author/redaktsiya', '/page/2', '/search?q=',
+    '/login', '/rss', 'https://facebook.com/share', 'https://t.me/news', '/about', '/contacts',
+]
+
+
+def article_url(source: dict, index: int, day: date) -> str:
+    slug = f"zhanalyq-{index}-{'abcdefghij'[index % 10]}"
+    values = {'id': 100000 + index, 'slug': slug, 'ymd': day.strftime('%Y%m%d'),
+              'y': day.strftime('%Y'), 'm': day.strftime('%m')}
+    shape = URL_SHAPES.get(source['name'])
+    if shape:
+        return shape.format(**values)
+    host = re.match(r'https?://[^/]+', source['url']).group(0)
+    return host + GENERIC_SHAPE.format(**values)
+
+
+def listing_html(source: dict, article_urls: List[str]) -> str:
+    items = '\n'.join(
+        f'<li class="news-item"><a href="{url}"><img src="/thumb/{i}.jpg">'
+        f'<span class="title">Жаңалық {i}</span></a><time>{i} сағат бұрын</time></li>'
+        for i, url in enumerate(article_urls)
+    )
+    nav = '\n'.join(f'<a href="{href}">nav</a>' for href in NAV_LINKS)
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{source["name"]}</title></head>'
+        f'<body><header><nav>{nav}</nav></header><main><ul class="news-list">{items}</ul></main>'
+        f'<footer>{nav}</footer></body></html>'
+    )
+
+
+def article_html(rng: random.Random, source: dict, url: str, index: int, day: date,
+                 keyword_density: Optional[float] = None) -> str:
+    """Article page; with `keyword_density`, that share of articles mentions a tracked keyword"""
+    lang = source.get('lang') or 'kz'
+    filler, keywords = (FILLER_KZ, KEYWORDS_KZ) if lang == 'kz' else (FILLER_RU, KEYWORDS_RU)
+    mentions = keyword_density is not None and rng.random() < keyword_density
+    paragraphs = []
+    for i in range(rng.randint(6, 14)):
+        sentences = [rng.choice(filler) for _ in range(rng.randint(2, 5))]
+        # By default roughly one article in three mentions a tracked keyword
+        if (index % 3 == 0 and rng.random() < 0.5) if keyword_density is None else (mentions and i == 0):
+            sentences.insert(rng.randrange(len(sentences) + 1), f"Тақырып: {rng.choice(keywords)}")
+        paragraphs.append('<p>' + '. '.join(sentences) + '.</p>')
+    title = f"{rng.choice(filler)} ({index})"
+    return (
+        f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="utf-8"><title>{title} | {source["name"]}</title>'
+        f'<meta name="description" content="{rng.choice(filler)}">'
+        f'<meta property="og:title" content="{title}">'
+        f'<meta property="og:image" content="{url.rstrip("/")}/cover.jpg">'
+        f'<meta property="article:published_time" content="{day.isoformat()}T10:00:00+05:00">'
+        f'</head><body><header><nav>' + ''.join(f'<a href="{h}">nav</a>' for h in NAV_LINKS) + '</nav></header>'
+        f'<main><article><h1>{title}</h1><div class="meta">{day.isoformat()}</div>'
+        f'<div class="content">{"".join(paragraphs)}</div></article>'
+        f'<aside><h3>Оқи отырыңыз</h3><ul>' + ''.join(f'<li><a href="/news/{index + k}">Related {k}</a></li>' for k in range(5)) +
+        '</ul></aside></main><footer>© 2025</footer></body></html>'
+    )
+
+
+def synthetic_corpus(articles_per_source: int = 12, links_per_listing: int = 40, seed: int = 1) -> Corpus:
+    """Deterministic pages for every configured source"""
+    rng = random.Random(seed)
+    start = date(2025, 1, 31)
+    sources = []
+    for source in SOURCES:
+        sc = SourceCorpus(source)
+        days = [start - timedelta(days=i // 8) for i in range(links_per_listing)]
+        urls = [article_url(source, i, day) for i, day in enumerate(days)]
+        for listing_url in LISTING_URLS.get(source['name'], [source['url']]):
+            sc.listings.append(Page(listing_url, listing_html(source, urls).encode('utf-8'), 'utf-8'))
+        for i in range(articles_per_source):
+            sc.articles.append(Page(urls[i], article_html(rng, source, urls[i], i, days[i]).encode('utf-8'), 'utf-8'))
+        sources.append(sc)
+    return Corpus(sources, recorded=False)
+
+
+def load_corpus(prefer_recorded: bool = True) -> Corpus:
+    """Recorded fixtures when present, otherwise the synthetic corpus"""
+    corpus = load_recorded() if prefer_recorded else None
+    return corpus or synthetic_corpus()
@@ -0,0 +1,127 @@
+"""
+Keyword matching: recall, precision and throughput of the inflection-aware
+KeywordMatcher against the whole-word regexes it replaced
+
+Usage:
+    python -m benchmarks.keywords            # labelled sentences + corpus throughput
+    python -m benchmarks.keywords --misses   # also list the sentences each matcher gets wrong
+"""
+import re
+import sys
+import time
+from typing import Callable, List, Set, Tuple
+
+from config import KEYWORDS_KZ, KEYWORDS_RU
+from keywords import KeywordMatcher, words
+from benchmarks.corpus import load_corpus
+
+# (sentence, keywords it mentions - by their normalised words). Mostly inflected forms,
+# plus sentences whose only overlap with a keyword is a different word.
+LABELLED: List[Tuple[str, Set[str]]] = [
+    # Kazakh: plural, possessive and case endings
+    ("Облыс әкімі жастарға арналған жаңа бағдарламаны таныстырды", {"жастар"}),
+    ("Студенттерге жатақханадан орын беріледі", {"студент", "жатақхана"}),
+    ("Қарағандыда өткен форумға жүзден астам жас келді", {"қарағанды"}),
+    ("Қарағанды облысында жаңа мектеп ашылды", {"қарағанды облысы", "қарағанды"}),
+    ("Университеттің түлектері гранттарын алды", {"университет", "грант"}),
+    ("Теміртаудағы зауыт жас мамандарды жұмысқа қабылдады", {"теміртау", "жас маман"}),
+    ("Балқашта фестивальге мыңдаған турист келді", {"балқаш", "фестиваль", "турист"}),
+    ("Волонтерлер сенбілікке шықты", {"волонтер", "сенбілік"}),
+    ("Кәсіпкерлікті қолдау бағдарламасы бойынша субсидиялар бөлінді", {"кәсіпкерлік қолдау", "субсидия"}),
+    ("Колледждің оқушылары хакатонда жеңіске жетті", {"колледж", "хакатон"}),
+    ("Футболдан облыстық турнир өтті", {"футбол"}),
+    ("Мұражайларда тегін экскурсия ұйымдастырылды", {"мұражай"}),
+    ("Жастар саясатын жүзеге асыру жоспары бекітілді", {"жастар саясаты", "жастар"}),
+    ("Несие алу үшін депозиттегі ақшаны пайдалануға болады", {"депозит"}),
+    ("Абай ауданында жол жөндеу басталды", {"абай ауданы"}),
+    ("Шахтинскіде жаңа спорт кешені салынады", {"шахтинск"}),
+    ("Лудоманиямен күрес бойынша дөңгелек үстел өтті", {"лудомания"}),
+    ("Жұмысқа орналасу жәрмеңкесі өтеді", {"жұмысқа орналасу"}),
+    # Russian: case and number forms
+    ("Для молодёжи Караганды открыли новый центр", {"молодежь", "караганда"}),
+    ("В Караганде прошёл фестиваль студентов", {"караганда", "фестиваль", "студент"}),
+    ("Жителям Карагандинской области выплатят субсидии", {"карагандинская область", "субсидия"}),
+    ("Студентам университетов увеличат стипендии", {"студент", "университет", "стипендия"}),
+    ("Молодым специалистам предложат льготные кредиты", {"молодой специалист", "льготный кредит", "кредит"}),
+    ("Власти Темиртау построят общежития для колледжей", {"темиртау", "общежитие", "колледж"}),
+    ("Волонтёры провели субботники в парках", {"волонтер", "субботник"}),
+    ("Победители хакатона получат гранты акима", {"хакатон", "грант", "грант акима"}),
+    ("Игромания и онлайн-казино: как защитить подростков", {"игромания", "онлайн казино"}),
+    ("Музеи и театры Балхаша работают бесплатно", {"музей", "театр", "балхаш"}),
+    ("Программы трудоустройства для выпускников", {"трудоустройство"}),
+    ("Открытие бизнеса стало проще", {"открытие бизнеса", "бизнес"}),
+    ("Рост туризма в регионе", {"туризм"}),
+    ("Для государственной программы выделено финансирование", {"государственная программа", "финансирование"}),
+    ("Приозёрск готовится к зиме", {"приозерск"}),
+    # Only unrelated words share letters with a keyword
+    ("Кинотеатр закрыли на ремонт, кинули клич о помощи", set()),
+    ("Жаңа тұрғын үйлер салынып жатыр", set()),
+    ("Карагач растёт в парке у театрального училища", set()),
+    ("Бизнесмен открыл кафе в центре города", set()),   # Kazakh "мен" ending, but Russian text
+    ("Бүгін ауа райы жылы болады", set()),
+    ("Акимат утвердил план на следующий год", set()),
+]
+
+
+class RegexMatcher:
+    """The previous matcher: one case-insensitive whole-word regex per configured spelling"""
+
+    def __init__(self, kz: List[str], ru: List[str]):
+        self.patterns = [(re.compile(rf'\b{re.escape(keyword)}\b', re.IGNORECASE | re.UNICODE), keyword)
+                         for keyword in list(kz) + list(ru)]
+
+    def match(self, text: str) -> List[str]:
+        return [keyword for pattern, keyword in self.patterns if pattern.search(text)]
+
+
+def score(match: Callable[[str], List[str]], show_misses: bool) -> Tuple[float, float]:
+    """Recall and precision over LABELLED, counting keywords by their normalised words"""
+    expected_total = found_total = correct = 0
+    for sentence, expected in LABELLED:
+        expected = {words(keyword) for keyword in expected}
+        found = {words(keyword) for keyword in match(sentence)}
+        expected_total += len(expected)
+        found_total += len(found)
+        correct += len(expected & found)
+        if show_misses and expected != found:
+            missed = ', '.join(' '.join(w) for w in expected - found) or '-'
+            extra = ', '.join(' '.join(w) for w in found - expected) or '-'
+            print(f"     {sentence[:60]:<60}  missed: {missed}; extra: {extra}")
+    recall = correct / expected_total if expected_total else 1.0
+    precision = correct / found_total if found_total else 1.0
+    return recall, precision
+
+
+def throughput(match: Callable[[str], List[str]], texts: List[str], repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            match(text)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best if best > 0 else float('inf')
+
+
+def main(argv: List[str]) -> int:
+    show_misses = '--misses' in argv
+    from benchmarks.run import _texts
+    corpus = load_corpus()
+    texts = _texts(corpus)
+
+    matchers = [
+        ('regex (whole words)', RegexMatcher(KEYWORDS_KZ, KEYWORDS_RU).match),
+        ('KeywordMatcher', KeywordMatcher(kz=KEYWORDS_KZ, ru=KEYWORDS_RU).match),
+    ]
+    print(f"📚 {len(LABELLED)} labelled sentences, {len(texts)} article texts from corpus {corpus.fingerprint()}")
+    print(f"\n{'matcher':<22} {'recall':>8} {'precision':>10} {'texts/sec':>12}")
+    print('-' * 55)
+    for name, match in matchers:
+        if show_misses:
+            print(f"   {name}:")
+        recall, precision = score(match, show_misses)
+        print(f"{name:<22} {recall:>8.0%} {precision:>10.0%} {throughput(match, texts):>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
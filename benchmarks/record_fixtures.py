@@ -0,0 +1,90 @@
+"""
+Record listing and article pages of each source into benchmarks/fixtures/ for offline benchmarks
+
+Usage (needs network access):
+    python -m benchmarks.record_fixtures              # all sources, 10 articles each
+    python -m benchmarks.record_fixtures 20 Stan.kz   # 20 articles, one source
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+
+from config import SOURCES
+from http_client import create_client
+from parsers import get_parser
+from benchmarks.corpus import FIXTURES_DIR, source_slug
+
+
+async def record_source(source: dict, client, articles: int) -> int:
+    """Save one source's listing pages and first `articles` article pages; returns pages saved"""
+    parser = get_parser(source['name'], source['url'])
+    listings = {}
+
+    # Capture every listing page the parser requests, whatever its sections are
+    fetch_page = parser.fetch_page
+
+    async def recording_fetch(url, client, kind='article'):
+        page = await fetch_page(url, client, kind)
+        if page is not None:
+            listings[url] = page
+        return page
+
+    parser.fetch_page = recording_fetch
+    links = await parser.get_article_links(client)
+    parser.fetch_page = fetch_page
+
+    pages = []
+    for url in links[:articles]:
+        page = await parser.fetch_page(url, client)
+        if page is not None:
+            pages.append((url, page))
+        await asyncio.sleep(0.5)
+
+    if not listings:
+        print(f"  ✗ {source['name']}: listing not reachable, skipped")
+        return 0
+
+    directory = os.path.join(FIXTURES_DIR, source_slug(source['name']))
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    manifest = {
+        'source': source['name'],
+        'base_url': source['url'],
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'listings': [],
+        'articles': [],
+    }
+    for kind, entries in (('listings', listings.items()), ('articles', pages)):
+        for i, (url, page) in enumerate(entries):
+            filename = f"{kind[:-1]}-{i:02d}.html"
+            with open(os.path.join(directory, filename), 'wb') as f:
+                f.write(page.content)
+            manifest[kind].append({'url': url, 'file': filename, 'encoding': page.encoding})
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"  ✓ {source['name']}: {len(listings)} listing, {len(pages)} article pages")
+    return len(listings) + len(pages)
+
+
+async def main():
+    args = sys.argv[1:]
+    articles = int(args.pop(0)) if args and args[0].isdigit() else 10
+    sources = [s for s in SOURCES if not args or s['name'] in args]
+
+    print(f"📼 Recording {len(sources)} sources into {FIXTURES_DIR}")
+    total = 0
+    async with create_client() as client:
+        for source in sources:
+            try:
+                total += await record_source(source, client, articles)
+            except Exception as e:
+                print(f"  ✗ {source['name']}: {e}")
+    print(f"📼 Saved {total} pages. Re-run `python -m benchmarks.run --update-baseline` to rebase.")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
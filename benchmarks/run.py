@@ -0,0 +1,559 @@
+"""
+Run the offline benchmarks and compare them with benchmarks/baseline.json
+
+Usage:
+    python -m benchmarks.run                       # compare with the baseline, exit 1 on regression
+    python -m benchmarks.run --update-baseline     # store this machine's results as the new baseline
+    python -m benchmarks.run --scale 1,10,100 --only storage
+    python -m benchmarks.run --tolerance 0.3       # allowed slowdown / memory growth (default 0.25)
+"""
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from models import NewsArticle, NewsStorage, SeenURLsTracker
+from parsers import FetchedPage, get_parser, read_metadata
+from search_index import SearchIndex
+from benchmarks.corpus import Corpus, load_corpus
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+AGGREGATOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'aggregator.py')
+DEFAULT_SCALES = (1, 10)      # corpus multipliers for the storage and seen-URL cases
+DEFAULT_TOLERANCE = 0.25
+MEMORY_SLACK_KB = 64          # ignore peak-memory noise below this
+STORAGE_BASE = 1000           # stored articles at scale 1
+SEEN_BASE = 10000             # seen URLs at scale 1
+BATCH = 20                    # articles per write, as in PIPELINE_PERSIST_BATCH
+
+# setup(corpus, scale) -> (function to time, operations per call)
+Setup = Callable[[Corpus, int], Tuple[Callable[[], None], int]]
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Setup
+    scaled: bool = True    # False: per-page work, measured at x1 only
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Run in a temporary working directory so nothing touches ./data"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def _pages(corpus: Corpus, kind: str) -> List[Tuple[dict, FetchedPage]]:
+    return [
+        (sc.source, FetchedPage(url=page.url, content=page.content, encoding=page.encoding))
+        for sc in corpus.sources for page in getattr(sc, kind)
+    ]
+
+
+_texts_cache: Dict[str, List[str]] = {}
+
+
+def _texts(corpus: Corpus) -> List[str]:
+    """Extracted article texts, as fed to keyword matching"""
+    key = corpus.fingerprint()
+    if key not in _texts_cache:
+        texts = []
+        for source, page in _pages(corpus, 'articles'):
+            data = get_parser(source['name'], source['url']).extract_article(page, page.url)
+            if data:
+                texts.append(f"{data.get('title', '')} {data.get('description', '')} {data.get('content', '')}")
+        _texts_cache[key] = texts
+    return _texts_cache[key]
+
+
+def _aggregator():
+    from aggregator import NewsAggregator
+    with scratch_dir():
+        return NewsAggregator()
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+def setup_listing_links(corpus: Corpus, scale: int):
+    """Each parser's get_article_links against recorded listings, served by a mock transport"""
+    pages = corpus.pages
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = pages.get(str(request.url))
+        if page is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=page.content,
+                              headers={'content-type': f"text/html; charset={page.encoding or 'utf-8'}"})
+
+    loop = asyncio.new_event_loop()
+    parsers = [get_parser(sc.source['name'], sc.source['url']) for sc in corpus.sources]
+
+    async def fetch_all():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            for _ in range(scale):
+                for parser in parsers:
+                    await parser.get_article_links(client)
+
+    listings = sum(len(sc.listings) for sc in corpus.sources)
+    return (lambda: loop.run_until_complete(fetch_all())), listings * scale
+
+
+def setup_find_article_links(corpus: Corpus, scale: int):
+    """Generic link heuristics (no site patterns) over every listing page"""
+    parser = get_parser('', '')
+    pages = _pages(corpus, 'listings')
+
+    def run():
+        for _ in range(scale):
+            for source, page in pages:
+                parser.find_article_links(page, page.url)
+
+    return run, len(pages) * scale
+
+
+def setup_extract(corpus: Corpus, scale: int):
+    """Each source's extract_article (extraction rules, trafilatura when they miss) over its article pages"""
+    jobs = [(get_parser(source['name'], source['url']), page) for source, page in _pages(corpus, 'articles')]
+
+    def run():
+        for _ in range(scale):
+            for parser, page in jobs:
+                parser.extract_article(page, page.url)
+                page._metadata = None  # a fetched page is extracted once and dropped; don't keep its metadata
+
+    return run, len(jobs) * scale
+
+
+def setup_extract_trafilatura(corpus: Corpus, scale: int):
+    """The trafilatura fallback alone, i.e. what a page costs when the rules miss"""
+    jobs = [(get_parser(source['name'], source['url']), page) for source, page in _pages(corpus, 'articles')]
+
+    def run():
+        for _ in range(scale):
+            for parser, page in jobs:
+                parser.extract_with_trafilatura(page, page.url)
+
+    return run, len(jobs) * scale
+
+
+def setup_extract_metadata(corpus: Corpus, scale: int):
+    """The metadata fast path (JSON-LD and <head> meta tags) the keyword pre-check reads"""
+    pages = [page for _, page in _pages(corpus, 'articles')]
+
+    def run():
+        for _ in range(scale):
+            for page in pages:
+                read_metadata(page)
+
+    return run, len(pages) * scale
+
+
+def setup_archive_add(corpus: Corpus, scale: int):
+    """PageArchive.add of every corpus article page (gzip WARC record + index row)"""
+    from page_archive import PageArchive
+    archive = PageArchive(tempfile.mkdtemp(dir=os.getcwd()))
+    pages = _pages(corpus, 'articles')
+
+    def run():
+        for _, page in pages:
+            archive.add(page.url, page)
+
+    return run, len(pages)
+
+
+def setup_archive_read(corpus: Corpus, scale: int):
+    """Reading every corpus article page back from the archive by URL"""
+    from page_archive import PageArchive
+    archive = PageArchive(tempfile.mkdtemp(dir=os.getcwd()))
+    pages = _pages(corpus, 'articles')
+    for _, page in pages:
+        archive.add(page.url, page)
+
+    def run():
+        for _, page in pages:
+            archive.get(page.url)
+
+    return run, len(pages)
+
+
+def _text_case(method: str):
+    def setup(corpus: Corpus, scale: int):
+        aggregator = _aggregator()
+        texts = _texts(corpus) * scale
+        if method == 'determine_category':
+            work = [(text, aggregator.match_keywords(text)) for text in texts]
+            func = aggregator.determine_category
+
+            def run():
+                for text, keywords in work:
+                    func(text, keywords)
+        else:
+            func = getattr(aggregator, method)
+
+            def run():
+                for text in texts:
+                    func(text)
+        return run, len(texts)
+    setup.__doc__ = f"NewsAggregator.{method} over extracted article texts"
+    return setup
+
+
+def setup_reclassify(corpus: Corpus, scale: int):
+    """NewsAggregator.reclassify (dry run, term index already built) over STORAGE_BASE*scale corpus articles"""
+    from config import DATA_DIR
+    aggregator = _aggregator()
+    os.makedirs(DATA_DIR, exist_ok=True)
+    aggregator.storage = NewsStorage(os.path.join(tempfile.mkdtemp(dir=os.getcwd()), 'news.json'))
+    texts = _texts(corpus)
+    aggregator.storage.add_many([
+        NewsArticle(title=f"Article {i}", content_text=texts[i % len(texts)], source_name="Bench")
+        for i in range(STORAGE_BASE * scale)
+    ])
+    aggregator.reclassify(dry_run=True)
+    return (lambda: aggregator.reclassify(dry_run=True)), STORAGE_BASE * scale
+
+
+def _articles(count: int, offset: int = 0) -> List[NewsArticle]:
+    return [
+        NewsArticle(title=f"Article {offset + i}", description="Сипаттама " * 10, content_text="Мәтін " * 300,
+                    source_url=f"https://example.kz/news/{offset + i}", source_name="Bench", language="kz",
+                    matched_keywords=["грант"])
+        for i in range(count)
+    ]
+
+
+def setup_storage_add_many(corpus: Corpus, scale: int):
+    """NewsStorage.add_many batches into a store already holding STORAGE_BASE*scale articles"""
+    directory = tempfile.mkdtemp(dir=os.getcwd())
+    storage = NewsStorage(os.path.join(directory, 'news.json'))
+    storage.add_many(_articles(STORAGE_BASE * scale))
+    batches = 5
+
+    def run():
+        for _ in range(batches):
+            storage.add_many(_articles(BATCH, offset=storage._next_id))
+
+    return run, batches * BATCH
+
+
+def setup_storage_moderate(corpus: Corpus, scale: int):
+    """NewsStorage.update_status_many: a 300-article moderation queue in a store of STORAGE_BASE*scale articles"""
+    directory = tempfile.mkdtemp(dir=os.getcwd())
+    storage = NewsStorage(os.path.join(directory, 'news.json'))
+    storage.add_many(_articles(STORAGE_BASE * scale))
+    queue = [a.id for a in storage.get_all()[-300:]]
+    statuses = iter(('approved', 'rejected') * 1000)
+
+    return (lambda: storage.update_status_many(queue, next(statuses))), len(queue)
+
+
+def setup_storage_load(corpus: Corpus, scale: int):
+    """Loading news.json with STORAGE_BASE*scale articles"""
+    directory = tempfile.mkdtemp(dir=os.getcwd())
+    path = os.path.join(directory, 'news.json')
+    NewsStorage(path).add_many(_articles(STORAGE_BASE * scale))
+    return (lambda: NewsStorage(path)), STORAGE_BASE * scale
+
+
+def _search_index(corpus: Corpus, count: int) -> SearchIndex:
+    index = SearchIndex(os.path.join(tempfile.mkdtemp(dir=os.getcwd()), 'search_index.db'))
+    texts = _texts(corpus)
+    articles = [NewsArticle(title=f"Article {i}", content_text=texts[i % len(texts)], source_name=f"Bench {i % 10}",
+                            category=('education', 'sports', 'general')[i % 3], matched_keywords=["грант"])
+                for i in range(count)]
+    for i, article in enumerate(articles, 1):
+        article.id = i
+    index.add(articles)
+    return index
+
+
+def setup_search_add(corpus: Corpus, scale: int):
+    """SearchIndex.add of new BATCH-article writes into an index of STORAGE_BASE*scale articles"""
+    index = _search_index(corpus, STORAGE_BASE * scale)
+    texts = _texts(corpus)
+    batches = 5
+
+    def run():
+        start = index.count() + 1
+        articles = [NewsArticle(title=f"Article {i}", content_text=texts[i % len(texts)], source_name="Bench")
+                    for i in range(start, start + batches * BATCH)]
+        for article_id, article in enumerate(articles, start):
+            article.id = article_id
+        for i in range(batches):
+            index.add(articles[i * BATCH:(i + 1) * BATCH])
+
+    return run, batches * BATCH
+
+
+def setup_search_query(corpus: Corpus, scale: int):
+    """SearchIndex.search: rare, common, prefix and filtered queries over STORAGE_BASE*scale articles"""
+    index = _search_index(corpus, STORAGE_BASE * scale)
+    queries = [
+        ('грант', {}),
+        ('облыс', {'source': 'Bench 3', 'status': 'pending'}),
+        ('студент', {'prefix': True}),
+        ('', {'category': 'sports', 'offset': 100}),
+    ]
+
+    def run():
+        for query, filters in queries:
+            index.search(query, **filters)
+
+    return run, len(queries)
+
+
+def setup_crm_export(corpus: Corpus, scale: int):
+    """CRMExporter full export of STORAGE_BASE*scale approved articles (peak memory should not grow)"""
+    from crm_export import CRMExporter
+    articles = _articles(STORAGE_BASE * scale)
+    for i, article in enumerate(articles, 1):
+        article.id, article.status, article.moderated_at = i, 'approved', f"2025-01-01T00:00:{i % 60:02d}"
+    exporter = CRMExporter(tempfile.mkdtemp(dir=os.getcwd()))
+    return (lambda: exporter.export(articles, full=True)), len(articles)
+
+
+def setup_seen_mark_many(corpus: Corpus, scale: int):
+    """SeenURLsTracker.mark_many_seen batches into SEEN_BASE*scale known URLs"""
+    directory = tempfile.mkdtemp(dir=os.getcwd())
+    seen = SeenURLsTracker(os.path.join(directory, 'seen.json'))
+    seen.mark_many_seen([f"https://example.kz/news/{i}" for i in range(SEEN_BASE * scale)])
+    batches = 5
+    counter = [SEEN_BASE * scale]
+
+    def run():
+        for _ in range(batches):
+            start = counter[0]
+            counter[0] += BATCH
+            seen.mark_many_seen([f"https://example.kz/news/{i}" for i in range(start, start + BATCH)])
+
+    return run, batches * BATCH
+
+
+def setup_seen_lookup(corpus: Corpus, scale: int):
+    """SeenURLsTracker.is_seen, half hits and half misses"""
+    directory = tempfile.mkdtemp(dir=os.getcwd())
+    seen = SeenURLsTracker(os.path.join(directory, 'seen.json'))
+    count = SEEN_BASE * scale
+    seen.mark_many_seen([f"https://example.kz/news/{i}" for i in range(count)])
+    urls = [f"https://example.kz/news/{i}" for i in range(count // 2, count + count // 2)]
+
+    def run():
+        for url in urls:
+            seen.is_seen(url)
+
+    return run, len(urls)
+
+
+def _cli_case(*args: str):
+    """One `python aggregator.py ARGS` process, start to exit, against a data directory of 200 articles"""
+    def setup(corpus: Corpus, scale: int):
+        directory = tempfile.mkdtemp(dir=os.getcwd())
+        storage = NewsStorage(os.path.join(directory, 'news.json'),
+                              index=SearchIndex(os.path.join(directory, 'search_index.db')))
+        storage.add_many(_articles(200))
+        env = dict(os.environ, DATA_DIR=directory, METRICS_PORT='0')
+
+        def run():
+            subprocess.run([sys.executable, AGGREGATOR, *args], env=env, cwd=directory, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        return run, 1
+
+    return setup
+
+
+CASES = [
+    Case('listing.get_article_links', setup_listing_links, scaled=False),
+    Case('listing.find_article_links', setup_find_article_links, scaled=False),
+    Case('extract.extract_article', setup_extract, scaled=False),
+    Case('extract.trafilatura', setup_extract_trafilatura, scaled=False),
+    Case('extract.metadata', setup_extract_metadata, scaled=False),
+    Case('archive.add', setup_archive_add, scaled=False),
+    Case('archive.read', setup_archive_read, scaled=False),
+    Case('classify.match_keywords', _text_case('match_keywords'), scaled=False),
+    Case('classify.determine_category', _text_case('determine_category'), scaled=False),
+    Case('classify.detect_language', _text_case('detect_language'), scaled=False),
+    Case('classify.reclassify', setup_reclassify),
+    Case('storage.add_many', setup_storage_add_many),
+    Case('storage.load', setup_storage_load),
+    Case('storage.update_status_many', setup_storage_moderate),
+    Case('search.add', setup_search_add),
+    Case('search.query', setup_search_query),
+    Case('crm.export', setup_crm_export),
+    Case('seen.mark_many_seen', setup_seen_mark_many),
+    Case('seen.is_seen', setup_seen_lookup),
+    Case('cli.usage', _cli_case('help'), scaled=False),
+    Case('cli.stats', _cli_case('stats'), scaled=False),
+    Case('cli.pending', _cli_case('pending'), scaled=False),
+    Case('cli.approve', _cli_case('approve', '1'), scaled=False),
+    Case('cli.reject_filtered', _cli_case('reject', '--source', 'Bench', '--older-than', '30', '--dry-run'),
+         scaled=False),
+    Case('cli.search', _cli_case('search', 'грант'), scaled=False),
+    Case('cli.history', _cli_case('history'), scaled=False),
+    Case('cli.export_crm', _cli_case('export-crm'), scaled=False),
+]
+
+
+# ---------------------------------------------------------------------------
+# Measurement and reporting
+# ---------------------------------------------------------------------------
+
+def measure(case: Case, corpus: Corpus, scale: int, repeat: int) -> dict:
+    """Best-of-`repeat` throughput, plus peak traced memory from one extra run"""
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        func, ops = case.setup(corpus, scale)
+        func()  # warm-up: imports, caches, lazily compiled regexes
+        timings = []
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+        gc.collect()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        'ops': ops,
+        'seconds': round(best, 6),
+        'ops_per_sec': round(ops / best, 2) if best > 0 else float('inf'),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: dict, tolerance: float) -> List[str]:
+    """Regression messages for results worse than the baseline beyond `tolerance`"""
+    problems = []
+    for key, result in results.items():
+        base = baseline['results'].get(key)
+        if not base:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            problems.append(f"{key}: {result['ops_per_sec']:.1f} ops/s vs baseline {base['ops_per_sec']:.1f} "
+                            f"({result['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%})")
+        if result['peak_kb'] > base['peak_kb'] * (1 + tolerance) + MEMORY_SLACK_KB:
+            problems.append(f"{key}: peak {result['peak_kb']:.0f} KB vs baseline {base['peak_kb']:.0f} KB")
+    return problems
+
+
+def print_table(results: Dict[str, dict], baseline: Optional[dict]):
+    print(f"\n{'benchmark':<36} {'ops/sec':>12} {'peak KB':>10} {'baseline':>12} {'change':>8}")
+    print('-' * 82)
+    for key, result in results.items():
+        base = (baseline or {}).get('results', {}).get(key)
+        base_text = f"{base['ops_per_sec']:.1f}" if base else '-'
+        change = f"{result['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%}" if base else ''
+        print(f"{key:<36} {result['ops_per_sec']:>12.1f} {result['peak_kb']:>10.1f} {base_text:>12} {change:>8}")
+
+
+def parse_args(argv: List[str]) -> dict:
+    options = {'scales': DEFAULT_SCALES, 'tolerance': DEFAULT_TOLERANCE, 'repeat': 3,
+               'only': None, 'update': False, 'synthetic': False}
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--update-baseline':
+            options['update'] = True
+        elif arg == '--synthetic':
+            options['synthetic'] = True
+        elif arg == '--scale':
+            options['scales'] = tuple(int(s) for s in args.pop(0).split(','))
+        elif arg == '--tolerance':
+            options['tolerance'] = float(args.pop(0))
+        elif arg == '--repeat':
+            options['repeat'] = int(args.pop(0))
+        elif arg == '--only':
+            options['only'] = args.pop(0)
+        else:
+            print(__doc__)
+            sys.exit(2)
+    return options
+
+
+def main(argv: List[str]) -> int:
+    options = parse_args(argv)
+    corpus = load_corpus(prefer_recorded=not options['synthetic'])
+    pages = corpus.pages
+    print(f"📚 Corpus: {corpus.fingerprint()} - {len(corpus.sources)} sources, {len(pages)} pages "
+          f"({'recorded' if corpus.recorded else 'synthetic - record real pages with benchmarks.record_fixtures'})")
+
+    baseline = None
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    # Storage cases write their files under this directory; it is removed afterwards
+    with scratch_dir():
+        for case in CASES:
+            if options['only'] and options['only'] not in case.name:
+                continue
+            for scale in (options['scales'] if case.scaled else (1,)):
+                key = f"{case.name}@x{scale}"
+                results[key] = measure(case, corpus, scale, options['repeat'])
+                print(f"  ⏱️  {key}: {results[key]['ops_per_sec']:.1f} ops/s, peak {results[key]['peak_kb']:.0f} KB")
+
+    comparable = baseline is not None and baseline.get('corpus') == corpus.fingerprint()
+    print_table(results, baseline if comparable else None)
+
+    if options['update']:
+        merged = dict(baseline['results']) if comparable else {}
+        merged.update(results)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'corpus': corpus.fingerprint(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': merged,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline updated: {BASELINE_FILE}")
+        return 0
+
+    if baseline is None:
+        print("\n⚠️  No baseline yet - run with --update-baseline to create one")
+        return 0
+    if not comparable:
+        print(f"\n⚠️  Baseline was taken on corpus {baseline.get('corpus')}, not {corpus.fingerprint()} "
+              f"- run with --update-baseline to rebase")
+        return 0
+
+    missing = [key for key in results if key not in baseline['results']]
+    if missing:
+        print(f"\n⚠️  Not in the baseline, so not checked: {', '.join(missing)} "
+              f"- run with --update-baseline --only <case> to record them")
+    problems = compare(results, baseline, options['tolerance'])
+    if problems:
+        print(f"\n❌ {len(problems)} regression(s) beyond {options['tolerance']:.0%}:")
+        for problem in problems:
+            print(f"   {problem}")
+        return 1
+    print(f"\n✅ No regressions beyond {options['tolerance']:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
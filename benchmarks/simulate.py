@@ -0,0 +1,374 @@
+"""
+Offline load simulator: synthetic news sites plus a mock backend, driven by a real `aggregator.py fetch`
+
+Usage:
+    python -m benchmarks.simulate --sources 10 --articles 50
+    python -m benchmarks.simulate --sources 20 --articles 100 --latency 0.2 --error-rate 0.05 \\
+        --rate-limit-rate 0.05 --redirect-rate 0.1 --keyword-density 0.3 \\
+        --api-latency 0.1 --api-conflict-rate 0.1 --api-error-rate 0.05
+    python -m benchmarks.simulate --serve      # only start the servers, for running aggregator.py by hand
+
+Each site gets its own loopback address (127.0.0.2, 127.0.0.3, ...), so per-host
+connection limits behave as they do against real sites. The aggregator runs as
+a subprocess with SOURCES_FILE, API_BASE_URL and DATA_DIR pointing at the
+simulator, so nothing in ./data is touched.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from config import API_SUBMIT_ENDPOINT
+from benchmarks.corpus import article_html, article_url, listing_html
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class SiteOptions:
+    sources: int = 10
+    articles: int = 50
+    latency: float = 0.05          # seconds, mean; each response takes 0.5-1.5x this
+    error_rate: float = 0.0        # share of requests answered with 500
+    rate_limit_rate: float = 0.0   # share answered with 429
+    redirect_rate: float = 0.0     # share of article requests redirected (301) to a canonical URL
+    keyword_density: float = 0.3   # share of articles mentioning a tracked keyword
+    kz_share: float = 0.6          # share of sources publishing in Kazakh
+    seed: int = 1
+
+
+@dataclass
+class ApiOptions:
+    latency: float = 0.05
+    conflict_rate: float = 0.0     # share of new submissions answered 409, besides real duplicates
+    error_rate: float = 0.0        # share answered 503
+
+
+@dataclass
+class ServerStats:
+    """Responses served, by status, and their latencies"""
+    statuses: Dict[int, int] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, status: int, latency: float):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.latencies.append(latency)
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class SimulatedSites:
+    """One HTTP server per synthetic source, each on its own loopback address"""
+
+    def __init__(self, options: SiteOptions):
+        self.options = options
+        self.stats = ServerStats()
+        self.served_at: Dict[str, float] = {}   # article path -> first time it was served
+        self.sources: List[dict] = []
+        self._pages: Dict[str, Dict[str, bytes]] = {}
+        self._servers: List[ThreadingHTTPServer] = []
+        self._rng = random.Random(options.seed)
+        self._rng_lock = threading.Lock()
+
+    def _roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _build(self, host: str, source: dict) -> Dict[str, bytes]:
+        rng = random.Random(f"{self.options.seed}:{host}")
+        start = date.today()
+        days = [start - timedelta(days=i // 10) for i in range(self.options.articles)]
+        urls = [article_url(source, i, day) for i, day in enumerate(days)]
+        pages = {'/': listing_html(source, urls).encode('utf-8')}
+        for i, url in enumerate(urls):
+            path = url[len(source['url']) - 1:]
+            pages[path] = article_html(rng, source, url, i, days[i], self.options.keyword_density).encode('utf-8')
+        return pages
+
+    def _handler(self, pages: Dict[str, bytes]):
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', headers: Optional[dict] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                started = time.monotonic()
+                options = sites.options
+                time.sleep(options.latency * (0.5 + sites._roll()))
+                path, _, query = self.path.partition('?')
+
+                roll = sites._roll()
+                if roll < options.error_rate:
+                    status = 500
+                    self._send(status, b'<h1>Internal Server Error</h1>')
+                elif roll < options.error_rate + options.rate_limit_rate:
+                    status = 429
+                    self._send(status, b'<h1>Too Many Requests</h1>', {'Retry-After': '30'})
+                elif path not in pages:
+                    status = 404
+                    self._send(status, b'<h1>Not Found</h1>')
+                elif path != '/' and not query and sites._roll() < options.redirect_rate:
+                    status = 301
+                    self._send(status, headers={'Location': path + '?utm_source=sim'})
+                else:
+                    status = 200
+                    if path != '/':
+                        sites.served_at.setdefault(f"{self.headers.get('Host')}{path}", time.time())
+                    self._send(status, pages[path])
+                sites.stats.record(status, time.monotonic() - started)
+
+        return Handler
+
+    def start(self) -> List[dict]:
+        """Start the servers and return the SOURCES entries pointing at them"""
+        kz_sources = round(self.options.sources * self.options.kz_share)
+        for i in range(self.options.sources):
+            host = f"127.0.0.{i + 2}"
+            server = _QuietServer((host, 0), None)
+            source = {
+                'name': f"Sim {i + 1:02d}",
+                'url': f"http://{host}:{server.server_address[1]}/",
+                'lang': 'kz' if i < kz_sources else 'ru',
+            }
+            server.RequestHandlerClass = self._handler(self._build(host, source))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._servers.append(server)
+            self.sources.append(source)
+        return self.sources
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+class MockBackend:
+    """Stand-in for API_SUBMIT_ENDPOINT: 201 for new articles, 409 for duplicates, optional 503s"""
+
+    def __init__(self, options: ApiOptions, seed: int = 1):
+        self.options = options
+        self.stats = ServerStats()
+        self.received_at: Dict[str, float] = {}   # source_url -> first accepted submission
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                started = time.monotonic()
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(backend.options.latency * (0.5 + backend._rng.random()))
+                if self.path != API_SUBMIT_ENDPOINT:
+                    status, reply = 404, {'detail': 'Not Found'}
+                else:
+                    try:
+                        source_url = json.loads(body).get('source_url', '')
+                    except ValueError:
+                        source_url = None
+                    with backend._lock:
+                        roll = backend._rng.random()
+                        if source_url is None:
+                            status, reply = 422, {'detail': 'Invalid JSON'}
+                        elif roll < backend.options.error_rate:
+                            status, reply = 503, {'detail': 'Service Unavailable'}
+                        elif source_url in backend.received_at or roll < backend.options.error_rate + backend.options.conflict_rate:
+                            status, reply = 409, {'detail': 'Already exists'}
+                        else:
+                            backend.received_at[source_url] = time.time()
+                            status, reply = 201, {'id': len(backend.received_at)}
+                payload = json.dumps(reply).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                backend.stats.record(status, time.monotonic() - started)
+
+        return Handler
+
+    def start(self) -> str:
+        """Start the server and return the API_BASE_URL for it"""
+        self._server = _QuietServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def end_to_end_latencies(sites: SimulatedSites, backend: MockBackend) -> List[float]:
+    """Seconds from an article page being served to its submission reaching the backend"""
+    latencies = []
+    for source_url, received in backend.received_at.items():
+        key = source_url.split('://', 1)[-1].split('?', 1)[0]
+        served = sites.served_at.get(key)
+        if served is not None:
+            latencies.append(received - served)
+    return latencies
+
+
+def print_report(wall: float, sites: SimulatedSites, backend: MockBackend, run_metrics: dict, exit_code: int):
+    site_latencies = sites.stats.latencies
+    api_latencies = backend.stats.latencies
+    e2e = end_to_end_latencies(sites, backend)
+    articles = run_metrics.get('newsparser_articles_total', {})
+    outcome = lambda name: int(sum(v for k, v in articles.items() if k.endswith('|' + name)))
+
+    print("\n" + "=" * 60)
+    print("📊 Simulation report")
+    print(f"   Aggregator exit code: {exit_code}, wall time {wall:.1f}s")
+    print(f"   Sites: {sum(sites.stats.statuses.values())} responses {dict(sorted(sites.stats.statuses.items()))}, "
+          f"p50 {percentile(site_latencies, 0.5) * 1000:.0f} ms, p95 {percentile(site_latencies, 0.95) * 1000:.0f} ms")
+    print(f"   Backend: {sum(backend.stats.statuses.values())} submissions {dict(sorted(backend.stats.statuses.items()))}, "
+          f"p50 {percentile(api_latencies, 0.5) * 1000:.0f} ms, p95 {percentile(api_latencies, 0.95) * 1000:.0f} ms")
+    print(f"   Articles: {outcome('fetched')} fetched, {outcome('fetch_failed')} failed, "
+          f"{outcome('matched')} matched, {outcome('skipped') + outcome('prechecked_out')} skipped"
+          + (f" ({outcome('prechecked_out')} on metadata alone)" if outcome('prechecked_out') else ''))
+    if wall > 0:
+        print(f"   Throughput: {outcome('fetched') / wall:.2f} articles/s fetched, "
+              f"{len(backend.received_at) / wall:.2f} articles/s accepted by the backend")
+    if e2e:
+        print(f"   End-to-end (page served → accepted): p50 {percentile(e2e, 0.5):.2f}s, "
+              f"p95 {percentile(e2e, 0.95):.2f}s, max {max(e2e):.2f}s, mean {statistics.mean(e2e):.2f}s")
+    stages = run_metrics.get('newsparser_stage_seconds', {})
+    if stages:
+        print("   Stage means:")
+        totals: Dict[str, List[float]] = {}
+        for key, series in stages.items():
+            stage = key.split('|')[-1]
+            count_sum = totals.setdefault(stage, [0, 0.0])
+            count_sum[0] += series['count']
+            count_sum[1] += series['sum']
+        for stage, (count, total) in totals.items():
+            print(f"     {stage:<8} {count:>5} items, mean {total / count * 1000:.1f} ms")
+    print("=" * 60)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.simulate', description=__doc__.split('\n')[1])
+    site = SiteOptions()
+    api = ApiOptions()
+    parser.add_argument('--sources', type=int, default=site.sources)
+    parser.add_argument('--articles', type=int, default=site.articles, help='articles per source')
+    parser.add_argument('--latency', type=float, default=site.latency, help='mean site latency, seconds')
+    parser.add_argument('--error-rate', type=float, default=site.error_rate)
+    parser.add_argument('--rate-limit-rate', type=float, default=site.rate_limit_rate)
+    parser.add_argument('--redirect-rate', type=float, default=site.redirect_rate)
+    parser.add_argument('--keyword-density', type=float, default=site.keyword_density)
+    parser.add_argument('--kz-share', type=float, default=site.kz_share)
+    parser.add_argument('--api-latency', type=float, default=api.latency)
+    parser.add_argument('--api-conflict-rate', type=float, default=api.conflict_rate)
+    parser.add_argument('--api-error-rate', type=float, default=api.error_rate)
+    parser.add_argument('--budget', type=int, default=None,
+                        help='RUN_ARTICLE_BUDGET for the run (default: every simulated article)')
+    parser.add_argument('--seed', type=int, default=site.seed)
+    parser.add_argument('--serve', action='store_true', help='only run the servers until interrupted')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    sites = SimulatedSites(SiteOptions(
+        sources=args.sources, articles=args.articles, latency=args.latency, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, redirect_rate=args.redirect_rate,
+        keyword_density=args.keyword_density, kz_share=args.kz_share, seed=args.seed,
+    ))
+    backend = MockBackend(ApiOptions(args.api_latency, args.api_conflict_rate, args.api_error_rate), seed=args.seed)
+
+    sources = sites.start()
+    api_base_url = backend.start()
+    work_dir = tempfile.mkdtemp(prefix='newsparser-sim-')
+    sources_file = os.path.join(work_dir, 'sources.json')
+    with open(sources_file, 'w', encoding='utf-8') as f:
+        json.dump(sources, f, ensure_ascii=False, indent=2)
+
+    env = dict(
+        os.environ,
+        SOURCES_FILE=sources_file,
+        API_BASE_URL=api_base_url,
+        SEND_TO_API='true',
+        DATA_DIR=os.path.join(work_dir, 'data'),
+        PROXY_URLS='',
+        METRICS_PORT='0',
+        RUN_ARTICLE_BUDGET=str(args.budget or args.sources * args.articles),
+        MAX_ARTICLES_PER_SOURCE=str(args.articles),
+    )
+    print(f"🧪 {args.sources} simulated sources x {args.articles} articles, backend at {api_base_url}")
+    print(f"   SOURCES_FILE={sources_file}")
+    print(f"   DATA_DIR={env['DATA_DIR']}")
+
+    try:
+        if args.serve:
+            print("   Serving until Ctrl+C - run e.g.:")
+            print(f"   SOURCES_FILE={sources_file} API_BASE_URL={api_base_url} DATA_DIR={env['DATA_DIR']} "
+                  f"python aggregator.py fetch")
+            while True:
+                time.sleep(3600)
+
+        started = time.monotonic()
+        log_path = os.path.join(work_dir, 'aggregator.log')
+        with open(log_path, 'w', encoding='utf-8') as log:
+            exit_code = subprocess.call([sys.executable, os.path.join(REPO_DIR, 'aggregator.py'), 'fetch'],
+                                        env=env, cwd=work_dir, stdout=log, stderr=subprocess.STDOUT)
+        wall = time.monotonic() - started
+        print(f"   Aggregator log: {log_path}")
+
+        metrics_dir = os.path.join(env['DATA_DIR'], 'metrics')
+        run_metrics = {}
+        if os.path.isdir(metrics_dir) and os.listdir(metrics_dir):
+            with open(os.path.join(metrics_dir, sorted(os.listdir(metrics_dir))[-1]), 'r', encoding='utf-8') as f:
+                run_metrics = json.load(f)
+        print_report(wall, sites, backend, run_metrics, exit_code)
+        return exit_code
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        sites.stop()
+        backend.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
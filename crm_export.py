@@ -0,0 +1,82 @@
+"""
+Incremental CRM export: approved articles streamed to NDJSON, one record per line,
+with a cursor so each export only carries what was approved since the last one
+"""
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from config import CRM_EXPORT_CURSOR_FILE
+from models import NewsArticle, file_lock, write_json
+
+
+class CRMExporter:
+    """Writes DIRECTORY/crm-<time>[-full].ndjson[.gz] files and keeps DIRECTORY/cursor.json.
+
+    The cursor holds the latest approval time already exported. A delta export
+    takes approved articles moderated after it; a full export (and the first
+    export of all) takes every approved article. Records are encoded and
+    written one at a time, so memory does not grow with the number exported.
+    The file appears under its final name only when complete, and the cursor
+    moves only after that, so an interrupted export is simply repeated.
+    """
+
+    def __init__(self, directory: str, cursor_file: str = CRM_EXPORT_CURSOR_FILE):
+        self.directory = directory
+        self.cursor_path = os.path.join(directory, cursor_file)
+        os.makedirs(directory, exist_ok=True)
+
+    def cursor(self) -> Optional[dict]:
+        try:
+            with open(self.cursor_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _selected(articles: Iterable[NewsArticle], since: Optional[str]) -> Iterator[NewsArticle]:
+        for article in articles:
+            if article.status == 'approved' and (since is None or article.moderated_at > since):
+                yield article
+
+    def export(self, articles: Iterable[NewsArticle], full: bool = False, compress: bool = False) -> dict:
+        """Export approved articles; returns the file written (None if there was nothing new) and counts"""
+        started = time.monotonic()
+        with file_lock(self.cursor_path):
+            cursor = self.cursor()
+            since = None if full or cursor is None else cursor['moderated_at']
+            name = f"crm-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{'-full' if since is None else ''}.ndjson"
+            path = os.path.join(self.directory, name + ('.gz' if compress else ''))
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+
+            exported = 0
+            latest = since or ''
+            opener = gzip.open if compress else open
+            with opener(tmp_path, 'wt', encoding='utf-8') as f:
+                for article in self._selected(articles, since):
+                    f.write(json.dumps(article.to_crm_format(), ensure_ascii=False))
+                    f.write('\n')
+                    exported += 1
+                    latest = max(latest, article.moderated_at)
+
+            if not exported:
+                os.remove(tmp_path)
+                path = None
+            else:
+                os.replace(tmp_path, path)
+                write_json(self.cursor_path, {
+                    'moderated_at': latest,
+                    'exported_at': datetime.now().isoformat(),
+                    'file': os.path.basename(path),
+                    'articles': exported,
+                })
+        return {
+            'file': path,
+            'articles': exported,
+            'full': since is None,
+            'bytes': os.path.getsize(path) if path else 0,
+            'seconds': time.monotonic() - started,
+        }
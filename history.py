@@ -0,0 +1,192 @@
+"""
+Run history: per-run, per-source figures kept in SQLite for trend and regression reports
+"""
+import sqlite3
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    HISTORY_KEEP_RUNS, HISTORY_RECENT_RUNS, HISTORY_BASELINE_RUNS,
+    HISTORY_SLOWDOWN_FACTOR, HISTORY_YIELD_DROP, HISTORY_FAILURE_RATE
+)
+
+# Per-source columns, in the order record() takes them from each source's entry
+SOURCE_FIELDS = (
+    'duration', 'requests', 'bytes', 'links', 'new_links', 'processed',
+    'matched', 'submitted', 'failed', 'errors',
+)
+
+
+def _median(values: List[float]) -> Optional[float]:
+    return statistics.median(values) if values else None
+
+
+class RunHistory:
+    """Append-only store of finished runs and each source's figures in them.
+
+    Several workers may share the file; SQLite serialises their writes.
+    Only the newest HISTORY_KEEP_RUNS runs are kept.
+    """
+
+    def __init__(self, filepath: str, keep: int = HISTORY_KEEP_RUNS):
+        self.filepath = filepath
+        self.keep = keep
+        self._conn = sqlite3.connect(filepath, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL NOT NULL, duration REAL NOT NULL, "
+            "worker TEXT NOT NULL, sources INTEGER NOT NULL, new_articles INTEGER NOT NULL, "
+            "deferred INTEGER NOT NULL)"
+        )
+        columns = ', '.join(f"{name} REAL NOT NULL DEFAULT 0" for name in SOURCE_FIELDS)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS source_runs ("
+            "run_id INTEGER NOT NULL, source TEXT NOT NULL, "
+            f"{columns}, PRIMARY KEY (run_id, source))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS source_runs_source ON source_runs (source, run_id)")
+        self._conn.commit()
+
+    def record(self, started_at: float, duration: float, worker: str, new_articles: int,
+               deferred: int, sources: Dict[str, dict]) -> int:
+        """Store one finished run; `sources` maps source name to its SOURCE_FIELDS values"""
+        with self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (started_at, duration, worker, sources, new_articles, deferred) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at, round(duration, 2), worker, len(sources), new_articles, deferred)
+            ).lastrowid
+            self._conn.executemany(
+                f"INSERT INTO source_runs (run_id, source, {', '.join(SOURCE_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' for _ in SOURCE_FIELDS)})",
+                [(run_id, name, *(values.get(field, 0) for field in SOURCE_FIELDS))
+                 for name, values in sources.items()]
+            )
+            if self.keep > 0:
+                oldest_kept = self._conn.execute(
+                    "SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?", (self.keep - 1,)
+                ).fetchone()
+                if oldest_kept:
+                    self._conn.execute("DELETE FROM source_runs WHERE run_id < ?", oldest_kept)
+                    self._conn.execute("DELETE FROM runs WHERE id < ?", oldest_kept)
+        return run_id
+
+    def runs(self, limit: int = 20) -> List[dict]:
+        """Newest runs first"""
+        cursor = self._conn.execute(
+            "SELECT id, started_at, duration, worker, sources, new_articles, deferred "
+            "FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def source_runs(self, source: str, limit: int = 20) -> List[dict]:
+        """One source's figures per run, newest first, with the run's start time"""
+        cursor = self._conn.execute(
+            f"SELECT r.started_at, {', '.join('s.' + field for field in SOURCE_FIELDS)} "
+            "FROM source_runs s JOIN runs r ON r.id = s.run_id "
+            "WHERE s.source = ? ORDER BY s.run_id DESC LIMIT ?", (source, limit)
+        )
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def sources(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT DISTINCT source FROM source_runs ORDER BY source")]
+
+    def trend(self, source: str, recent: int = HISTORY_RECENT_RUNS,
+              baseline: int = HISTORY_BASELINE_RUNS) -> dict:
+        """Median duration, time per article, yield and failure rate over the latest `recent` runs
+        against the `baseline` runs before them, plus regression flags"""
+        rows = self.source_runs(source, recent + baseline)
+        latest, earlier = rows[:recent], rows[recent:]
+
+        def figures(window: List[dict]) -> dict:
+            fetched = [row for row in window if row['processed']]
+            return {
+                'runs': len(window),
+                'duration': _median([row['duration'] for row in fetched]),
+                # Seconds per fetched article, so budget changes between runs don't read as slowdowns
+                'per_article': _median([row['duration'] / row['processed'] for row in fetched]),
+                'yield': _median([row['matched'] / row['processed'] for row in fetched]),
+                'failure_rate': _median([row['failed'] / row['processed'] for row in fetched]),
+                'links': _median([row['links'] for row in window]),
+            }
+
+        now, before = figures(latest), figures(earlier)
+        flags = []
+        # Too little history to call anything a regression
+        if latest and len(earlier) >= min(baseline, 3):
+            if now['links'] == 0 and before['links']:
+                flags.append('no links found - listing parser broken?')
+            if now['per_article'] and before['per_article'] and \
+                    now['per_article'] > before['per_article'] * HISTORY_SLOWDOWN_FACTOR:
+                flags.append(f"slower: {now['per_article']:.2f}s vs {before['per_article']:.2f}s per article")
+            if now['yield'] is not None and before['yield'] and now['yield'] < before['yield'] * HISTORY_YIELD_DROP:
+                flags.append(f"yield dropped: {now['yield']:.0%} vs {before['yield']:.0%}")
+            if (now['failure_rate'] or 0) >= HISTORY_FAILURE_RATE > (before['failure_rate'] or 0):
+                flags.append(f"failing: {now['failure_rate']:.0%} of articles not fetched/parsed")
+        return {'source': source, 'recent': now, 'baseline': before, 'flags': flags}
+
+    def regressions(self) -> Dict[str, List[str]]:
+        """Flags for every source that has any"""
+        trends = (self.trend(source) for source in self.sources())
+        return {trend['source']: trend['flags'] for trend in trends if trend['flags']}
+
+    def close(self):
+        self._conn.close()
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def _percent(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.0%}"
+
+
+def _seconds(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.2f}s"
+
+
+def print_history(history: RunHistory, limit: int = 10):
+    """Latest runs, then each source's recent figures against its baseline"""
+    runs = history.runs(limit)
+    print(f"\n📜 Last {len(runs)} runs:")
+    for run in runs:
+        deferred = f", {run['deferred']} deferred" if run['deferred'] else ''
+        print(f"   {format_time(run['started_at'])}  {run['duration']:>7.1f}s  {run['sources']:>2} sources  "
+              f"{run['new_articles']:>4} new{deferred}  ({run['worker']})")
+
+    print(f"\n📈 Sources: median of the last {HISTORY_RECENT_RUNS} runs "
+          f"(up to {HISTORY_BASELINE_RUNS} runs before them in brackets)")
+    print(f"   {'source':<20} {'time/article':>17} {'yield':>13} {'failed':>13}")
+    for source in history.sources():
+        trend = history.trend(source)
+        now, before = trend['recent'], trend['baseline']
+        print(f"   {source:<20} "
+              f"{_seconds(now['per_article']):>7} ({_seconds(before['per_article']):>7}) "
+              f"{_percent(now['yield']):>5} ({_percent(before['yield']):>5}) "
+              f"{_percent(now['failure_rate']):>5} ({_percent(before['failure_rate']):>5})")
+        for flag in trend['flags']:
+            print(f"     ⚠️  {flag}")
+
+
+def print_source_history(history: RunHistory, source: str, limit: int = 20):
+    """One source's figures run by run"""
+    rows = history.source_runs(source, limit)
+    if not rows:
+        print(f"No history for '{source}'")
+        return
+    print(f"\n📈 {source}: last {len(rows)} runs")
+    print(f"   {'run':<16} {'time':>7} {'req':>4} {'KB':>6} {'links':>5} {'new':>4} "
+          f"{'fetched':>7} {'matched':>7} {'sent':>4} {'failed':>6} {'art/s':>6}")
+    for row in rows:
+        rate = row['processed'] / row['duration'] if row['duration'] else 0.0
+        print(f"   {format_time(row['started_at']):<16} {row['duration']:>6.1f}s {row['requests']:>4.0f} "
+              f"{row['bytes'] / 1024:>6.0f} {row['links']:>5.0f} {row['new_links']:>4.0f} "
+              f"{row['processed']:>7.0f} {row['matched']:>7.0f} {row['submitted']:>4.0f} "
+              f"{row['failed']:>6.0f} {rate:>6.2f}")
+    for flag in history.trend(source)['flags']:
+        print(f"   ⚠️  {flag}")
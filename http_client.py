@@ -0,0 +1,288 @@
+"""
+Shared HTTP client factory with a tuned connection pool and per-host instrumentation
+"""
+import asyncio
+import importlib.util
+import socket
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import httpcore
+
+from config import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_MAX_PER_HOST,
+    HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED, DNS_CACHE_TTL, PROXY_BLOCK_STATUSES
+)
+from logs import get_logger
+from proxy_pool import ProxyPool
+
+log = get_logger('http')
+
+
+def _installed(*modules: str) -> bool:
+    """Whether any of `modules` can be imported, without importing it"""
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+
+def _brotli_available() -> bool:
+    """httpx only decodes br when a brotli package is installed"""
+    return _installed('brotli', 'brotlicffi')
+
+
+def _h2_available() -> bool:
+    return _installed('h2')
+
+
+# Only advertise encodings the client can actually decode
+ACCEPT_ENCODING = 'gzip, deflate, br' if _brotli_available() else 'gzip, deflate'
+
+
+@dataclass
+class HostStats:
+    """Connection usage counters for a single host"""
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    bytes_received: int = 0
+    errors: int = 0
+
+
+class ConnectionStats:
+    """Per-run connection pool report, keyed by host"""
+
+    def __init__(self):
+        self.hosts: Dict[str, HostStats] = {}
+
+    def host(self, host: str) -> HostStats:
+        if host not in self.hosts:
+            self.hosts[host] = HostStats()
+        return self.hosts[host]
+
+    def totals(self) -> HostStats:
+        total = HostStats()
+        for stats in self.hosts.values():
+            total.requests += stats.requests
+            total.connections_opened += stats.connections_opened
+            total.connections_reused += stats.connections_reused
+            total.bytes_received += stats.bytes_received
+            total.errors += stats.errors
+        return total
+
+    def to_dict(self) -> dict:
+        return {host: asdict(stats) for host, stats in self.hosts.items()}
+
+    def print_report(self):
+        """Log opened vs reused connections and bytes per host"""
+        total = self.totals()
+        log.info(f"   Connections: {total.connections_opened} opened, {total.connections_reused} reused "
+                 f"({total.requests} requests, {total.bytes_received / 1024:.0f} KB)")
+        for host, stats in sorted(self.hosts.items(), key=lambda item: -item[1].bytes_received):
+            log.info(f"     {host}: {stats.requests} req, {stats.connections_opened} opened / "
+                     f"{stats.connections_reused} reused, {stats.bytes_received / 1024:.0f} KB"
+                     + (f", {stats.errors} errors" if stats.errors else ""), host=host, **asdict(stats))
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches DNS lookups for DNS_CACHE_TTL seconds.
+    
+    Every address of a host is kept and tried in order on connect, as a
+    plain lookup would; an address that refuses or times out is moved to
+    the back, so later connections start with one that worked.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float):
+        self._backend = backend
+        self._ttl = ttl
+        self._cache: Dict[str, Tuple[List[str], float]] = {}
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        now = time.monotonic()
+        cached = self._cache.get(host)
+        if cached and cached[1] > now:
+            return cached[0]
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let the wrapped backend raise its usual ConnectError
+            return [host]
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[host] = (addresses, now + self._ttl)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self._resolve(host, port)
+        error = None
+        for address in list(addresses):
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+                addresses.remove(address)
+                addresses.append(address)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+class _CountingStream(httpx.AsyncByteStream):
+    """Response body wrapper that counts wire bytes and frees the host slot on close"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, stats: HostStats, release):
+        self._stream = stream
+        self._stats = stats
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._stats.bytes_received += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release:
+                self._release()
+                self._release = None
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper enforcing per-host concurrency and recording connection reuse"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: ConnectionStats,
+                 max_per_host: int = HTTP_MAX_PER_HOST):
+        self._transport = transport
+        self.stats = stats
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        stats = self.stats.host(host)
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        await slot.acquire()
+
+        opened = False
+
+        async def trace(event: str, info: dict):
+            nonlocal opened
+            if event == 'connection.connect_tcp.started':
+                opened = True
+
+        request.extensions['trace'] = trace
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            stats.errors += 1
+            slot.release()
+            raise
+
+        stats.requests += 1
+        if opened:
+            stats.connections_opened += 1
+        else:
+            stats.connections_reused += 1
+        response.stream = _CountingStream(response.stream, stats, slot.release)
+        return response
+
+    async def __aenter__(self):
+        await self._transport.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type=None, exc_value=None, traceback=None):
+        await self._transport.__aexit__(exc_type, exc_value, traceback)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ProxyRoutingTransport(httpx.AsyncBaseTransport):
+    """Sends each request through the proxy the pool picks for its host and session"""
+
+    def __init__(self, proxy_pool: ProxyPool, transports: Dict[str, httpx.AsyncBaseTransport]):
+        self.proxy_pool = proxy_pool
+        self._transports = transports
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        session = request.extensions.get('proxy_session')
+        # One retry through a different proxy when the first one is blocked or fails
+        attempts = 2 if len(self.proxy_pool.proxies) > 1 else 1
+        tried = ()
+        for attempt in range(attempts):
+            proxy = self.proxy_pool.choose(host, session, exclude=tried)
+            tried += (proxy,)
+            started = time.monotonic()
+            try:
+                response = await self._transports[proxy].handle_async_request(request)
+            except httpx.TransportError:
+                self.proxy_pool.record(proxy, host, time.monotonic() - started, error=True)
+                if attempt + 1 < attempts:
+                    continue
+                raise
+            self.proxy_pool.record(proxy, host, time.monotonic() - started, status=response.status_code)
+            if response.status_code in PROXY_BLOCK_STATUSES and attempt + 1 < attempts:
+                await response.aclose()
+                continue
+            return response
+
+    async def __aenter__(self):
+        for transport in self._transports.values():
+            await transport.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type=None, exc_value=None, traceback=None):
+        for transport in self._transports.values():
+            await transport.__aexit__(exc_type, exc_value, traceback)
+
+    async def aclose(self):
+        for transport in self._transports.values():
+            await transport.aclose()
+
+
+def _build_transport(limits: httpx.Limits, http2: bool, proxy: Optional[str]) -> httpx.AsyncHTTPTransport:
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2, proxy=proxy)
+
+    # httpx has no public hook for the resolver, so wrap the pool's network backend
+    pool = getattr(transport, '_pool', None)
+    if DNS_CACHE_TTL and pool is not None and hasattr(pool, '_network_backend'):
+        pool._network_backend = CachingNetworkBackend(pool._network_backend, DNS_CACHE_TTL)
+    return transport
+
+
+def create_client(stats: Optional[ConnectionStats] = None,
+                  proxy_pool: Optional[ProxyPool] = None) -> httpx.AsyncClient:
+    """Build the shared AsyncClient from the pool and proxy settings in config.py"""
+    http2 = HTTP2_ENABLED
+    if http2 and not _h2_available():
+        log.warning("⚠️  HTTP2_ENABLED is set but the 'h2' package is not installed - using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+    proxy_pool = proxy_pool if proxy_pool is not None else ProxyPool()
+    if proxy_pool:
+        transport = ProxyRoutingTransport(
+            proxy_pool, {proxy: _build_transport(limits, http2, proxy) for proxy in proxy_pool.proxies}
+        )
+    else:
+        transport = _build_transport(limits, http2, None)
+
+    # Limits and HTTP/2 live on the transports; AsyncClient ignores both when given a transport
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(transport, stats if stats is not None else ConnectionStats()),
+    )
@@ -0,0 +1,370 @@
+"""
+Keyword matching that understands Kazakh and Russian inflection.
+
+Each keyword word is reduced to a stem plus the set of endings its language
+allows after it ("жастар" + "ға", "Караганд" + "е"). All stems share one
+character trie, so a text is matched in a single pass over its words.
+
+Kazakh endings are only applied in Kazakh text, i.e. text with at least one
+Kazakh-specific letter. Elsewhere a Kazakh keyword takes Russian endings, so
+the Kazakh "бизнес" still finds "бизнеса" in Russian text but not
+"бизнесмен" (the instrumental "мен").
+"""
+import re
+from dataclasses import dataclass, field
+from itertools import compress, count, product
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+# Words joined by hyphens are separate words on both sides ("онлайн-казино" = "онлайн казино")
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+WORD_GAP_RE = re.compile(r'(\w+)(\W*)', re.UNICODE)
+# What may separate the words of a phrase in the text
+PHRASE_GAP_RE = re.compile(r'[\s\-‐–—]*')
+
+# Kazakh is agglutinative: plural, possessive and case endings stack on an unchanged stem.
+# Vowel harmony is not checked - every variant is allowed after every stem.
+KZ_PLURAL = ('', 'лар', 'лер', 'дар', 'дер', 'тар', 'тер')
+KZ_POSSESSIVE = (
+    '', 'ы', 'і', 'сы', 'сі', 'ым', 'ім', 'м', 'ың', 'ің', 'ң', 'ыңыз', 'іңіз', 'ңыз', 'ңіз',
+    'ымыз', 'іміз', 'мыз', 'міз',
+)
+KZ_CASE = (
+    '',
+    'ға', 'ге', 'қа', 'ке', 'на', 'не', 'а', 'е',                        # dative
+    'да', 'де', 'та', 'те', 'нда', 'нде',                                # locative
+    'дан', 'ден', 'тан', 'тен', 'нан', 'нен', 'ндан', 'нден',            # ablative
+    'ды', 'ді', 'ты', 'ті', 'ны', 'ні', 'н',                             # accusative
+    'дың', 'дің', 'тың', 'тің', 'ның', 'нің',                            # genitive
+    'мен', 'бен', 'пен', 'менен', 'бенен', 'пенен',                      # instrumental
+    'дағы', 'дегі', 'тағы', 'тегі', 'ндағы', 'ндегі',                    # "located in"
+    'ша', 'ше', 'шы', 'ші', 'лық', 'лік', 'дық', 'дік', 'тық', 'тік',   # common derivations
+)
+KZ_ENDINGS: FrozenSet[str] = frozenset(''.join(parts) for parts in product(KZ_PLURAL, KZ_POSSESSIVE, KZ_CASE))
+# Final voiceless consonants voice before a vowel: кәсіп → кәсібі, жүрек → жүрегі
+KZ_VOICING = {'п': 'б', 'к': 'г', 'қ': 'ғ'}
+# Letters of Kazakh but not Russian; a text with none of them gets no Kazakh endings
+KZ_LETTER_RE = re.compile('[әіңғүұқөһ]')
+
+# Russian noun and adjective case endings; the keyword's own ending is cut off to get the stem
+RU_ENDINGS: FrozenSet[str] = frozenset((
+    '', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+    'ой', 'ей', 'ою', 'ею', 'ом', 'ем', 'ам', 'ям', 'ами', 'ями', 'ах', 'ях', 'ов', 'ев',
+    'ий', 'ие', 'ия', 'ию', 'ии', 'ием', 'иям', 'иями', 'иях',
+    'ье', 'ья', 'ьи', 'ью', 'ьем', 'ьей', 'ьям', 'ьями', 'ьях', 'ьев',
+    'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ого', 'его', 'ому', 'ему', 'ым', 'им',
+    'ую', 'юю', 'ых', 'их', 'ыми', 'ими',
+))
+RU_MIN_STEM = 4  # shorter words ("кино", "IT") are matched with their endings, never cut
+
+_ENTRIES = None  # trie key holding the words that end at a node
+
+
+def normalize(text: str) -> str:
+    """Lowercase and fold ё into е, so "молодёжь" and "молодежь" are one word"""
+    return text.lower().replace('ё', 'е')
+
+
+def words(text: str) -> Tuple[str, ...]:
+    """The normalised words of a keyword or phrase"""
+    return tuple(WORD_RE.findall(normalize(text)))
+
+
+def tokenize(text: str) -> Tuple[List[str], List[int]]:
+    """Normalised words of a text, and the positions whose word is not joined to the next
+    by a phrase separator (so no phrase can continue across them)"""
+    pairs = WORD_GAP_RE.findall(normalize(text))
+    breaks = [index for index, (_, gap) in enumerate(pairs) if PHRASE_GAP_RE.fullmatch(gap) is None]
+    return [word for word, _ in pairs], breaks
+
+
+def is_kazakh(text: str) -> bool:
+    """Whether Kazakh endings apply in a (normalised) text"""
+    return KZ_LETTER_RE.search(text) is not None
+
+
+def ru_stem(word: str) -> str:
+    for size in (4, 3, 2, 1):
+        if len(word) - size >= RU_MIN_STEM and word[-size:] in RU_ENDINGS:
+            return word[:-size]
+    return word
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """One occurrence of a keyword in a text: the keyword as configured and the form found"""
+    keyword: str
+    form: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class _Word:
+    stem: str
+    endings: Optional[FrozenSet[str]]  # None: any ending (prefix match)
+    needs_ending: bool = False          # voiced stem variant, only valid before an ending
+    other_endings: Optional[FrozenSet[str]] = None  # endings in non-Kazakh text, if not `endings`
+
+    def endings_in(self, kazakh: bool) -> Optional[FrozenSet[str]]:
+        return self.endings if kazakh or self.other_endings is None else self.other_endings
+
+    def matches(self, token: str, kazakh: bool = True) -> bool:
+        if not token.startswith(self.stem):
+            return False
+        tail = token[len(self.stem):]
+        if self.needs_ending and not tail:
+            return False
+        endings = self.endings_in(kazakh)
+        return endings is None or tail in endings
+
+
+class KeywordMatcher:
+    """Matches inflected forms of Kazakh and Russian keywords in one scan over a text.
+
+        matcher = KeywordMatcher(kz=KEYWORDS_KZ, ru=KEYWORDS_RU)
+        matcher.match("Қарағандыда жастарға грант берілді")  # ['Қарағанды', 'жастар', 'грант']
+
+    With prefix=True the terms match any word that starts with them, with no
+    ending rules (for CATEGORY_MAPPING, whose terms are already stems).
+    Spellings that normalise to the same words ("молодёжь"/"молодежь",
+    "онлайн казино"/"онлайн-казино") are reported once, under the first one
+    configured; each language still applies its own endings to them.
+    """
+
+    def __init__(self, kz: Iterable[str] = (), ru: Iterable[str] = (), prefix: bool = False):
+        self._trie: Dict = {}
+        self.keywords: List[str] = []
+        canonical: Dict[Tuple[str, ...], str] = {}
+        seen = set()
+        for language, keywords in (('kz', kz), ('ru', ru)):
+            for keyword in keywords:
+                phrase = words(keyword)
+                if not phrase or (language, phrase) in seen:
+                    continue
+                seen.add((language, phrase))
+                if phrase not in canonical:
+                    canonical[phrase] = keyword
+                    self.keywords.append(keyword)
+                keyword = canonical[phrase]
+                variants = [self._word_variants(word, language, prefix) for word in phrase]
+                for first in variants[0]:
+                    self._insert(first, keyword, tuple(tuple(options) for options in variants[1:]))
+
+    @staticmethod
+    def _word_variants(word: str, language: str, prefix: bool) -> List[_Word]:
+        if prefix:
+            return [_Word(word, None)]
+        if language == 'ru':
+            return [_Word(ru_stem(word), RU_ENDINGS)]
+        variants = [_Word(word, KZ_ENDINGS, other_endings=RU_ENDINGS)]
+        if word[-1] in KZ_VOICING and len(word) > 3:
+            variants.append(_Word(word[:-1] + KZ_VOICING[word[-1]], KZ_ENDINGS, needs_ending=True,
+                                  other_endings=frozenset()))
+        return variants
+
+    def _insert(self, first: _Word, keyword: str, rest: Tuple[Tuple[_Word, ...], ...]):
+        node = self._trie
+        for char in first.stem:
+            node = node.setdefault(char, {})
+        node.setdefault(_ENTRIES, []).append((first, keyword, rest))
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """Every keyword occurrence in the text, in order"""
+        if not text:
+            return []
+        lowered = normalize(text)
+        if len(lowered) != len(text):
+            text = lowered  # a few characters change length when lowercased; keep offsets consistent
+        # One C-level pass splits the text into (word, separator after it) pairs
+        pairs = WORD_GAP_RE.findall(lowered)
+        first_word = WORD_RE.search(lowered)
+        position = first_word.start() if first_word else 0
+        kazakh = is_kazakh(lowered)
+        found = []
+        reported = set()
+        # Words repeat a lot within an article; walk the trie once per distinct word
+        heads: Dict[str, list] = {}
+        for index, (token, gap) in enumerate(pairs):
+            candidates = heads.get(token)
+            if candidates is None:
+                candidates = heads[token] = self._heads(token, kazakh)
+            for keyword, rest in candidates:
+                if (keyword, position) in reported:
+                    continue  # e.g. "студент" is both a Kazakh and a Russian keyword
+                last = self._match_rest(pairs, index, rest, kazakh) if rest else index
+                if last is not None:
+                    end = position + sum(len(w) + len(g) for w, g in pairs[index:last]) + len(pairs[last][0])
+                    reported.add((keyword, position))
+                    found.append(KeywordMatch(keyword, text[position:end], position, end))
+            position += len(token) + len(gap)
+        return found
+
+    def _heads(self, token: str, kazakh: bool = True) -> list:
+        """(keyword, remaining phrase words) for every keyword whose first word this token is a form of"""
+        candidates = []
+        node = self._trie
+        for position, char in enumerate(token):
+            node = node.get(char)
+            if node is None:
+                break
+            entries = node.get(_ENTRIES)
+            if not entries:
+                continue
+            tail = token[position + 1:]
+            for first, keyword, rest in entries:
+                endings = first.endings_in(kazakh)
+                if (first.needs_ending and not tail) or (endings is not None and tail not in endings):
+                    continue
+                candidates.append((keyword, rest))
+        return candidates
+
+    @staticmethod
+    def _match_rest(pairs: List[Tuple[str, str]], index: int,
+                    rest: Tuple[Tuple[_Word, ...], ...], kazakh: bool) -> Optional[int]:
+        """Index of the phrase's last word if the words after the first follow it, else None"""
+        for offset, options in enumerate(rest, 1):
+            if index + offset >= len(pairs):
+                return None
+            if PHRASE_GAP_RE.fullmatch(pairs[index + offset - 1][1]) is None:
+                return None
+            token = pairs[index + offset][0]
+            if not any(word.matches(token, kazakh) for word in options):
+                return None
+        return index + len(rest)
+
+    def heads(self, vocabulary: Sequence[str], kazakh: bool = True) -> Dict[int, list]:
+        """Sparse word id -> keyword candidates relation for a whole vocabulary, for match_encoded()
+        on Kazakh texts (kazakh=True) or on the others"""
+        heads = {}
+        for word_id, word in enumerate(vocabulary):
+            candidates = self._heads(word, kazakh)
+            if candidates:
+                heads[word_id] = candidates
+        return heads
+
+    def match_encoded(self, tokens: Sequence[int], breaks: Iterable[int], vocabulary: Sequence[str],
+                      heads: Dict[int, list], kazakh: bool = True) -> List[str]:
+        """match() over a text already split into vocabulary ids (see term_index).
+
+        `breaks` are the positions whose word is not joined to the next one by
+        a phrase separator; `heads` is heads(vocabulary, kazakh), with `kazakh`
+        telling whether the text has a word with a Kazakh-specific letter.
+        """
+        found: Dict[str, None] = {}
+        broken = None
+        # Most words start no keyword; find the ones that do without a Python-level loop
+        for index in compress(count(), map(heads.__contains__, tokens)):
+            for keyword, rest in heads[tokens[index]]:
+                if keyword in found:
+                    continue
+                if rest:
+                    if broken is None:
+                        broken = set(breaks)
+                    if not all(index + offset < len(tokens) and index + offset - 1 not in broken
+                               and any(word.matches(vocabulary[tokens[index + offset]], kazakh) for word in options)
+                               for offset, options in enumerate(rest, 1)):
+                        continue
+                found[keyword] = None
+        return list(found)
+
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """Matched keywords in order of first occurrence, each with the distinct forms found"""
+        forms: Dict[str, List[str]] = {}
+        for match in self.find(text):
+            keyword_forms = forms.setdefault(match.keyword, [])
+            if match.form not in keyword_forms:
+                keyword_forms.append(match.form)
+        return forms
+
+    def match(self, text: str) -> List[str]:
+        """Matched keywords in order of first occurrence"""
+        return list(dict.fromkeys(match.keyword for match in self.find(text)))
+
+
+@dataclass
+class ProfileMatch:
+    """What one keyword profile matched in an article"""
+    keywords: List[str]
+    category: str
+    forms: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class ProfileClassifier:
+    """Every keyword profile (see KEYWORD_PROFILES) compiled into one keyword trie and one category trie.
+
+    A text is scanned once for the keywords of all profiles and once for
+    all category terms; the matches are then split by profile. Keywords
+    belong to a profile by their normalised words, and are reported in the
+    profile's own spelling.
+    """
+
+    def __init__(self, profiles: Dict[str, dict]):
+        self.names = list(profiles)
+        self.keyword_matcher = KeywordMatcher(
+            kz=[keyword for profile in profiles.values() for keyword in profile.get('keywords_kz', ())],
+            ru=[keyword for profile in profiles.values() for keyword in profile.get('keywords_ru', ())],
+        )
+        self.category_matcher = KeywordMatcher(
+            ru=[term for profile in profiles.values() for terms in profile.get('categories', {}).values()
+                for term in terms],
+            prefix=True,
+        )
+        # Per profile: keyword words -> the profile's spelling, and category term words -> categories
+        self._keywords: Dict[str, Dict[Tuple[str, ...], str]] = {}
+        self._term_categories: Dict[str, Dict[Tuple[str, ...], List[str]]] = {}
+        for name, profile in profiles.items():
+            keywords = self._keywords[name] = {}
+            for keyword in list(profile.get('keywords_kz', ())) + list(profile.get('keywords_ru', ())):
+                keywords.setdefault(words(keyword), keyword)
+            term_categories = self._term_categories[name] = {}
+            for category, terms in profile.get('categories', {}).items():
+                for term in terms:
+                    categories = term_categories.setdefault(words(term), [])
+                    if category not in categories:
+                        categories.append(category)
+        self._words: Dict[str, Tuple[str, ...]] = {}
+
+    def _words_of(self, keyword: str) -> Tuple[str, ...]:
+        phrase = self._words.get(keyword)
+        if phrase is None:
+            phrase = self._words[keyword] = words(keyword)
+        return phrase
+
+    def category(self, profile: str, terms: Iterable[str]) -> str:
+        """The profile's category with the most matched terms; ties go to the first one found"""
+        term_categories = self._term_categories[profile]
+        scores: Dict[str, int] = {}
+        for term in terms:
+            for category in term_categories.get(self._words_of(term), ()):
+                scores[category] = scores.get(category, 0) + 1
+        if scores:
+            return max(scores, key=scores.get)
+        return "general"
+
+    def assign(self, keywords: List[str], terms: List[str]) -> Dict[str, ProfileMatch]:
+        """Split keywords and category terms matched across all profiles into per-profile matches.
+
+        As in the single-profile classifier, a profile's category is scored on
+        the text's terms followed by the terms in its own matched keywords.
+        """
+        result = {}
+        for name in self.names:
+            own = self._keywords[name]
+            profile_keywords = [own[phrase] for phrase in map(self._words_of, keywords) if phrase in own]
+            if not profile_keywords:
+                continue
+            profile_terms = dict.fromkeys(terms + self.category_matcher.match(' '.join(profile_keywords)))
+            result[name] = ProfileMatch(list(dict.fromkeys(profile_keywords)), self.category(name, profile_terms))
+        return result
+
+    def classify(self, text: str) -> Dict[str, ProfileMatch]:
+        """Matches of every profile that matched the text, in profile order, with the forms found"""
+        forms = self.keyword_matcher.matches(text)
+        if not forms:
+            return {}
+        result = self.assign(list(forms), self.category_matcher.match(text))
+        for name, match in result.items():
+            own = self._keywords[name]
+            match.forms = {own[self._words_of(keyword)]: found for keyword, found in forms.items()
+                           if self._words_of(keyword) in own}
+        return result
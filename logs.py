@@ -0,0 +1,175 @@
+"""
+Logging for the service: levels, structured fields, and output written off the event loop
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, LOG_RATE_WINDOW
+
+ROOT_LOGGER = 'newsparser'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['QueueHandler'] = None
+_rate_limit: Optional['RateLimitFilter'] = None
+_exception_formatter = logging.Formatter()
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger that takes structured fields as keyword arguments.
+
+        log.info("⚠️  Failed to fetch", source=name, url=url, stage='fetch', duration=0.41)
+
+    The JSON formatter writes the fields as keys; the text formatter ignores
+    them. `throttle=True` marks per-article messages the rate limiter may drop.
+    """
+
+    def process(self, msg, kwargs):
+        throttle = kwargs.pop('throttle', False)
+        fields = {key: kwargs.pop(key) for key in list(kwargs)
+                  if key not in ('exc_info', 'stack_info', 'stacklevel')}
+        kwargs['extra'] = {'fields': fields, 'throttle': throttle}
+        return msg, kwargs
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most `limit` throttled records per call site every `window` seconds.
+
+    The next record that gets through from that call site reports how many
+    were suppressed.
+    """
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._sites: Dict[Tuple[str, int], List] = {}  # call site -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'throttle', False) or self.limit <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.setdefault((record.pathname, record.lineno), [now, 0, 0])
+            if now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            if state[1] >= self.limit:
+                state[2] += 1
+                return False
+            state[1] += 1
+            record.suppressed, state[2] = state[2], 0
+        return True
+
+    def pending(self) -> int:
+        """Suppressed records not yet reported by a later record from the same call site"""
+        with self._lock:
+            return sum(state[2] for state in self._sites.values())
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without ever blocking; drops them when the queue is full"""
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Like the base class, but the traceback goes to exc_text instead of into the message,
+        so the JSON formatter can still write it as its own field"""
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None  # the traceback keeps every frame's locals alive
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    """The console output the service has always printed: the bare message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" (+{suppressed} similar suppressed)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the record's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"), {})
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Send the service's log records through a queue to a writer thread on stdout.
+
+    Called once by the aggregator and scheduler entry points; until then,
+    records below WARNING are discarded (e.g. when modules are imported by
+    the benchmarks).
+    """
+    global _listener, _queue_handler, _rate_limit
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    _queue_handler = QueueHandler()
+    _rate_limit = RateLimitFilter()
+    _queue_handler.addFilter(_rate_limit)
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level.upper())
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the writer thread"""
+    global _listener
+    if _listener is None:
+        return
+    suppressed = _rate_limit.pending()
+    if suppressed:
+        get_logger('logs').info(f"({suppressed} more throttled messages suppressed)", suppressed=suppressed)
+    _listener.stop()
+    _listener = None
+    if _queue_handler.dropped:
+        sys.stderr.write(f"⚠️  {_queue_handler.dropped} log records dropped (queue full)\n")
@@ -0,0 +1,252 @@
+"""
+In-process metrics: labelled counters and histograms, Prometheus text exposition
+and per-run JSON summaries
+"""
+import asyncio
+import copy
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import METRICS_HOST, METRICS_PORT
+from logs import get_logger
+
+log = get_logger('metrics')
+
+# Seconds; covers quick local stages as well as slow article downloads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter, one value per label combination"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = tuple(str(v) for v in labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {value:g}"
+                for key, value in sorted(self.values.items())]
+
+    def state(self) -> dict:
+        return dict(self.values)
+
+    def since(self, before: dict) -> dict:
+        return {key: value - before.get(key, 0) for key, value in self.values.items()
+                if value - before.get(key, 0)}
+
+
+class Gauge(Counter):
+    """Value that can go up and down; reported as-is, not diffed per run"""
+    kind = 'gauge'
+
+    def set(self, *labels: str, value: float):
+        self.values[tuple(str(v) for v in labels)] = value
+
+    def since(self, before: dict) -> dict:
+        return dict(self.values)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., count, sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, *labels: str, value: float):
+        key = tuple(str(v) for v in labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * len(self.buckets) + [0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self.values.items()):
+            bounds = [f'{bound:g}' for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, series[:-1]):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series[-2]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]:.6f}")
+        return lines
+
+    def state(self) -> dict:
+        return copy.deepcopy(self.values)
+
+    def since(self, before: dict) -> dict:
+        """count/sum/mean per series for observations made after `before`"""
+        summary = {}
+        for key, series in self.values.items():
+            previous = before.get(key, [0] * len(series))
+            count = series[-2] - previous[-2]
+            if not count:
+                continue
+            total = series[-1] - previous[-1]
+            summary[key] = {'count': count, 'sum': round(total, 4), 'mean': round(total / count, 4)}
+        return summary
+
+
+class MetricsRegistry:
+    """All metrics of the process; rendered for /metrics and summarised per run"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> dict:
+        """Current values, to summarise a single run with summary(since=...)"""
+        return {name: metric.state() for name, metric in self.metrics.items()}
+
+    def summary(self, since: Optional[dict] = None) -> dict:
+        """JSON-friendly view of everything recorded after `since`"""
+        since = since or {}
+        result = {}
+        for name, metric in self.metrics.items():
+            series = metric.since(since.get(name, {}))
+            if series:
+                result[name] = {'|'.join(key) or '_': value for key, value in sorted(series.items())}
+        return result
+
+
+METRICS = MetricsRegistry()
+
+HTTP_REQUESTS = METRICS.counter(
+    'newsparser_http_requests_total', 'Page fetches by source, kind (listing/article) and status',
+    ('source', 'kind', 'status'))
+HTTP_BYTES = METRICS.counter(
+    'newsparser_http_bytes_total', 'Response body bytes downloaded', ('source', 'kind'))
+HTTP_SECONDS = METRICS.histogram(
+    'newsparser_http_request_seconds', 'Page fetch latency including the body download', ('source', 'kind'))
+STAGE_SECONDS = METRICS.histogram(
+    'newsparser_stage_seconds', 'Time per item in each processing stage', ('source', 'stage'))
+ARTICLES = METRICS.counter(
+    'newsparser_articles_total', 'Articles by outcome (fetched, fetch_failed, parse_failed, prechecked_out, matched, skipped)',
+    ('source', 'outcome'))
+PROFILE_MATCHES = METRICS.counter(
+    'newsparser_profile_matches_total', 'Stored articles by keyword profile they matched', ('source', 'profile'))
+SUBMISSIONS = METRICS.counter(
+    'newsparser_api_submissions_total', 'Backend submissions by result', ('source', 'result'))
+RUNS = METRICS.counter('newsparser_runs_total', 'Completed aggregator runs')
+LAST_RUN = METRICS.gauge(
+    'newsparser_last_run', 'Figures from the latest run (timestamp, duration_seconds, new_articles)', ('field',))
+
+
+def match_rates(summary: dict) -> Dict[str, float]:
+    """Matched / fetched articles per source from a run summary"""
+    outcomes = summary.get(ARTICLES.name, {})
+    rates = {}
+    for key, count in outcomes.items():
+        source, outcome = key.split('|')
+        if outcome == 'fetched':
+            matched = outcomes.get(f"{source}|matched", 0)
+            rates[source] = round(matched / count, 3) if count else 0.0
+    return rates
+
+
+def write_run_summary(directory: str, summary: dict, keep: int) -> str:
+    """Write one run's metrics to DIRECTORY/run-<timestamp>-<pid>.json, keeping the newest `keep` files"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    runs = sorted(name for name in os.listdir(directory) if name.startswith('run-') and name.endswith('.json'))
+    for name in runs[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass  # another worker pruned it first
+    return path
+
+
+class MetricsServer:
+    """Minimal HTTP server answering GET /metrics on the event loop"""
+
+    def __init__(self, registry: MetricsRegistry = METRICS, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers; the request body (if any) is ignored
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', self.registry.render().encode('utf-8')
+            else:
+                status, body = '404 Not Found', b'Not found - try /metrics\n'
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        log.info(f"📈 Metrics at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -1,10 +1,48 @@
 """
 Data models for the news aggregator
 """
+from contextlib import contextmanager
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows - single-process use only
+    fcntl = None
+
+
+@contextmanager
+def file_lock(filepath: str):
+    """Exclusive lock shared by every process using the same data file"""
+    if fcntl is None:
+        yield
+        return
+    with open(filepath + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_json(filepath: str, data, indent: Optional[int] = 2):
+    """Write atomically so readers in other processes never see a half-written file"""
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, filepath)
+
+
+def file_version(filepath: str) -> Optional[tuple]:
+    """Cheap change marker for a data file, None if it does not exist"""
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
 
 @dataclass
@@ -35,7 +73,9 @@ class NewsArticle:
     source_name: str = ""
     language: str = ""  # "kz" or "ru"
     matched_keywords: List[str] = field(default_factory=list)
+    profiles: Dict[str, dict] = field(default_factory=dict)  # keyword profile -> {"keywords", "category"}
     status: str = "pending"  # pending, approved, rejected
+    moderated_at: str = ""  # when status last changed
     
     # Auto-generated
     id: Optional[int] = None
@@ -74,10 +114,18 @@ class NewsArticle:
 
 
 class NewsStorage:
-    """Simple JSON-based storage for news articles"""
+    """Simple JSON-based storage for news articles.
     
-    def __init__(self, filepath: str):
+    Writes hold file_lock and first re-read the file if another process
+    changed it, so several workers can share one data directory. With an
+    `index` (search_index.SearchIndex), added and changed articles are
+    indexed in the same write.
+    """
+    
+    def __init__(self, filepath: str, index=None):
         self.filepath = filepath
+        self.index = index
+        self._version = None
         self._load()
     
     def _load(self):
@@ -90,6 +138,13 @@ class NewsStorage:
         except FileNotFoundError:
             self.articles = []
             self._next_id = 1
+        self._by_id = {a.id: a for a in self.articles}
+        self._version = file_version(self.filepath)
+    
+    def reload(self):
+        """Pick up changes written by other processes"""
+        if file_version(self.filepath) != self._version:
+            self._load()
     
     def save(self):
         """Save data to file"""
@@ -98,24 +153,25 @@ class NewsStorage:
             'next_id': self._next_id,
             'last_updated': datetime.now().isoformat(),
         }
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(self.filepath, data)
+        self._version = file_version(self.filepath)
     
     def add(self, article: NewsArticle) -> NewsArticle:
         """Add a new article"""
-        article.id = self._next_id
-        self._next_id += 1
-        self.articles.append(article)
-        self.save()
-        return article
+        return self.add_many([article])[0]
     
     def add_many(self, articles: List[NewsArticle]) -> List[NewsArticle]:
         """Add multiple articles"""
-        for article in articles:
-            article.id = self._next_id
-            self._next_id += 1
-            self.articles.append(article)
-        self.save()
+        with file_lock(self.filepath):
+            self.reload()
+            for article in articles:
+                article.id = self._next_id
+                self._next_id += 1
+                self.articles.append(article)
+                self._by_id[article.id] = article
+            self.save()
+            if self.index is not None:
+                self.index.add(articles)
         return articles
     
     def get_all(self) -> List[NewsArticle]:
@@ -128,19 +184,59 @@ class NewsStorage:
     
     def get_by_id(self, article_id: int) -> Optional[NewsArticle]:
         """Get article by ID"""
-        for a in self.articles:
-            if a.id == article_id:
-                return a
-        return None
+        return self._by_id.get(article_id)
     
     def update_status(self, article_id: int, status: str) -> bool:
         """Update article status"""
-        for a in self.articles:
-            if a.id == article_id:
-                a.status = status
+        with file_lock(self.filepath):
+            self.reload()
+            a = self._by_id.get(article_id)
+            if a is None:
+                return False
+            a.status = status
+            a.moderated_at = datetime.now().isoformat()
+            self.save()
+            if self.index is not None:
+                self.index.add([a])
+        return True
+    
+    def update_status_many(self, article_ids: List[int], status: str) -> int:
+        """Set the status of several articles in one write; articles already in that status
+        (and unknown ids) are left alone. Returns how many changed."""
+        changed = []
+        with file_lock(self.filepath):
+            self.reload()
+            moderated_at = datetime.now().isoformat()
+            for article_id in article_ids:
+                a = self._by_id.get(article_id)
+                if a is not None and a.status != status:
+                    a.status = status
+                    a.moderated_at = moderated_at
+                    changed.append(a)
+            if changed:
+                self.save()
+                if self.index is not None:
+                    self.index.add(changed)
+        return len(changed)
+    
+    def update_many(self, changes: dict) -> int:
+        """Set fields on several articles at once: {article id: {field: value}}; one write"""
+        if not changes:
+            return 0
+        updated = []
+        with file_lock(self.filepath):
+            self.reload()
+            for article_id, fields in changes.items():
+                a = self._by_id.get(article_id)
+                if a is not None and fields:
+                    for name, value in fields.items():
+                        setattr(a, name, value)
+                    updated.append(a)
+            if updated:
                 self.save()
-                return True
-        return False
+                if self.index is not None:
+                    self.index.add(updated)
+        return len(updated)
     
     def count(self) -> dict:
         """Get article counts by status"""
@@ -156,6 +252,7 @@ class SeenURLsTracker:
     
     def __init__(self, filepath: str):
         self.filepath = filepath
+        self._version = None
         self._load()
     
     def _load(self):
@@ -164,18 +261,158 @@ class SeenURLsTracker:
                 self.urls = set(json.load(f))
         except FileNotFoundError:
             self.urls = set()
+        self._version = file_version(self.filepath)
+    
+    def reload(self):
+        """Merge in URLs marked by other processes"""
+        if file_version(self.filepath) != self._version:
+            urls = self.urls
+            self._load()
+            self.urls |= urls
     
     def save(self):
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(list(self.urls), f, ensure_ascii=False, indent=2)
+        write_json(self.filepath, list(self.urls))
+        self._version = file_version(self.filepath)
     
     def is_seen(self, url: str) -> bool:
         return url in self.urls
     
     def mark_seen(self, url: str):
-        self.urls.add(url)
-        self.save()
+        self.mark_many_seen([url])
     
     def mark_many_seen(self, urls: List[str]):
-        self.urls.update(urls)
+        with file_lock(self.filepath):
+            self.reload()
+            self.urls.update(urls)
+            self.save()
+
+
+class SourceYieldTracker:
+    """Decayed per-source history of requests, matches and time spent"""
+    
+    def __init__(self, filepath: str, decay: float = 0.9):
+        self.filepath = filepath
+        self.decay = decay
+        self._version = None
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f)
+        except FileNotFoundError:
+            self.sources = {}
+        self._version = file_version(self.filepath)
+    
+    def reload(self):
+        if file_version(self.filepath) != self._version:
+            self._load()
+    
+    def save(self):
+        write_json(self.filepath, self.sources)
+        self._version = file_version(self.filepath)
+    
+    def record(self, source_name: str, requests: int, processed: int, matched: int,
+               new_links: int, seconds: float):
+        """Fold one run of a source into its history; older runs fade by `decay`"""
+        with file_lock(self.filepath):
+            self.reload()
+            entry = self.sources.setdefault(source_name, {
+                'runs': 0.0, 'requests': 0.0, 'processed': 0.0,
+                'matched': 0.0, 'new_links': 0.0, 'seconds': 0.0,
+            })
+            observed = {'runs': 1, 'requests': requests, 'processed': processed,
+                        'matched': matched, 'new_links': new_links, 'seconds': seconds}
+            for key, value in observed.items():
+                entry[key] = entry[key] * self.decay + value
+            self.save()
+    
+    def match_rate(self, source_name: str) -> float:
+        """Share of fetched articles that matched keywords (smoothed)"""
+        entry = self.sources.get(source_name, {})
+        return (entry.get('matched', 0) + 1) / (entry.get('processed', 0) + 2)
+    
+    def yield_per_request(self, source_name: str) -> float:
+        """Expected keyword matches per HTTP request, listing pages included (smoothed)"""
+        entry = self.sources.get(source_name, {})
+        return (entry.get('matched', 0) + 1) / (entry.get('requests', 0) + 2)
+    
+    def seconds_per_request(self, source_name: str) -> Optional[float]:
+        entry = self.sources.get(source_name)
+        if not entry or not entry['requests']:
+            return None
+        return entry['seconds'] / entry['requests']
+    
+    def expected_new_links(self, source_name: str) -> Optional[float]:
+        """Average number of unseen links per run, None if never fetched"""
+        entry = self.sources.get(source_name)
+        if not entry or not entry['runs']:
+            return None
+        return entry['new_links'] / entry['runs']
+
+
+class RunCheckpoint:
+    """Progress of the current full run, so a restarted process can resume it"""
+    
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = None
+    
+    def save(self):
+        """Write atomically so a crash mid-write never leaves a corrupt checkpoint"""
+        if self.state is None:
+            return
+        write_json(self.filepath, self.state, indent=None)
+    
+    @property
+    def active(self) -> bool:
+        return self.state is not None
+    
+    def start(self, plan: List[tuple]):
+        """Begin a new run; plan is a list of (source, budget) pairs"""
+        self.state = {
+            'started_at': datetime.now().isoformat(),
+            'plan': [{'source': source['name'], 'budget': budget} for source, budget in plan],
+            'completed_sources': [],
+            'done_urls': {},
+            'unsubmitted': [],
+        }
+        self.save()
+    
+    def is_source_done(self, source_name: str) -> bool:
+        return source_name in self.state['completed_sources']
+    
+    def done_urls(self, source_name: str) -> List[str]:
+        return self.state['done_urls'].get(source_name, [])
+    
+    def mark_url_done(self, source_name: str, url: str):
+        """Record a finished URL; persisted with the next save()"""
+        self.state['done_urls'].setdefault(source_name, []).append(url)
+    
+    def mark_source_done(self, source_name: str):
+        if source_name not in self.state['completed_sources']:
+            self.state['completed_sources'].append(source_name)
+        self.state['done_urls'].pop(source_name, None)
         self.save()
+    
+    def add_unsubmitted(self, article_ids: List[int]):
+        self.state['unsubmitted'].extend(article_ids)
+    
+    def mark_submitted(self, article_id: int):
+        if article_id in self.state['unsubmitted']:
+            self.state['unsubmitted'].remove(article_id)
+    
+    def finish(self):
+        """Run completed - drop the checkpoint"""
+        self.state = None
+        try:
+            os.remove(self.filepath)
+        except FileNotFoundError:
+            pass
@@ -38,13 +38,22 @@ echo ""
 
 # Check for API submissions in logs
 echo "✅ Recent API Submissions:"
-api_count=$(docker-compose -f docker-compose.prod.yml logs 2>/dev/null | grep -c "→ API" || echo "0")
+api_count=$(docker-compose -f docker-compose.prod.yml logs 2>/dev/null | grep -c "Successfully sent to backend" || echo "0")
 echo "  Articles sent to backend: $api_count"
+echo ""
 
-if [ "$api_count" -gt 0 ]; then
-    echo "  Last 5 submissions:"
-    docker-compose -f docker-compose.prod.yml logs 2>/dev/null | grep "→ API" | tail -5
-fi
+# Metrics from the scheduler's /metrics endpoint (submissions, fetch status codes)
+echo "📈 Metrics:"
+docker-compose -f docker-compose.prod.yml exec -T news-aggregator python -c "
+import os, urllib.request
+port = os.getenv('METRICS_PORT', '9108')
+text = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5).read().decode()
+for line in text.splitlines():
+    if line.startswith(('newsparser_api_submissions_total', 'newsparser_runs_total', 'newsparser_last_run')):
+        print('  ' + line)
+" 2>/dev/null || echo "  ⚠️  Metrics endpoint not reachable"
+latest=$(ls -t data/metrics/run-*.json 2>/dev/null | head -1)
+[ -n "$latest" ] && echo "  Latest run summary: $latest"
 echo ""
 
 # Test backend connectivity
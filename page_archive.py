@@ -0,0 +1,120 @@
+"""
+Append-only archive of fetched article HTML, so stored articles can be re-extracted
+with improved parsers without downloading them again
+"""
+import gzip
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from logs import get_logger
+from models import file_lock
+
+log = get_logger('archive')
+
+INDEX_FILE = "index.db"
+
+
+def _warc_record(url: str, content: bytes, encoding: Optional[str]) -> bytes:
+    """One WARC/1.1 resource record holding the page body, as its own gzip member"""
+    content_type = f"text/html; charset={encoding}" if encoding else "text/html"
+    headers = (
+        "WARC/1.1\r\n"
+        "WARC-Type: resource\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        "\r\n"
+    )
+    return gzip.compress(headers.encode('utf-8') + content + b"\r\n\r\n", compresslevel=6)
+
+
+def read_record(path: str, offset: int, length: int) -> Tuple[str, bytes, Optional[str]]:
+    """(page URL, body, declared encoding) of the record at `offset` in an archive file"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        record = gzip.decompress(f.read(length))
+    head, _, rest = record.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode('utf-8').split("\r\n")[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    _, _, charset = headers.get('content-type', '').partition('charset=')
+    return headers.get('warc-target-uri', ''), rest[:int(headers['content-length'])], charset or None
+
+
+class PageArchive:
+    """Fetched article pages in DIRECTORY/pages-<date>.warc.gz, indexed by requested URL.
+
+    Each page is one gzip-compressed WARC resource record appended to the
+    day's file (any WARC reader can open them); DIRECTORY/index.db maps a
+    URL to the file, offset and length of its latest copy, so one page is
+    read back without decompressing anything else. Several workers may
+    append at once: appends hold the file's lock. Pages are added from
+    executor threads, so the index connection is shared under a lock.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, INDEX_FILE), timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, file TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, "
+            "archived_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add(self, url: str, page) -> bool:
+        """Append a fetched page (parsers.FetchedPage) under the URL it was requested by.
+        A failed write is logged and skipped - archiving never fails a fetch."""
+        record = _warc_record(page.url, page.content, page.encoding)
+        name = f"pages-{datetime.now().strftime('%Y%m%d')}.warc.gz"
+        path = os.path.join(self.directory, name)
+        try:
+            with self._lock:
+                with file_lock(path):
+                    with open(path, 'ab') as f:
+                        offset = f.tell()
+                        f.write(record)
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO pages (url, file, offset, length, archived_at) VALUES (?, ?, ?, ?, ?)",
+                        (url, name, offset, len(record), datetime.now().isoformat())
+                    )
+        except (OSError, sqlite3.Error) as e:
+            log.warning(f"Could not archive {url}: {e}", url=url, stage='fetch', throttle=True)
+            return False
+        return True
+
+    def locations(self, urls: List[str]) -> Dict[str, Tuple[str, int, int]]:
+        """URL -> (archive file path, offset, length) for the URLs that are archived"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                for url, name, offset, length in self._conn.execute(
+                    f"SELECT url, file, offset, length FROM pages WHERE url IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ):
+                    found[url] = (os.path.join(self.directory, name), offset, length)
+        return found
+
+    def get(self, url: str) -> Optional[Tuple[str, bytes, Optional[str]]]:
+        """(page URL, body, encoding) of the latest copy of `url`, None if it was never archived"""
+        location = self.locations([url]).get(url)
+        return read_record(*location) if location else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -1,14 +1,221 @@
 """
 News parsers for different websites
 """
+import asyncio
+import html
+import json
 import re
+import time
 import httpx
-from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-from datetime import datetime
 import trafilatura
-from config import USER_AGENT, FETCH_TIMEOUT
+from config import (
+    SOURCES, FETCH_TIMEOUT, MAX_PAGE_SIZE, HTML_CONTENT_TYPES,
+    EXTRACT_RULES, EXTRACT_RULES_MIN_CONTENT
+)
+from http_client import ACCEPT_ENCODING
+from logs import get_logger
+from metrics import HTTP_REQUESTS, HTTP_BYTES, HTTP_SECONDS
+
+log = get_logger('parsers')
+
+
+# Publication date embedded in article URLs: /2025/12/29/, /20251229/, /2025-12-29-
+URL_DATE_RE = re.compile(r'/(20\d{2})[/-]?(\d{2})[/-]?(\d{2})(?=[/-]|\d|$)')
+
+# Matches <meta charset="..."> / http-equiv declarations at the start of a document
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+HEAD_END_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+JSON_LD_RE = re.compile(rb'<script[^>]*application/ld\+json[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+JSON_LD_ARTICLE_TYPES = {'NewsArticle', 'Article', 'ReportageNewsArticle', 'AnalysisNewsArticle', 'BlogPosting'}
+
+# <meta> names/properties per metadata field, best first
+META_TAGS = {
+    'title': ('og:title', 'twitter:title'),
+    'description': ('og:description', 'description', 'twitter:description'),
+    'date': ('article:published_time', 'og:published_time', 'datepublished', 'pubdate', 'date'),
+    'image': ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image'),
+}
+
+
+def url_date(url: str) -> str:
+    """Date found in an article URL as YYYYMMDD, or '' if there is none"""
+    match = URL_DATE_RE.search(urlparse(url).path)
+    if not match or not ('01' <= match.group(2) <= '12' and '01' <= match.group(3) <= '31'):
+        return ''
+    return ''.join(match.groups())
+
+
+def order_by_freshness(urls: List[str]) -> List[str]:
+    """Newest dated URLs first; undated ones keep their listing position after them"""
+    return sorted(urls, key=url_date, reverse=True)
+
+
+@dataclass
+class FetchedPage:
+    """Raw response body plus the encoding declared by the server"""
+    url: str
+    content: bytes
+    encoding: Optional[str] = None
+    _metadata: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+
+    def _parse(self, content: bytes) -> lxml.html.HtmlElement:
+        encoding = self.encoding
+        if not encoding and not META_CHARSET_RE.search(self.content[:2048]):
+            # Nothing declared anywhere - all our sources serve UTF-8
+            encoding = 'utf-8'
+        try:
+            parser = lxml.html.HTMLParser(encoding=encoding)
+        except LookupError:
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+        return lxml.html.document_fromstring(content, parser=parser)
+
+    def tree(self) -> lxml.html.HtmlElement:
+        """Parse the raw bytes into a fresh lxml tree (no str round-trip)"""
+        return self._parse(self.content)
+
+    def metadata(self, tree: Optional[lxml.html.HtmlElement] = None) -> Dict:
+        """Title, description, date and image from JSON-LD and <head> meta tags, without parsing the body.
+        
+        Computed once per page; empty strings for anything not declared. Pass
+        the page's tree if it is already parsed to read the tags from it.
+        """
+        if self._metadata is None:
+            self._metadata = read_metadata(self, tree)
+        return self._metadata
+
+
+def _json_ld_articles(node):
+    """Article objects in a JSON-LD document, including ones nested in @graph or lists"""
+    if isinstance(node, list):
+        for item in node:
+            yield from _json_ld_articles(item)
+    elif isinstance(node, dict):
+        if '@graph' in node:
+            yield from _json_ld_articles(node['@graph'])
+        types = node.get('@type')
+        if set(types if isinstance(types, list) else [types]) & JSON_LD_ARTICLE_TYPES:
+            yield node
+
+
+def _json_ld_text(value) -> str:
+    # Images come as a URL, an ImageObject or a list of either; names may be lists too
+    if isinstance(value, list):
+        value = value[0] if value else ''
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl') or value.get('@id') or ''
+    return ' '.join(html.unescape(str(value)).split()) if value else ''
+
+
+def read_metadata(page: FetchedPage, tree: Optional[lxml.html.HtmlElement] = None) -> Dict:
+    """Metadata fast path: JSON-LD article blocks first, then OpenGraph/meta tags, then <title>"""
+    found = {'title': '', 'description': '', 'date': '', 'image': ''}
+    
+    # JSON-LD may sit anywhere in the page; a byte-level scan avoids parsing the body for it
+    encoding = page.encoding or 'utf-8'
+    for match in JSON_LD_RE.finditer(page.content):
+        try:
+            document = json.loads(match.group(1).decode(encoding, errors='replace'))
+        except (ValueError, LookupError):
+            continue
+        for article in _json_ld_articles(document):
+            for key, names in (('title', ('headline', 'name')), ('description', ('description',)),
+                               ('date', ('datePublished', 'dateCreated')), ('image', ('image', 'thumbnailUrl'))):
+                for name in names:
+                    if not found[key]:
+                        found[key] = _json_ld_text(article.get(name))
+    
+    # Only the <head> is parsed for meta tags, unless the whole page already is
+    if tree is not None:
+        head = tree.find('head')
+        if head is None:
+            head = tree
+    else:
+        head_end = HEAD_END_RE.search(page.content)
+        head = page._parse(page.content[:head_end.end()] if head_end else page.content)
+    tags = {}
+    for meta in head.iter('meta'):
+        name = (meta.get('property') or meta.get('name') or meta.get('itemprop') or '').lower()
+        content = ' '.join((meta.get('content') or '').split())
+        if name and content:
+            tags.setdefault(name, content)
+    for key, names in META_TAGS.items():
+        if not found[key]:
+            found[key] = next((tags[name] for name in names if name in tags), '')
+    if not found['title']:
+        title = head.find('.//title')
+        if title is not None:
+            found['title'] = ' '.join(title.text_content().split())
+    if found['image']:
+        found['image'] = urljoin(page.url, found['image'])
+    return found
+
+
+def _compile_selector(selector: str) -> Optional[lxml.etree.XPath]:
+    """XPath for a rule selector; "css:" selectors need the optional cssselect package"""
+    if selector.startswith('css:'):
+        try:
+            from cssselect import HTMLTranslator
+        except ImportError:
+            log.warning(f"⚠️  Extraction rule {selector!r} skipped: `pip install cssselect` for CSS selectors")
+            return None
+        selector = HTMLTranslator().css_to_xpath(selector[4:].strip())
+    return lxml.etree.XPath(selector)
+
+
+class ExtractionRules:
+    """Per-field selectors compiled once per source and evaluated on a single parsed tree"""
+    
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.selectors: Dict[str, List[lxml.etree.XPath]] = {
+            name: [xpath for xpath in map(_compile_selector, selectors) if xpath is not None]
+            for name, selectors in rules.items()
+        }
+    
+    @staticmethod
+    def _texts(results) -> List[str]:
+        # XPath results are attribute/text strings or elements
+        if not isinstance(results, list):
+            results = [results]
+        texts = []
+        for result in results:
+            text = result.text_content() if isinstance(result, lxml.html.HtmlElement) else str(result)
+            text = ' '.join(text.split())
+            if text:
+                texts.append(text)
+        return texts
+    
+    def first(self, tree: lxml.html.HtmlElement, name: str) -> str:
+        """Text of the first match of the first selector that matches anything"""
+        for xpath in self.selectors.get(name, []):
+            texts = self._texts(xpath(tree))
+            if texts:
+                return texts[0]
+        return ''
+    
+    def extract(self, tree: lxml.html.HtmlElement, url: str) -> Dict:
+        """Same fields as extract_with_trafilatura; body paragraphs are joined by newlines"""
+        content = ''
+        for xpath in self.selectors.get('body', []):
+            content = '\n'.join(self._texts(xpath(tree)))
+            if content:
+                break
+        image = self.first(tree, 'image')
+        return {
+            'title': self.first(tree, 'title'),
+            'description': self.first(tree, 'description'),
+            'content': content,
+            'date': self.first(tree, 'date'),
+            'image': urljoin(url, image) if image else '',
+        }
+
+
+DEFAULT_RULES = ExtractionRules(EXTRACT_RULES)
 
 
 class BaseParser:
@@ -19,8 +226,7 @@ class BaseParser:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'kk-KZ,kk;q=0.9,ru-RU;q=0.8,ru;q=0.7,en-US;q=0.6,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
@@ -28,37 +234,101 @@ class BaseParser:
             'Sec-Fetch-User': '?1',
             'Cache-Control': 'max-age=0',
         }
+        # Requests with the same session stick to one proxy (set per source by get_parser)
+        self.proxy_session: Optional[str] = None
+        # HTTP requests made by this parser instance (feeds per-source cost tracking)
+        self.request_count = 0
+        # Extraction rules, replaced with the source's own by get_parser
+        self.rules = DEFAULT_RULES
+        self.rule_fields: set = set()  # fields the source has its own rules for; these beat page metadata
+        # Metrics label; set per source by get_parser
+        self.source_name = ''
+        # page_archive.PageArchive that fetched articles are written to (set by the aggregator
+        # when ARCHIVE_PAGES is on)
+        self.archive = None
     
-    async def fetch_page(self, url: str, client: httpx.AsyncClient) -> Optional[str]:
-        """Fetch a page and return HTML"""
+    async def fetch_page(self, url: str, client: httpx.AsyncClient, kind: str = 'article') -> Optional[FetchedPage]:
+        """Stream a page and return its raw body, skipping non-HTML and oversized responses.
+        
+        `kind` ('listing' or 'article') only labels the request metrics.
+        """
+        self.request_count += 1
+        started = time.monotonic()
+        status = 'error'
+        size = 0
         try:
-            response = await client.get(url, headers=self.headers, timeout=FETCH_TIMEOUT, follow_redirects=True)
-            response.raise_for_status()
-            return response.text
+            extensions = {'proxy_session': self.proxy_session} if self.proxy_session else None
+            async with client.stream('GET', url, headers=self.headers, timeout=FETCH_TIMEOUT,
+                                     follow_redirects=True, extensions=extensions) as response:
+                status = str(response.status_code)
+                response.raise_for_status()
+                
+                content_type = response.headers.get('content-type', '').lower()
+                if content_type and not any(t in content_type for t in HTML_CONTENT_TYPES):
+                    log.info(f"Skipping {url}: not HTML ({content_type.split(';')[0]})",
+                             source=self.source_name, url=url, stage=kind, throttle=True)
+                    return None
+                
+                declared_size = response.headers.get('content-length', '')
+                if declared_size.isdigit() and int(declared_size) > MAX_PAGE_SIZE:
+                    log.info(f"Skipping {url}: {declared_size} bytes exceeds limit of {MAX_PAGE_SIZE}",
+                             source=self.source_name, url=url, stage=kind, throttle=True)
+                    return None
+                
+                chunks = []
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > MAX_PAGE_SIZE:
+                        log.info(f"Skipping {url}: body exceeds limit of {MAX_PAGE_SIZE} bytes",
+                                 source=self.source_name, url=url, stage=kind, throttle=True)
+                        return None
+                    chunks.append(chunk)
+                
+                if not size:
+                    return None
+                page = FetchedPage(
+                    url=str(response.url),
+                    content=b''.join(chunks),
+                    encoding=response.charset_encoding,
+                )
+            if self.archive is not None and kind == 'article':
+                # Compressing and indexing the page would stall every other fetch on the loop
+                await asyncio.get_running_loop().run_in_executor(None, self.archive.add, url, page)
+            return page
         except Exception as e:
-            print(f"Error fetching {url}: {e}")
+            log.warning(f"Error fetching {url}: {e}", source=self.source_name, url=url, stage=kind,
+                        status=status, duration=round(time.monotonic() - started, 3), throttle=True)
             return None
+        finally:
+            HTTP_REQUESTS.inc(self.source_name, kind, status)
+            HTTP_BYTES.inc(self.source_name, kind, amount=size)
+            HTTP_SECONDS.observe(self.source_name, kind, value=time.monotonic() - started)
     
-    def extract_with_trafilatura(self, html: str, url: str) -> Dict:
+    def extract_with_trafilatura(self, page: FetchedPage, url: str,
+                                 tree: Optional[lxml.html.HtmlElement] = None) -> Dict:
         """Use trafilatura for generic article extraction"""
         try:
-            # Try to extract metadata separately
-            metadata = trafilatura.extract_metadata(html, default_url=url)
-            text_content = trafilatura.extract(html, url=url, include_comments=False, include_tables=False)
+            # Parse once from bytes (unless the caller already did); trafilatura accepts the tree as-is
+            if tree is None:
+                tree = page.tree()
+            
+            # Metadata first: text extraction cleans the tree in place
+            metadata = trafilatura.extract_metadata(tree, default_url=url)
+            title = metadata.title if metadata and metadata.title else ''
+            description = metadata.description if metadata and metadata.description else ''
+            date = metadata.date if metadata and metadata.date else ''
+            
+            # Fallback: try to get title from HTML if missing
+            if not title:
+                title_el = tree.find('.//title')
+                if title_el is None:
+                    title_el = tree.find('.//h1')
+                if title_el is not None:
+                    title = title_el.text_content().strip()
+            
+            text_content = trafilatura.extract(tree, url=url, include_comments=False, include_tables=False)
             
             if text_content or metadata:
-                title = metadata.title if metadata and metadata.title else ''
-                description = metadata.description if metadata and metadata.description else ''
-                date = metadata.date if metadata and metadata.date else ''
-                
-                # Fallback: try to get title from HTML if missing
-                if not title and html:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html, 'lxml')
-                    title_tag = soup.find('title') or soup.find('h1')
-                    if title_tag:
-                        title = title_tag.get_text().strip()
-                
                 return {
                     'title': title,
                     'description': description or (text_content[:200] + '...' if text_content else ''),
@@ -67,16 +337,50 @@ class BaseParser:
                     'image': '',
                 }
         except Exception as e:
-            print(f"Trafilatura error for {url[:50]}: {e}")
+            log.warning(f"Trafilatura error for {url[:50]}: {e}", source=self.source_name, url=url,
+                        stage='extract', throttle=True)
         return {}
     
-    def find_article_links(self, html: str, base_url: str, patterns: List[str] = None) -> List[str]:
+    def extract_article(self, page: FetchedPage, url: str) -> Dict:
+        """Extract article fields from a fetched page (CPU-bound, safe to run in a thread).
+        
+        Title, description, date and image come from the page's JSON-LD/meta
+        tags unless the source has its own rules for them; the body comes from
+        the rules. Only when the title or most of the body is missing does
+        trafilatura process the same tree.
+        """
+        tree = page.tree()
+        data = self.rules.extract(tree, url)
+        for key, value in page.metadata(tree).items():
+            if value and key not in self.rule_fields:
+                data[key] = value
+        if data['title'] and len(data['content']) >= EXTRACT_RULES_MIN_CONTENT:
+            if not data['description']:
+                data['description'] = data['content'][:200] + '...'
+            return data
+        
+        fallback = self.extract_with_trafilatura(page, url, tree)
+        if not fallback:
+            return {}
+        # Fields the rules did find win over trafilatura's guesses, except a too-short body
+        for name, value in data.items():
+            if value and (name != 'content' or not fallback.get('content')):
+                fallback[name] = value
+        return fallback
+    
+    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
+        """Fetch and extract a single article"""
+        page = await self.fetch_page(url, client)
+        if not page:
+            return None
+        return self.extract_article(page, url)
+    
+    def find_article_links(self, page: FetchedPage, base_url: str, patterns: List[str] = None) -> List[str]:
         """Find article links on a page"""
-        soup = BeautifulSoup(html, 'lxml')
-        links = set()
+        # dict keeps listing order (newest-first on most sites) while de-duplicating
+        links = {}
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for href in page.tree().xpath('//a/@href'):
             full_url = urljoin(base_url, href)
             
             # Basic filtering
@@ -98,7 +402,7 @@ class BaseParser:
             # Check if matches article patterns
             if patterns:
                 if any(re.search(p, full_url) for p in patterns):
-                    links.add(full_url)
+                    links[full_url] = None
             else:
                 # Generic article detection (has path with multiple segments or numbers/dates)
                 path = parsed.path
@@ -108,7 +412,7 @@ class BaseParser:
                     re.search(r'-[a-z]+-', path) or  # Slug pattern
                     path.count('/') >= 2             # Multiple path segments
                 ):
-                    links.add(full_url)
+                    links[full_url] = None
         
         return list(links)
 
@@ -117,58 +421,30 @@ class StanKzParser(BaseParser):
     """Parser for stan.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://stan.kz/', client)
-        if not html:
+        page = await self.fetch_page('https://stan.kz/', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://stan.kz/', [r'/news/\d+', r'/\d{4}/\d{2}/'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        
-        data = self.extract_with_trafilatura(html, url)
-        
-        # Fallback with BeautifulSoup if needed
-        if not data.get('title'):
-            soup = BeautifulSoup(html, 'lxml')
-            title_el = soup.find('h1') or soup.find('title')
-            if title_el:
-                data['title'] = title_el.get_text(strip=True)
-        
-        return data
+        return self.find_article_links(page, 'https://stan.kz/', [r'/news/\d+', r'/\d{4}/\d{2}/'])
 
 
 class BaqKzParser(BaseParser):
     """Parser for baq.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://baq.kz/', client)
-        if not html:
+        page = await self.fetch_page('https://baq.kz/', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://baq.kz/', [r'/kz/news/', r'/news/'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+        return self.find_article_links(page, 'https://baq.kz/', [r'/kz/news/', r'/news/'])
 
 
 class InformBuroParser(BaseParser):
     """Parser for informburo.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://informburo.kz/', client)
-        if not html:
+        page = await self.fetch_page('https://informburo.kz/', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://informburo.kz/', [r'/novosti/', r'/stati/'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+        return self.find_article_links(page, 'https://informburo.kz/', [r'/novosti/', r'/stati/'])
 
 
 class OrdaKzParser(BaseParser):
@@ -177,64 +453,40 @@ class OrdaKzParser(BaseParser):
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
         urls = []
         for section in ['', 'posts', 'news']:
-            html = await self.fetch_page(f'https://orda.kz/{section}', client)
-            if html:
-                urls.extend(self.find_article_links(html, 'https://orda.kz/', [r'/posts/', r'/\d{4}/']))
-        return list(set(urls))
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+            page = await self.fetch_page(f'https://orda.kz/{section}', client, kind='listing')
+            if page:
+                urls.extend(self.find_article_links(page, 'https://orda.kz/', [r'/posts/', r'/\d{4}/']))
+        return list(dict.fromkeys(urls))
 
 
 class SputnikKzParser(BaseParser):
     """Parser for ru.sputnik.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://ru.sputnik.kz/', client)
-        if not html:
+        page = await self.fetch_page('https://ru.sputnik.kz/', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://ru.sputnik.kz/', [r'/\d{8}/'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+        return self.find_article_links(page, 'https://ru.sputnik.kz/', [r'/\d{8}/'])
 
 
 class TwentyFourKzParser(BaseParser):
     """Parser for 24.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://24.kz/kz/zha-aly-tar', client)
-        if not html:
+        page = await self.fetch_page('https://24.kz/kz/zha-aly-tar', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://24.kz/', [r'/kz/.*\d+'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+        return self.find_article_links(page, 'https://24.kz/', [r'/kz/.*\d+'])
 
 
 class ZakonKzParser(BaseParser):
     """Parser for kaz.zakon.kz"""
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page('https://kaz.zakon.kz/', client)
-        if not html:
+        page = await self.fetch_page('https://kaz.zakon.kz/', client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, 'https://kaz.zakon.kz/', [r'/doc/', r'/news/'])
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        return self.extract_with_trafilatura(html, url)
+        return self.find_article_links(page, 'https://kaz.zakon.kz/', [r'/doc/', r'/news/'])
 
 
 class GenericParser(BaseParser):
@@ -245,47 +497,39 @@ class GenericParser(BaseParser):
         self.base_url = base_url
     
     async def get_article_links(self, client: httpx.AsyncClient) -> List[str]:
-        html = await self.fetch_page(self.base_url, client)
-        if not html:
+        page = await self.fetch_page(self.base_url, client, kind='listing')
+        if not page:
             return []
-        return self.find_article_links(html, self.base_url)
-    
-    async def parse_article(self, url: str, client: httpx.AsyncClient) -> Optional[Dict]:
-        html = await self.fetch_page(url, client)
-        if not html:
-            return None
-        
-        data = self.extract_with_trafilatura(html, url)
-        
-        # Additional image extraction if trafilatura missed it
-        if not data.get('image'):
-            soup = BeautifulSoup(html, 'lxml')
-            # Try Open Graph image
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                data['image'] = og_image['content']
-            else:
-                # Try first large image in article
-                for img in soup.find_all('img', src=True):
-                    src = img['src']
-                    if any(x in src.lower() for x in ['thumb', 'icon', 'logo', 'avatar']):
-                        continue
-                    data['image'] = urljoin(url, src)
-                    break
-        
-        return data
+        return self.find_article_links(page, self.base_url)
 
 
 # Parser registry
+PARSER_CLASSES = {
+    'Stan.kz': StanKzParser,
+    'Baq.kz': BaqKzParser,
+    'InformBuro': InformBuroParser,
+    'Orda.kz': OrdaKzParser,
+    'Sputnik KZ': SputnikKzParser,
+    '24.kz': TwentyFourKzParser,
+    'Zakon.kz': ZakonKzParser,
+}
+
+_parsers: Dict[Tuple[str, str], BaseParser] = {}
+
+
 def get_parser(source_name: str, source_url: str) -> BaseParser:
-    """Get appropriate parser for a source"""
-    parsers = {
-        'Stan.kz': StanKzParser(),
-        'Baq.kz': BaqKzParser(),
-        'InformBuro': InformBuroParser(),
-        'Orda.kz': OrdaKzParser(),
-        'Sputnik KZ': SputnikKzParser(),
-        '24.kz': TwentyFourKzParser(),
-        'Zakon.kz': ZakonKzParser(),
-    }
-    return parsers.get(source_name, GenericParser(source_url))
+    """Get the parser for a source; one instance per source, built on first use"""
+    key = (source_name, source_url)
+    parser = _parsers.get(key)
+    if parser is None:
+        parser_class = PARSER_CLASSES.get(source_name)
+        parser = parser_class() if parser_class else GenericParser(source_url)
+        parser.proxy_session = source_name
+        parser.source_name = source_name
+        # A source's own rules replace the defaults field by field
+        source = next((s for s in SOURCES if s['name'] == source_name), {})
+        if source.get('rules'):
+            parser.rules = ExtractionRules({**EXTRACT_RULES, **source['rules']})
+            parser.rule_fields = set(source['rules'])
+        _parsers[key] = parser
+    return parser
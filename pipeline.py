@@ -0,0 +1,118 @@
+"""
+Bounded asyncio pipeline: stages joined by queues, each with its own worker pool
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from logs import get_logger
+
+log = get_logger('pipeline')
+
+# A stage handler receives one item and returns the items to pass downstream
+Handler = Callable[[Any], Awaitable[Optional[Iterable[Any]]]]
+
+
+class Stage:
+    """One pipeline stage: an input queue drained by `workers` concurrent handlers"""
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1, queue_size: int = 0,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.on_error = on_error
+        self.workers = max(workers, 1)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.next: Optional['Stage'] = None
+
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy_seconds = 0.0      # time spent inside the handler
+        self.blocked_seconds = 0.0   # time waiting for room in the next queue (back-pressure)
+        self.max_depth = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def put(self, item: Any):
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            started = time.monotonic()
+            try:
+                results = await self.handler(item)
+                self.busy_seconds += time.monotonic() - started
+                if results and self.next is not None:
+                    waiting = time.monotonic()
+                    for result in results:
+                        await self.next.put(result)
+                        self.emitted += 1
+                    self.blocked_seconds += time.monotonic() - waiting
+            except Exception as e:
+                self.busy_seconds += time.monotonic() - started
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(item, e)
+                else:
+                    log.error(f"  ✗ {self.name} stage error: {type(e).__name__}: {e}", stage=self.name)
+            finally:
+                self.processed += 1
+                self.finished_at = time.monotonic()
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        """Queue depth and throughput for this stage"""
+        elapsed = (self.finished_at - self.started_at) if self.started_at and self.finished_at else 0.0
+        return {
+            'workers': self.workers,
+            'depth': self.queue.qsize(),
+            'max_depth': self.max_depth,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 2),
+            'blocked_seconds': round(self.blocked_seconds, 2),
+            'throughput': round(self.processed / elapsed, 2) if elapsed > 0 else float(self.processed),
+        }
+
+
+class Pipeline:
+    """Chain of stages; back-pressure comes from the bounded queues between them"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        for upstream, downstream in zip(stages, stages[1:]):
+            upstream.next = downstream
+
+    async def run(self, items: Iterable[Any]):
+        """Feed items to the first stage and wait until every stage has drained"""
+        workers = [
+            asyncio.ensure_future(stage._worker())
+            for stage in self.stages
+            for _ in range(stage.workers)
+        ]
+        try:
+            for item in items:
+                await self.stages[0].put(item)
+            # Workers hand results downstream before task_done, so joining in order is enough
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, dict]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def print_report(self):
+        log.info("   Pipeline:")
+        for name, stats in self.stats().items():
+            log.info(f"     {name:<9} {stats['processed']:>4} items, {stats['throughput']:>6.2f}/s, "
+                     f"max queue {stats['max_depth']}, busy {stats['busy_seconds']}s, "
+                     f"blocked {stats['blocked_seconds']}s ({stats['workers']} workers)", stage=name, **stats)
@@ -0,0 +1,265 @@
+"""
+Sampling profiler for aggregator runs, with samples tagged by pipeline stage and source
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import PROFILE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES
+
+Tag = Tuple[str, str]       # (stage, source)
+IDLE: Tag = ('idle', '')    # event loop waiting on the network
+OTHER: Tag = ('other', '')  # untagged work (startup, summary, GC, ...)
+
+_SELF_FILE = os.path.abspath(__file__)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    short = os.path.basename(filename)
+    package = os.path.basename(os.path.dirname(filename))
+    if 'site-packages' in filename or 'lib/python' in filename:
+        short = f"{package}/{short}"
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _stage_markers() -> Dict[str, List[Tuple[str, int, int]]]:
+    """Source line ranges of the functions that identify each stage in allocation tracebacks"""
+    import inspect
+    import models
+    import parsers
+    # `python aggregator.py` runs the module as __main__; don't load a second copy
+    aggregator = sys.modules.get('aggregator') or sys.modules['__main__']
+
+    functions = {
+        'discover': [cls.get_article_links for cls in vars(parsers).values()
+                     if isinstance(cls, type) and issubclass(cls, parsers.BaseParser)
+                     and 'get_article_links' in vars(cls)] + [parsers.BaseParser.find_article_links],
+        'extract': [parsers.BaseParser.extract_with_trafilatura, parsers.read_metadata] + [
+            cls.extract_article for cls in vars(parsers).values()
+            if isinstance(cls, type) and issubclass(cls, parsers.BaseParser) and 'extract_article' in vars(cls)],
+        'classify': [aggregator.NewsAggregator.build_article],
+        'persist': [models.NewsStorage.add_many, models.SeenURLsTracker.mark_many_seen],
+        'submit': [aggregator.NewsAggregator.send_to_api],
+        'fetch': [parsers.BaseParser.fetch_page],
+    }
+    markers = {}
+    for stage, funcs in functions.items():
+        ranges = []
+        for func in funcs:
+            lines, first = inspect.getsourcelines(func)
+            ranges.append((os.path.abspath(inspect.getsourcefile(func)), first, first + len(lines) - 1))
+        markers[stage] = ranges
+    return markers
+
+
+class RunProfiler:
+    """Samples every thread's stack at PROFILE_INTERVAL and traces allocations with tracemalloc.
+
+    Pipeline handlers run under tagged()/thread_tagged(), so each sample is
+    charged to the (stage, source) of the asyncio task or executor thread that
+    was running. Allocations cannot be tied to a task, so they are attributed
+    to a stage by the functions in their traceback.
+    """
+
+    def __init__(self, label: str, interval: float = PROFILE_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self.samples: Dict[Tag, Counter] = {}       # tag -> collapsed stack -> count
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._task_tags: Dict[asyncio.Task, Tag] = {}
+        self._thread_tags: Dict[int, Tag] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot_before = None
+        self._snapshot_after = None
+        self._owns_tracemalloc = False
+
+    # -- tagging -------------------------------------------------------------
+
+    def tagged(self, stage: str, handler: Callable, source_of: Callable) -> Callable:
+        """Wrap an async pipeline handler so its samples are charged to (stage, source)"""
+        @wraps(handler)
+        async def run(item):
+            task = asyncio.current_task()
+            previous = self._task_tags.get(task)
+            self._task_tags[task] = (stage, source_of(item))
+            try:
+                return await handler(item)
+            finally:
+                if previous is None:
+                    self._task_tags.pop(task, None)
+                else:
+                    self._task_tags[task] = previous
+        return run
+
+    def thread_tagged(self, stage: str, source: str, func: Callable) -> Callable:
+        """Wrap a function handed to run_in_executor"""
+        @wraps(func)
+        def run(*args):
+            ident = threading.get_ident()
+            self._thread_tags[ident] = (stage, source)
+            try:
+                return func(*args)
+            finally:
+                self._thread_tags.pop(ident, None)
+        return run
+
+    # -- sampling ------------------------------------------------------------
+
+    def _tag_for(self, ident: int, leaf) -> Tag:
+        if ident in self._thread_tags:
+            return self._thread_tags[ident]
+        if ident == self._loop_thread and self._loop is not None:
+            task = asyncio.current_task(self._loop) if self._loop.is_running() else None
+            if task in self._task_tags:
+                return self._task_tags[task]
+            if task is None and leaf.f_code.co_name in ('select', 'poll', 'epoll', 'control'):
+                return IDLE
+        return OTHER
+
+    def _sample(self):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            leaf = frame
+            stack = []
+            while frame is not None:
+                if os.path.abspath(frame.f_code.co_filename) != _SELF_FILE:
+                    stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            tag = self._tag_for(ident, leaf)
+            # Idle executor threads and the sampler's peers are noise
+            if tag == OTHER and ident != self._loop_thread:
+                continue
+            self.samples.setdefault(tag, Counter())[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        self._snapshot_before = tracemalloc.take_snapshot()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.monotonic() - self.started_at
+        self._snapshot_after = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    # -- reporting -----------------------------------------------------------
+
+    def _allocations(self, limit: int) -> Tuple[List[Tuple[str, int, int]], Dict[str, int]]:
+        """Top allocation sites (file:line, bytes, blocks) and net bytes per stage"""
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, _SELF_FILE)]
+        before = self._snapshot_before.filter_traces(ignore)
+        after = self._snapshot_after.filter_traces(ignore)
+
+        sites = [
+            (f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size_diff, stat.count_diff)
+            for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0
+        ][:limit]
+
+        markers = _stage_markers()
+        by_stage: Counter = Counter()
+        for stat in after.compare_to(before, 'traceback'):
+            if stat.size_diff <= 0:
+                continue
+            frames = [(os.path.abspath(f.filename), f.lineno) for f in stat.traceback]
+            stage = next(
+                (name for name, ranges in markers.items()
+                 if any(path == filename and first <= line <= last
+                        for filename, line in frames for path, first, last in ranges)),
+                'other'
+            )
+            by_stage[stage] += stat.size_diff
+        return sites, dict(by_stage)
+
+    def report(self, top: int = 8) -> str:
+        lines = [
+            f"Profile: {self.label}",
+            f"  {self.sample_count} samples every {self.interval * 1000:.0f} ms over {self.elapsed:.1f}s "
+            f"(thread samples overlap, so stage time can exceed wall time)",
+            "",
+            "Time by stage and source:",
+        ]
+        stage_totals: Counter = Counter()
+        stage_stacks: Dict[str, Counter] = {}
+        for (stage, source), stacks in self.samples.items():
+            stage_totals[stage] += sum(stacks.values())
+            stage_stacks.setdefault(stage, Counter()).update(stacks)
+        for (stage, source), stacks in sorted(self.samples.items(), key=lambda item: -sum(item[1].values())):
+            count = sum(stacks.values())
+            lines.append(f"  {stage:<9} {source or '-':<22} {count:>6} samples  ~{count * self.interval:6.2f}s")
+
+        for stage, total in stage_totals.most_common():
+            if stage == IDLE[0]:
+                continue
+            self_time: Counter = Counter()
+            cumulative: Counter = Counter()
+            for stack, count in stage_stacks[stage].items():
+                frames = stack.split(';')
+                self_time[frames[-1]] += count
+                for frame in set(frames):
+                    cumulative[frame] += count
+            lines.append("")
+            lines.append(f"Top functions [{stage}] ({total} samples):")
+            lines.append(f"  {'self%':>6} {'cum%':>6}  function")
+            for frame, count in self_time.most_common(top):
+                lines.append(f"  {count / total:6.1%} {cumulative[frame] / total:6.1%}  {frame}")
+
+        sites, by_stage = self._allocations(top * 2)
+        lines.append("")
+        lines.append("Net allocations by stage:")
+        for stage, size in sorted(by_stage.items(), key=lambda item: -item[1]):
+            lines.append(f"  {stage:<9} {size / 1024:10.1f} KB")
+        lines.append("")
+        lines.append("Allocation hot spots (net growth during the run):")
+        for site, size, count in sites:
+            lines.append(f"  {size / 1024:10.1f} KB  {count:>7} blocks  {site}")
+        return '\n'.join(lines) + '\n'
+
+    def collapsed(self) -> str:
+        """Collapsed stacks (stage;source;frames... count) for flamegraph.pl / speedscope"""
+        lines = []
+        for (stage, source), stacks in sorted(self.samples.items()):
+            for stack, count in sorted(stacks.items()):
+                prefix = f"{stage};{source or '-'}"
+                lines.append(f"{prefix};{stack} {count}" if stack else f"{prefix} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def save(self, directory: str, report: Optional[str] = None) -> Tuple[str, str]:
+        """Write report.txt and stacks.collapsed to a fresh directory under `directory`"""
+        path = os.path.join(directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        os.makedirs(path, exist_ok=True)
+        report_file = os.path.join(path, 'report.txt')
+        stacks_file = os.path.join(path, 'stacks.collapsed')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(report or self.report())
+        with open(stacks_file, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return report_file, stacks_file
@@ -0,0 +1,148 @@
+"""
+Proxy pool with health-weighted rotation, sticky sessions and ejection
+"""
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import (
+    PROXY_URLS, PROXY_BLOCK_STATUSES, PROXY_EJECT_AFTER,
+    PROXY_EJECT_COOLDOWN, PROXY_EJECT_MAX_COOLDOWN
+)
+from logs import get_logger
+
+log = get_logger('proxy_pool')
+
+
+def display_proxy(proxy: str) -> str:
+    """Proxy URL without credentials, for logs"""
+    parts = urlsplit(proxy)
+    return f"{parts.scheme}://{parts.hostname}:{parts.port}" if parts.hostname else proxy
+
+
+@dataclass
+class ProxyHealth:
+    """Health of one proxy for one target host"""
+    requests: int = 0
+    errors: int = 0
+    blocked: int = 0
+    latency: float = 0.0          # exponential moving average, seconds
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+
+    def is_admitted(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def score(self) -> float:
+        """Higher is better; smoothed so fresh proxies get a fair share"""
+        error_rate = (self.errors + 1) / (self.requests + 2)
+        block_rate = (self.blocked + 1) / (self.requests + 2)
+        return (1 - error_rate) * (1 - block_rate) / (1 + self.latency)
+
+
+class ProxyPool:
+    """Assigns a proxy per (source, host) and rotates away from unhealthy ones"""
+
+    def __init__(self, proxies: List[str] = None, seed: Optional[int] = None):
+        self.proxies = list(PROXY_URLS if proxies is None else proxies)
+        self.health: Dict[Tuple[str, str], ProxyHealth] = {}
+        self.sessions: Dict[Tuple[str, str], str] = {}
+        self._random = random.Random(seed)
+
+    def __bool__(self) -> bool:
+        return bool(self.proxies)
+
+    def _health(self, proxy: str, host: str) -> ProxyHealth:
+        key = (proxy, host)
+        if key not in self.health:
+            self.health[key] = ProxyHealth()
+        return self.health[key]
+
+    def choose(self, host: str, session: Optional[str] = None, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+        """Pick a proxy for a request to host; None means connect directly"""
+        if not self.proxies:
+            return None
+        candidates = [p for p in self.proxies if p not in exclude] or self.proxies
+
+        now = time.monotonic()
+        session_key = (session or host, host)
+        sticky = self.sessions.get(session_key)
+        if sticky and sticky in candidates and self._health(sticky, host).is_admitted(now):
+            return sticky
+
+        admitted = [p for p in candidates if self._health(p, host).is_admitted(now)]
+        if admitted:
+            weights = [self._health(p, host).score() for p in admitted]
+            proxy = self._random.choices(admitted, weights=weights)[0]
+        else:
+            # Everything is ejected - use whichever comes back first
+            proxy = min(candidates, key=lambda p: self._health(p, host).ejected_until)
+
+        self.sessions[session_key] = proxy
+        return proxy
+
+    def record(self, proxy: str, host: str, latency: float,
+               status: Optional[int] = None, error: bool = False):
+        """Update health after a request through proxy"""
+        health = self._health(proxy, host)
+        health.requests += 1
+        health.latency = latency if health.requests == 1 else 0.8 * health.latency + 0.2 * latency
+
+        blocked = status in PROXY_BLOCK_STATUSES
+        if error:
+            health.errors += 1
+        if blocked:
+            health.blocked += 1
+
+        if not (error or blocked):
+            health.consecutive_failures = 0
+            health.ejections = 0
+            return
+
+        # Drop stickiness so the next request for this host is re-balanced
+        for key in [k for k, p in self.sessions.items() if p == proxy and k[1] == host]:
+            del self.sessions[key]
+
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= PROXY_EJECT_AFTER:
+            self._eject(proxy, host, health)
+
+    def _eject(self, proxy: str, host: str, health: ProxyHealth):
+        cooldown = min(PROXY_EJECT_COOLDOWN * 2 ** health.ejections, PROXY_EJECT_MAX_COOLDOWN)
+        health.ejections += 1
+        health.ejected_until = time.monotonic() + cooldown
+        # Re-admitted after the cooldown; one more failure streak ejects it for longer
+        health.consecutive_failures = 0
+        log.warning(f"  🚫 Proxy {display_proxy(proxy)} ejected for {host} ({cooldown}s)",
+                    proxy=display_proxy(proxy), host=host, cooldown=cooldown)
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        report = {}
+        for (proxy, host), health in self.health.items():
+            report.setdefault(display_proxy(proxy), {})[host] = {
+                'requests': health.requests,
+                'errors': health.errors,
+                'blocked': health.blocked,
+                'latency': round(health.latency, 3),
+                'ejected': not health.is_admitted(now),
+            }
+        return report
+
+    def print_report(self):
+        """Log per-proxy totals for the run summary"""
+        if not self.proxies:
+            return
+        now = time.monotonic()
+        log.info(f"   Proxies: {len(self.proxies)}")
+        for proxy in self.proxies:
+            entries = [h for (p, _), h in self.health.items() if p == proxy]
+            requests = sum(h.requests for h in entries)
+            errors = sum(h.errors for h in entries)
+            blocked = sum(h.blocked for h in entries)
+            ejected = sum(1 for h in entries if not h.is_admitted(now))
+            log.info(f"     {display_proxy(proxy)}: {requests} req, {errors} errors, {blocked} blocked"
+                     + (f", ejected for {ejected} host(s)" if ejected else ""), proxy=display_proxy(proxy))
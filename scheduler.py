@@ -2,12 +2,54 @@
 Scheduler for automatic news fetching
 """
 import asyncio
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 
 from aggregator import NewsAggregator
+from config import (
+    SOURCES, SCHEDULE_MIN_INTERVAL, SCHEDULE_MAX_INTERVAL, SCHEDULE_TARGET_NEW_URLS,
+    SCHEDULE_TARGET_MATCHES, SCHEDULE_RATE_SMOOTHING,
+    DATA_DIR, LEASE_DB_FILE, LEASE_RENEW_INTERVAL, METRICS_PORT
+)
+from http_client import ConnectionStats, create_client
+from logs import get_logger, setup_logging
+from metrics import MetricsServer
+from sharding import LeaseStore, default_worker_id
+
+log = get_logger('scheduler')
+
+
+class AdaptiveInterval:
+    """Polling interval for one source, driven by its observed rate of new links and matches"""
+    
+    def __init__(self, minutes: float):
+        self.minutes = min(max(minutes, SCHEDULE_MIN_INTERVAL), SCHEDULE_MAX_INTERVAL)
+        self.new_url_rate: Optional[float] = None  # new links per minute
+        self.match_rate: Optional[float] = None    # keyword matches per minute
+    
+    def _smooth(self, previous: Optional[float], observed: float) -> float:
+        if previous is None:
+            return observed
+        return SCHEDULE_RATE_SMOOTHING * observed + (1 - SCHEDULE_RATE_SMOOTHING) * previous
+    
+    def update(self, new_links: int, matches: int, elapsed_minutes: float) -> float:
+        """Record one poll and return the next interval in minutes"""
+        elapsed_minutes = max(elapsed_minutes, 1.0)
+        self.new_url_rate = self._smooth(self.new_url_rate, new_links / elapsed_minutes)
+        self.match_rate = self._smooth(self.match_rate, matches / elapsed_minutes)
+        
+        target = SCHEDULE_MAX_INTERVAL
+        if self.new_url_rate > 0:
+            target = min(target, SCHEDULE_TARGET_NEW_URLS / self.new_url_rate)
+        if self.match_rate > 0:
+            target = min(target, SCHEDULE_TARGET_MATCHES / self.match_rate)
+        
+        self.minutes = min(max(target, SCHEDULE_MIN_INTERVAL), SCHEDULE_MAX_INTERVAL)
+        return self.minutes
 
 
 class NewsScheduler:
@@ -16,15 +58,137 @@ class NewsScheduler:
     def __init__(self):
         self.aggregator = NewsAggregator()
         self.scheduler = AsyncIOScheduler()
+        
+        # Adaptive mode state: one interval per source and a client shared by all jobs
+        self.intervals: Dict[str, AdaptiveInterval] = {}
+        self.last_polled: Dict[str, datetime] = {}
+        self.connection_stats = ConnectionStats()
+        self.client = None
+        
+        # Sharded mode state: this worker's leases on the shared data directory
+        self.leases: Optional[LeaseStore] = None
+        self.worker_id = default_worker_id()
+        self.owned: List[str] = []
+        self.fetching = False
+        
+        self.metrics_server = MetricsServer() if METRICS_PORT else None
     
-    async def fetch_job(self):
+    def _slot_end(self, job_id: str = 'news_fetch') -> Optional[datetime]:
+        """When the next scheduled fetch fires - the current run must finish before it"""
+        job = self.scheduler.get_job(job_id)
+        if job is None or job.next_run_time is None:
+            return None
+        # APScheduler times are timezone-aware; the aggregator works in local naive time
+        return job.next_run_time.astimezone().replace(tzinfo=None)
+    
+    async def fetch_job(self, deadline: Optional[datetime] = None):
         """Job to fetch news"""
-        print(f"\n⏰ Scheduled fetch started at {datetime.now().isoformat()}")
+        log.info(f"\n⏰ Scheduled fetch started at {datetime.now().isoformat()}")
+        try:
+            result = await self.aggregator.run(deadline=deadline or self._slot_end())
+            log.info(f"⏰ Scheduled fetch completed: {result['new_articles']} new articles")
+        except Exception as e:
+            log.error(f"⏰ Scheduled fetch error: {e}")
+    
+    async def lease_job(self):
+        """Heartbeat; between fetches also rebalance which sources this worker owns.
+        A coroutine, so it runs on the event loop thread that opened the lease database"""
+        try:
+            # Mid-fetch only renew, so no source changes hands while it is being fetched
+            owned = self.leases.renew(self.worker_id) if self.fetching else \
+                self.leases.claim(self.worker_id, [s['name'] for s in SOURCES])
+        except Exception as e:
+            log.error(f"🔒 Lease error: {e}")
+            return
+        if set(owned) != set(self.owned):
+            log.info(f"🔒 {self.worker_id} now owns {len(owned)} sources: {', '.join(owned) or '-'}")
+        self.owned = owned
+    
+    async def shard_fetch_job(self):
+        """Fetch the sources this worker currently holds leases for"""
+        await self.lease_job()
+        sources = [s for s in SOURCES if s['name'] in self.owned]
+        if not sources:
+            log.info(f"⏰ {self.worker_id}: no sources leased, skipping fetch")
+            return
+        log.info(f"\n⏰ Shard fetch ({self.worker_id}, {len(sources)} sources) started at {datetime.now().isoformat()}")
+        self.fetching = True
+        try:
+            result = await self.aggregator.run(sources, deadline=self._slot_end('shard_fetch'))
+            log.info(f"⏰ Shard fetch completed: {result['new_articles']} new articles")
+        except Exception as e:
+            log.error(f"⏰ Shard fetch error: {e}")
+        finally:
+            self.fetching = False
+    
+    async def start_sharded(self, minutes: int = 30):
+        """Run as one of several workers sharing DATA_DIR; sources are split through leases"""
+        self.leases = LeaseStore(os.path.join(DATA_DIR, LEASE_DB_FILE))
+        # Register first and give workers started together a chance to do the same,
+        # otherwise the first one up would claim every source
+        self.leases.heartbeat(self.worker_id)
+        log.info(f"🔒 Worker {self.worker_id} registered, waiting {LEASE_RENEW_INTERVAL}s for other workers")
+        await asyncio.sleep(LEASE_RENEW_INTERVAL)
+        
+        self.scheduler.add_job(
+            self.lease_job,
+            trigger=IntervalTrigger(seconds=LEASE_RENEW_INTERVAL),
+            id='leases',
+            replace_existing=True,
+            max_instances=1
+        )
+        self.scheduler.add_job(
+            self.shard_fetch_job,
+            trigger=IntervalTrigger(minutes=minutes),
+            next_run_time=datetime.now(),
+            id='shard_fetch',
+            replace_existing=True,
+            max_instances=1
+        )
+        self.scheduler.start()
+        log.info(f"📅 Sharded scheduler started: worker {self.worker_id}, fetching leased sources every {minutes} minutes")
+    
+    async def source_job(self, source: dict):
+        """Job to fetch a single source and adapt its polling interval"""
+        name = source['name']
+        now = datetime.now()
+        elapsed = (now - self.last_polled[name]).total_seconds() / 60 if name in self.last_polled else self.intervals[name].minutes
+        self.last_polled[name] = now
         try:
-            result = await self.aggregator.run()
-            print(f"⏰ Scheduled fetch completed: {result['new_articles']} new articles")
+            stats = await self.aggregator.run_source(source, self.client)
         except Exception as e:
-            print(f"⏰ Scheduled fetch error: {e}")
+            log.error(f"⏰ {name}: fetch error: {e}")
+            return
+        
+        previous = self.intervals[name].minutes
+        minutes = self.intervals[name].update(stats['new_links'], stats['matched'], elapsed)
+        log.info(f"⏰ {name}: {stats['new_links']} new links, {stats['matched']} matched in {stats['duration']}s "
+                 f"- next poll in {minutes:.0f} min", source=name, next_poll_minutes=round(minutes, 1))
+        if abs(minutes - previous) >= 1:
+            self.scheduler.reschedule_job(f'source:{name}', trigger=IntervalTrigger(minutes=minutes))
+    
+    async def start_adaptive(self, minutes: int = 30):
+        """Start one job per source, staggered across the first interval, adapting each interval"""
+        self.client = create_client(self.connection_stats, self.aggregator.proxy_pool)
+        await self.client.__aenter__()
+        
+        stagger = timedelta(minutes=minutes) / max(len(SOURCES), 1)
+        first_run = datetime.now() + timedelta(seconds=5)
+        for i, source in enumerate(SOURCES):
+            self.intervals[source['name']] = AdaptiveInterval(minutes)
+            self.scheduler.add_job(
+                self.source_job,
+                args=[source],
+                trigger=IntervalTrigger(minutes=self.intervals[source['name']].minutes),
+                next_run_time=first_run + stagger * i,
+                id=f"source:{source['name']}",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+        self.scheduler.start()
+        log.info(f"📅 Adaptive scheduler started: {len(SOURCES)} sources, "
+                 f"{SCHEDULE_MIN_INTERVAL}-{SCHEDULE_MAX_INTERVAL} min, staggered every {stagger.total_seconds():.0f}s")
     
     def start_interval(self, minutes: int = 30):
         """Start fetching at regular intervals"""
@@ -36,7 +200,7 @@ class NewsScheduler:
             max_instances=1
         )
         self.scheduler.start()
-        print(f"📅 Scheduler started: fetching every {minutes} minutes")
+        log.info(f"📅 Scheduler started: fetching every {minutes} minutes")
     
     def start_cron(self, hour: str = "*/2", minute: str = "0"):
         """Start fetching on a cron schedule"""
@@ -48,34 +212,73 @@ class NewsScheduler:
             max_instances=1
         )
         self.scheduler.start()
-        print(f"📅 Scheduler started: cron {hour}:{minute}")
+        log.info(f"📅 Scheduler started: cron {hour}:{minute}")
     
     def stop(self):
         """Stop the scheduler"""
         self.scheduler.shutdown()
-        print("📅 Scheduler stopped")
+        log.info("📅 Scheduler stopped")
+    
+    async def start_metrics(self):
+        """Serve /metrics for the lifetime of the scheduler"""
+        if self.metrics_server is None:
+            return
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            log.warning(f"⚠️  Metrics endpoint disabled: {e}")
+            self.metrics_server = None
+    
+    async def close(self):
+        """Close the shared client used by adaptive jobs, hand back any leases and stop /metrics"""
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self.client is not None:
+            await self.client.__aexit__(None, None, None)
+            self.client = None
+        if self.leases is not None:
+            self.leases.release(self.worker_id)
+            self.leases.close()
+            self.leases = None
+            log.info(f"🔒 Worker {self.worker_id} released its leases")
 
 
 async def run_scheduler():
     """Run the scheduler"""
     import sys
     
+    setup_logging()
     scheduler = NewsScheduler()
     
     # Parse command line arguments
+    args = sys.argv[1:]
+    adaptive = '--adaptive' in args
+    sharded = '--shard' in args
+    # --profile: every fetch writes a stage/source profile under DATA_DIR/profiles
+    scheduler.aggregator.profile = '--profile' in args
+    args = [a for a in args if a not in ('--adaptive', '--shard', '--profile')]
     interval = 30  # Default: every 30 minutes
-    if len(sys.argv) > 1:
+    if args:
         try:
-            interval = int(sys.argv[1])
+            interval = int(args[0])
         except ValueError:
             pass
     
-    # Run initial fetch
-    print("🚀 Running initial fetch...")
-    await scheduler.fetch_job()
+    await scheduler.start_metrics()
     
-    # Start scheduler
-    scheduler.start_interval(minutes=interval)
+    if sharded:
+        # One of several workers on a shared data directory; the first fetch runs right away
+        await scheduler.start_sharded(minutes=interval)
+    elif adaptive:
+        # Per-source jobs; the first polls are staggered instead of one initial fetch
+        await scheduler.start_adaptive(minutes=interval)
+    else:
+        # Run initial fetch, finishing before the first scheduled one
+        log.info("🚀 Running initial fetch...")
+        await scheduler.fetch_job(deadline=datetime.now() + timedelta(minutes=interval))
+        
+        # Start scheduler
+        scheduler.start_interval(minutes=interval)
     
     # Keep running
     try:
@@ -83,7 +286,9 @@ async def run_scheduler():
             await asyncio.sleep(60)
     except KeyboardInterrupt:
         scheduler.stop()
-        print("\n👋 Scheduler stopped by user")
+        log.info("\n👋 Scheduler stopped by user")
+    finally:
+        await scheduler.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,168 @@
+"""
+Full-text search over the stored articles: an SQLite FTS5 inverted index kept
+up to date as NewsStorage adds and changes articles
+"""
+import hashlib
+import sqlite3
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+from keywords import words
+from models import NewsArticle
+
+# Relative weight of a hit in each indexed column when ranking (bm25)
+TITLE_WEIGHT = 4.0
+KEYWORDS_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+
+def _fold(text: str) -> str:
+    """ё and е are one letter, as in keyword matching; case is folded by the tokenizer"""
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def _columns(article: NewsArticle) -> Tuple[str, str, str]:
+    """(title, keywords, body) as indexed"""
+    return (
+        _fold(article.title),
+        _fold(' '.join(article.matched_keywords)),
+        _fold(f"{article.description} {article.content_text}"),
+    )
+
+
+def _digest(columns: Tuple[str, ...]) -> str:
+    return hashlib.blake2b('\x00'.join(columns).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def match_expression(query: str, prefix: bool = False) -> Optional[str]:
+    """FTS5 query requiring every word of `query`; with prefix=True each word also matches
+    as the start of a longer word ("студент" finds "студенттерге", "студентов")"""
+    terms = [f'"{word}"*' if prefix else f'"{word}"' for word in words(query)]
+    return ' '.join(terms) or None
+
+
+class SearchIndex:
+    """Inverted index of article titles, matched keywords and text, plus the fields search filters on.
+
+    Kazakh and Russian text is split by the unicode61 tokenizer (case folded,
+    diacritics kept, so "й" stays distinct from "и"). An article is
+    re-tokenized only when its indexed text changes; status and category
+    changes just update its row. Several workers may share the file.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+    @cached_property
+    def _conn(self) -> sqlite3.Connection:
+        """Opened on first use, so commands that never search or write articles create no file"""
+        conn = sqlite3.connect(self.filepath, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS article_text USING fts5("
+            "title, keywords, body, tokenize='unicode61 remove_diacritics 0')"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, digest TEXT NOT NULL, title TEXT NOT NULL, url TEXT NOT NULL, "
+            "source TEXT NOT NULL, category TEXT NOT NULL, status TEXT NOT NULL, fetched_at TEXT NOT NULL)"
+        )
+        for column in ('status', 'source', 'category'):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS articles_{column} ON articles ({column}, id)")
+        conn.commit()
+        return conn
+
+    def add(self, articles: List[NewsArticle]) -> int:
+        """Index new articles and re-index changed ones; returns how many were (re-)tokenized"""
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            ids = [article.id for article in articles]
+            digests: Dict[int, str] = {}
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                digests.update(self._conn.execute(
+                    f"SELECT id, digest FROM articles WHERE id IN ({', '.join('?' for _ in chunk)})", chunk))
+            rows = []
+            texts = []
+            for article in articles:
+                columns = _columns(article)
+                digest = _digest(columns)
+                rows.append((article.id, digest, article.title, article.source_url, article.source_name,
+                             article.category, article.status, article.fetched_at))
+                if digests.get(article.id) != digest:
+                    texts.append((article.id, *columns))
+            self._conn.executemany("DELETE FROM article_text WHERE rowid = ?", [(row[0],) for row in texts])
+            self._conn.executemany(
+                "INSERT INTO article_text (rowid, title, keywords, body) VALUES (?, ?, ?, ?)", texts)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO articles (id, digest, title, url, source, category, status, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(texts)
+
+    def remove(self, article_ids: List[int]):
+        with self._conn:
+            self._conn.executemany("DELETE FROM article_text WHERE rowid = ?", [(i,) for i in article_ids])
+            self._conn.executemany("DELETE FROM articles WHERE id = ?", [(i,) for i in article_ids])
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    def sync(self, articles: List[NewsArticle]) -> int:
+        """Bring the index in line with the whole store: index articles it lacks or holds with a
+        different status/category (e.g. stored before the index existed), drop removed ones"""
+        indexed = {row[0]: row[1:] for row in self._conn.execute("SELECT id, status, category FROM articles")}
+        stale = [article for article in articles if indexed.get(article.id) != (article.status, article.category)]
+        removed = set(indexed) - {article.id for article in articles}
+        if removed:
+            self.remove(list(removed))
+        return self.add(stale) if stale else 0
+
+    def search(self, query: str = '', status: Optional[str] = None, source: Optional[str] = None,
+               category: Optional[str] = None, since: Optional[str] = None, prefix: bool = False,
+               limit: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+        """(total hits, one page of hits). Hits are ranked by relevance (bm25, title hits
+        weigh most); without a query, the newest articles matching the filters come first."""
+        conditions, params = [], []
+        for column, value in (('status', status), ('source', source), ('category', category)):
+            if value:
+                conditions.append(f"articles.{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append("articles.fetched_at >= ?")
+            params.append(since)
+
+        expression = match_expression(query, prefix)
+        if expression:
+            # Walk the term's postings and look each hit up by id; left to itself the planner may
+            # instead run the full-text query once per article passing the filters
+            tables = "article_text CROSS JOIN articles ON articles.id = article_text.rowid"
+            conditions.insert(0, "article_text MATCH ?")
+            params.insert(0, expression)
+            columns = (f"bm25(article_text, {TITLE_WEIGHT}, {KEYWORDS_WEIGHT}, {BODY_WEIGHT}), "
+                       "snippet(article_text, -1, '[', ']', '…', 12)")
+            order = "1"
+        elif query.strip():
+            return 0, []  # only punctuation - nothing to look for
+        else:
+            tables = "articles"
+            columns = "0, ''"
+            order = "articles.id DESC"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        total = self._conn.execute(f"SELECT count(*) FROM {tables}{where}", params).fetchone()[0]
+        cursor = self._conn.execute(
+            f"SELECT {columns}, articles.id, articles.title, articles.url, articles.source, articles.category, "
+            f"articles.status, articles.fetched_at FROM {tables}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        hits = [
+            {'score': round(-score, 3), 'snippet': snippet, 'id': article_id, 'title': title, 'url': url,
+             'source': source_name, 'category': category_name, 'status': status_name, 'fetched_at': fetched_at}
+            for score, snippet, article_id, title, url, source_name, category_name, status_name, fetched_at in cursor
+        ]
+        return total, hits
+
+    def close(self):
+        if '_conn' in self.__dict__:
+            self._conn.close()
+            del self._conn
@@ -0,0 +1,117 @@
+"""
+Source leases for running several aggregator workers against one data directory
+"""
+import math
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from config import LEASE_TTL, WORKER_ID
+
+
+def default_worker_id() -> str:
+    return WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseStore:
+    """SQLite-backed leases: each source is owned by at most one live worker.
+    
+    Workers heartbeat through claim()/renew(). A worker that stops renewing
+    loses its leases after LEASE_TTL seconds and the survivors pick up its
+    sources on their next claim. Sources are spread evenly, so a new worker
+    gets a share once the others give up their excess.
+    """
+    
+    def __init__(self, filepath: str, ttl: float = LEASE_TTL):
+        self.filepath = filepath
+        self.ttl = ttl
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(filepath, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, heartbeat REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "source TEXT PRIMARY KEY, worker TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same source
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _expire(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM workers WHERE heartbeat < ?", (now - self.ttl,))
+        db.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+    
+    def heartbeat(self, worker: str):
+        """Register as live without claiming anything"""
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, time.time()))
+    
+    def claim(self, worker: str, sources: List[str]) -> List[str]:
+        """Heartbeat, take this worker's fair share of free sources and return what it owns"""
+        now = time.time()
+        with self._transaction() as db:
+            self._expire(db, now)
+            db.execute("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now))
+            live = db.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+            share = math.ceil(len(sources) / max(live, 1))
+            
+            leased = dict(db.execute("SELECT source, worker FROM leases").fetchall())
+            mine = [s for s in sources if leased.get(s) == worker]
+            # Hand back the excess so workers that joined later get their share
+            for source in mine[share:]:
+                db.execute("DELETE FROM leases WHERE source = ? AND worker = ?", (source, worker))
+            mine = mine[:share]
+            
+            for source in sources:
+                if len(mine) >= share:
+                    break
+                if source not in leased:
+                    db.execute(
+                        "INSERT INTO leases (source, worker, expires_at) VALUES (?, ?, ?)",
+                        (source, worker, now + self.ttl)
+                    )
+                    mine.append(source)
+            
+            db.execute("UPDATE leases SET expires_at = ? WHERE worker = ?", (now + self.ttl, worker))
+        return [s for s in sources if s in mine]
+    
+    def renew(self, worker: str) -> List[str]:
+        """Extend this worker's leases without rebalancing; returns the sources still owned"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now))
+            db.execute("UPDATE leases SET expires_at = ? WHERE worker = ? AND expires_at >= ?",
+                       (now + self.ttl, worker, now))
+            rows = db.execute("SELECT source FROM leases WHERE worker = ? AND expires_at >= ?",
+                              (worker, now)).fetchall()
+        return [row[0] for row in rows]
+    
+    def release(self, worker: str):
+        """Give up all leases, e.g. on clean shutdown, so others take over immediately"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM leases WHERE worker = ?", (worker,))
+            db.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+    
+    def leases(self) -> Dict[str, Tuple[str, float]]:
+        """source -> (worker, seconds until expiry) for live leases"""
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT source, worker, expires_at FROM leases WHERE expires_at >= ? ORDER BY worker, source", (now,)
+        ).fetchall()
+        return {source: (worker, expires_at - now) for source, worker, expires_at in rows}
+    
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,85 @@
+"""
+Tokenized copy of the stored articles, so the whole store can be re-classified without re-reading every text
+"""
+import hashlib
+import sqlite3
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+from keywords import tokenize
+from models import NewsArticle
+
+
+def article_text(article: NewsArticle) -> str:
+    """The text an article was classified on (as in NewsAggregator.build_article)"""
+    return f"{article.title} {article.description} {article.content_text}"
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class TermIndex:
+    """Sparse document/term matrix of the article store, kept in SQLite.
+
+    Each article is stored as the vocabulary ids of its words plus the
+    positions where a phrase cannot continue (see keywords.tokenize). An
+    article is tokenized again only when its text changes.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._conn = sqlite3.connect(filepath, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vocabulary (id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, digest TEXT NOT NULL, tokens BLOB NOT NULL, breaks BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def vocabulary(self) -> List[str]:
+        """Words by id (ids are dense, starting at 0)"""
+        return [row[0] for row in self._conn.execute("SELECT word FROM vocabulary ORDER BY id")]
+
+    def update(self, articles: List[NewsArticle]) -> int:
+        """Tokenize new and changed articles, drop removed ones; returns how many were tokenized"""
+        # Hold the write lock throughout, so concurrent runs never hand out the same word id
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            digests = dict(self._conn.execute("SELECT id, digest FROM documents"))
+            word_ids: Dict[str, int] = {word: word_id for word_id, word in enumerate(self.vocabulary())}
+            new_words = []
+            rows = []
+            for article in articles:
+                text = article_text(article)
+                digest = _digest(text)
+                if digests.get(article.id) == digest:
+                    continue
+                words, breaks = tokenize(text)
+                tokens = array('I')
+                for word in words:
+                    word_id = word_ids.get(word)
+                    if word_id is None:
+                        word_id = word_ids[word] = len(word_ids)
+                        new_words.append((word_id, word))
+                    tokens.append(word_id)
+                rows.append((article.id, digest, tokens.tobytes(), array('I', breaks).tobytes()))
+
+            removed = set(digests) - {article.id for article in articles}
+            self._conn.executemany("INSERT INTO vocabulary (id, word) VALUES (?, ?)", new_words)
+            self._conn.executemany("INSERT OR REPLACE INTO documents (id, digest, tokens, breaks) VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", [(article_id,) for article_id in removed])
+        return len(rows)
+
+    def documents(self) -> Iterator[Tuple[int, array, array]]:
+        """(article id, word ids, break positions) for every indexed article"""
+        for article_id, tokens, breaks in self._conn.execute("SELECT id, tokens, breaks FROM documents"):
+            words = array('I')
+            words.frombytes(tokens)
+            positions = array('I')
+            positions.frombytes(breaks)
+            yield article_id, words, positions
+
+    def close(self):
+        self._conn.close()
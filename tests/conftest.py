@@ -0,0 +1,20 @@
+"""
+Shared test setup: the repo's flat modules are importable and DATA_DIR points at a
+scratch directory, so tests never touch data/
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="newsparser-test-")
+
+
+@pytest.fixture
+def news_aggregator(tmp_path, monkeypatch):
+    """A NewsAggregator whose data files all live in the test's own directory"""
+    import aggregator
+    monkeypatch.setattr(aggregator, 'DATA_DIR', str(tmp_path))
+    return aggregator.NewsAggregator()
@@ -0,0 +1,65 @@
+"""
+CRM export: the first and every --full export carry all approved articles, a delta
+export only those approved after the cursor, and the cursor moves only when a file
+is written
+"""
+import gzip
+import json
+import os
+
+from crm_export import CRMExporter
+from models import NewsArticle
+
+
+def _article(article_id: int, moderated_at: str, status: str = "approved") -> NewsArticle:
+    return NewsArticle(id=article_id, title=f"Article {article_id}", source_url=f"https://stan.kz/news/{article_id}",
+                       source_name="Stan.kz", status=status, moderated_at=moderated_at)
+
+
+def _ids(result: dict) -> list:
+    opener = gzip.open if result['file'].endswith('.gz') else open
+    with opener(result['file'], 'rt', encoding='utf-8') as f:
+        return [json.loads(line)['id'] for line in f]
+
+
+def test_full_then_delta_exports(tmp_path):
+    exporter = CRMExporter(str(tmp_path))
+    articles = [
+        _article(1, "2026-10-01T10:00:00"),
+        _article(2, "2026-10-02T10:00:00"),
+        _article(3, "2026-10-03T10:00:00", status="rejected"),
+    ]
+
+    first = exporter.export(articles)
+    assert first['full'] and _ids(first) == [1, 2]
+    assert exporter.cursor()['moderated_at'] == "2026-10-02T10:00:00"
+
+    # Nothing approved since: no file, and the cursor stays put
+    unchanged = exporter.export(articles)
+    assert unchanged['file'] is None and unchanged['articles'] == 0
+    assert exporter.cursor()['file'] == os.path.basename(first['file'])
+
+    articles.append(_article(4, "2026-10-04T10:00:00"))
+    delta = exporter.export(articles)
+    assert not delta['full'] and _ids(delta) == [4]
+    assert exporter.cursor()['moderated_at'] == "2026-10-04T10:00:00"
+
+    full = exporter.export(articles, full=True, compress=True)
+    assert full['full'] and full['file'].endswith("-full.ndjson.gz")
+    assert _ids(full) == [1, 2, 4]
+    assert exporter.cursor()['moderated_at'] == "2026-10-04T10:00:00"
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+
+def test_export_after_moderation(news_aggregator):
+    news_aggregator.storage.add_many([
+        NewsArticle(title=f"Article {i}", source_url=f"https://stan.kz/news/{i}", source_name="Stan.kz")
+        for i in range(1, 5)
+    ])
+    news_aggregator.moderate('approved', [1, 2])
+    assert _ids(news_aggregator.export_crm()) == [1, 2]
+
+    news_aggregator.moderate('approved', [4])
+    news_aggregator.moderate('rejected', [3])
+    assert _ids(news_aggregator.export_crm()) == [4]
+    assert _ids(news_aggregator.export_crm(full=True)) == [1, 2, 4]
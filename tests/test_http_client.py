@@ -0,0 +1,66 @@
+"""
+DNS cache: every address of a host is kept, and connections fall back to the next
+address when one is unreachable
+"""
+import asyncio
+import socket
+
+import httpcore
+import pytest
+
+from http_client import CachingNetworkBackend
+
+ADDRESSES = ["2001:db8::1", "192.0.2.1", "192.0.2.2"]
+
+
+class FakeBackend(httpcore.AsyncNetworkBackend):
+    """Refuses connections to `down` addresses and records every attempt"""
+
+    def __init__(self, down):
+        self.down = set(down)
+        self.attempts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.attempts.append(host)
+        if host in self.down:
+            raise httpcore.ConnectError(f"{host} unreachable")
+        return host
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """getaddrinfo answering with ADDRESSES (the IPv6 one twice, as for two socket kinds); counts calls"""
+    calls = []
+
+    async def getaddrinfo(self, host, port, **kwargs):
+        calls.append(host)
+        return [(socket.AF_INET6 if ':' in a else socket.AF_INET, socket.SOCK_STREAM, 6, '', (a, port))
+                for a in [ADDRESSES[0]] + ADDRESSES]
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, "getaddrinfo", getaddrinfo)
+    return calls
+
+
+def test_falls_back_to_next_address_and_remembers(lookups):
+    backend = FakeBackend(down={ADDRESSES[0]})
+    caching = CachingNetworkBackend(backend, ttl=60)
+
+    async def run():
+        return [await caching.connect_tcp("news.example.kz", 443) for _ in range(3)]
+
+    assert asyncio.run(run()) == [ADDRESSES[1]] * 3
+    # The dead address was tried once, then moved behind the working ones
+    assert backend.attempts == [ADDRESSES[0], ADDRESSES[1], ADDRESSES[1], ADDRESSES[1]]
+    assert lookups == ["news.example.kz"]
+
+
+def test_raises_when_every_address_is_down(lookups):
+    backend = FakeBackend(down=ADDRESSES)
+    caching = CachingNetworkBackend(backend, ttl=60)
+
+    with pytest.raises(httpcore.ConnectError):
+        asyncio.run(caching.connect_tcp("news.example.kz", 443))
+    assert backend.attempts == ADDRESSES
@@ -0,0 +1,44 @@
+"""
+Kazakh endings apply only in Kazakh text: a Kazakh keyword found in Russian text
+takes Russian endings instead
+"""
+import pytest
+
+from keywords import KeywordMatcher, is_kazakh, tokenize
+
+MATCHER = KeywordMatcher(kz=["бизнес", "кәсіп", "жастар"], ru=["студент"])
+
+CASES = [
+    # Russian text: "мен" is part of the word, not the Kazakh instrumental
+    ("Бизнесмен открыл кафе в центре", []),
+    ("Спортсмены и бизнесмены встретились", []),
+    # Russian endings on a Kazakh keyword still match in Russian text
+    ("Открытие бизнеса стало проще", ["бизнес"]),
+    ("Студенты занялись бизнесом", ["бизнес", "студент"]),
+    # Kazakh text: Kazakh endings, including "мен" and voiced stems
+    ("Жастар бизнеспен айналысуға құлықты", ["жастар", "бизнес"]),
+    ("Бизнесмен кәсіпке кірісті", ["бизнес", "кәсіп"]),
+    ("Жастардың кәсібі", ["жастар", "кәсіп"]),
+    # Kazakh words without a Kazakh-specific letter are read as Russian: the trade-off
+    ("Жастар бизнеспен айналысады", ["жастар"]),
+]
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_endings_follow_the_text_language(text, expected):
+    assert sorted(MATCHER.match(text)) == sorted(expected)
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_encoded_matching_agrees(text, expected):
+    """reclassify's word-id path gives the same result as matching the text"""
+    vocabulary = []
+    words, breaks = tokenize(text)
+    tokens = []
+    for word in words:
+        if word not in vocabulary:
+            vocabulary.append(word)
+        tokens.append(vocabulary.index(word))
+    kazakh = any(is_kazakh(word) for word in words)
+    heads = MATCHER.heads(vocabulary, kazakh)
+    assert sorted(MATCHER.match_encoded(tokens, breaks, vocabulary, heads, kazakh)) == sorted(expected)
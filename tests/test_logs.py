@@ -0,0 +1,44 @@
+"""
+Logging: records passed through the writer queue keep their exception, written by the
+JSON formatter as its own field and by the text formatter after the message
+"""
+import io
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from logs import JsonFormatter, QueueHandler, StructuredLogger, TextFormatter
+
+
+@pytest.mark.parametrize("formatter", [JsonFormatter(), TextFormatter()])
+def test_exception_survives_the_queue(formatter):
+    output = io.StringIO()
+    stream = logging.StreamHandler(output)
+    stream.setFormatter(formatter)
+    handler = QueueHandler()
+    logger = logging.getLogger(f"newsparser.test.{type(formatter).__name__}")
+    logger.addHandler(handler)
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(handler.queue, stream)
+    listener.start()
+    try:
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            StructuredLogger(logger, {}).exception("✗ Error with source %s", "Stan.kz", source="Stan.kz")
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    text = output.getvalue()
+    if isinstance(formatter, JsonFormatter):
+        entry = json.loads(text)
+        assert entry['message'] == "✗ Error with source Stan.kz"
+        assert entry['source'] == "Stan.kz"
+        assert entry['exception'].startswith("Traceback")
+        assert "ZeroDivisionError" in entry['exception']
+    else:
+        assert text.startswith("✗ Error with source Stan.kz\nTraceback")
+        assert text.count("ZeroDivisionError") == 1
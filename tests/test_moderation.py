@@ -0,0 +1,89 @@
+"""
+Bulk approve/reject: malformed or empty id arguments are refused instead of falling
+back to the whole moderation queue; id lists and filters pick exactly their articles
+"""
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from aggregator import parse_moderation_args
+from models import NewsArticle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _store(aggregator, count: int = 6):
+    """`count` pending articles: odd ids from "Stan.kz" fetched 30 days ago, even ids from "Akorda" today"""
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    aggregator.storage.add_many([
+        NewsArticle(title=f"Article {i}", source_url=f"https://example.kz/{i}",
+                    source_name="Stan.kz" if i % 2 else "Akorda", category="education",
+                    matched_keywords=["грант"], fetched_at=old if i % 2 else "")
+        for i in range(1, count + 1)
+    ])
+
+
+@pytest.mark.parametrize("args, message", [
+    (["10-8"], "empty range"),
+    ([","], "no article ids"),
+    (["abc"], "invalid article id"),
+    (["5-x"], "invalid article id"),
+    (["-3"], "invalid article id"),
+    (["--older-than"], "--older-than needs a value"),
+    (["--older-than", "soon"], "number of days"),
+    (["--source", "--dry-run"], "--source needs a value"),
+    (["--bogus"], "unknown option"),
+])
+def test_malformed_arguments_are_refused(args, message):
+    with pytest.raises(ValueError, match=message):
+        parse_moderation_args(args)
+
+
+def test_cli_exits_with_usage_error_and_changes_nothing(tmp_path):
+    env = {**os.environ, "DATA_DIR": str(tmp_path)}
+    for args in (["approve", "10-8", "--dry-run"], ["reject", ","], ["approve", "abc"]):
+        result = subprocess.run([sys.executable, "aggregator.py", *args], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 2, result.stdout + result.stderr
+        assert result.stdout.startswith("✗ ")
+        assert "Traceback" not in result.stderr
+
+
+def test_parse_ids_and_filters():
+    assert parse_moderation_args(["1,3-4", "7"]) == ([1, 3, 4, 7], {}, False)
+    assert parse_moderation_args(["--source", "Akorda", "--older-than", "14", "--dry-run"]) == (
+        None, {'source': "Akorda", 'older_than_days': 14.0, 'status': 'pending'}, True)
+    # Explicit ids are not limited to the moderation queue unless asked
+    assert parse_moderation_args(["2", "--status", "approved"]) == ([2], {'status': 'approved'}, False)
+
+
+def test_id_list_moderates_exactly_those_articles(news_aggregator):
+    _store(news_aggregator)
+    article_ids, filters, dry_run = parse_moderation_args(["1,3-4"])
+    result = news_aggregator.moderate('approved', article_ids, dry_run=dry_run, **filters)
+
+    assert result['changed'] == 3
+    statuses = {a.id: a.status for a in news_aggregator.storage.get_all()}
+    assert statuses == {1: 'approved', 2: 'pending', 3: 'approved', 4: 'approved', 5: 'pending', 6: 'pending'}
+
+
+def test_filters_moderate_matching_pending_articles(news_aggregator):
+    _store(news_aggregator)
+    news_aggregator.moderate('approved', [1])
+    article_ids, filters, dry_run = parse_moderation_args(["--source", "Stan.kz", "--older-than", "14"])
+    result = news_aggregator.moderate('rejected', article_ids, dry_run=dry_run, **filters)
+
+    # Article 1 is from Stan.kz and old, but no longer pending
+    assert sorted(a.id for a in result['selected']) == [3, 5]
+    statuses = {a.id: a.status for a in news_aggregator.storage.get_all()}
+    assert statuses == {1: 'approved', 2: 'pending', 3: 'rejected', 4: 'pending', 5: 'rejected', 6: 'pending'}
+
+
+def test_dry_run_changes_nothing(news_aggregator):
+    _store(news_aggregator)
+    result = news_aggregator.moderate('rejected', None, dry_run=True, status='pending')
+    assert result['changed'] == 6
+    assert {a.status for a in news_aggregator.storage.get_all()} == {'pending'}
@@ -0,0 +1,70 @@
+"""
+Page archive: pages added from executor threads read back intact, a damaged record
+fails only its own article during re-extraction, and the aggregator opens the archive
+only when it is used
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import aggregator
+from aggregator import _extract_archived
+from models import NewsArticle
+from page_archive import PageArchive
+from parsers import FetchedPage
+
+PAGE = ("<html><head><title>Жастар форумы</title></head><body><article><h1>Жастар форумы</h1>"
+        + "<p>Қарағандыда жастар форумы өтті, студенттерге грант берілді.</p>" * 20
+        + "</article></body></html>").encode("utf-8")
+
+
+def _url(i: int) -> str:
+    return f"https://stan.kz/news/{i}"
+
+
+def test_pages_added_from_threads_read_back(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        added = list(executor.map(
+            lambda i: archive.add(_url(i), FetchedPage(url=_url(i), content=PAGE + str(i).encode(), encoding="utf-8")),
+            range(40)
+        ))
+    assert all(added)
+    assert archive.count() == 40
+    for i in range(40):
+        assert archive.get(_url(i)) == (_url(i), PAGE + str(i).encode(), "utf-8")
+    archive.close()
+
+
+def test_damaged_record_fails_only_its_article(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.add(_url(1), FetchedPage(url=_url(1), content=PAGE, encoding="utf-8"))
+    path, offset, length = archive.locations([_url(1)])[_url(1)]
+    archive.close()
+
+    tasks = {
+        'intact': (1, "Stan.kz", "https://stan.kz", _url(1), (path, offset, length)),
+        'truncated': (2, "Stan.kz", "https://stan.kz", _url(1), (path, offset, length // 2)),
+        'not gzip': (3, "Stan.kz", "https://stan.kz", _url(1), (path, offset + 1, length - 1)),
+        'missing file': (4, "Stan.kz", "https://stan.kz", _url(1), (os.path.join(str(tmp_path), "gone.warc.gz"), 0, 10)),
+    }
+    results = {name: _extract_archived(task) for name, task in tasks.items()}
+
+    assert results['intact'][1]['title']
+    for name in ('truncated', 'not gzip', 'missing file'):
+        assert results[name] == (tasks[name][0], None)
+
+
+def test_archive_opens_on_first_use_and_is_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(aggregator, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(aggregator, 'ARCHIVE_PAGES', True)
+    news_aggregator = aggregator.NewsAggregator()
+    assert not os.path.exists(tmp_path / aggregator.ARCHIVE_DIR)
+
+    news_aggregator.storage.add_many([NewsArticle(title="Old title", source_url=_url(1), source_name="Stan.kz")])
+    news_aggregator.page_archive.add(_url(1), FetchedPage(url=_url(1), content=PAGE, encoding="utf-8"))
+    for _ in range(2):
+        result = news_aggregator.reextract(workers=1, dry_run=True)
+        assert result['archived'] == 1
+        assert result['changed'][1]['title'] == "Жастар форумы"
+    # reextract borrowed the aggregator's archive rather than closing it
+    assert news_aggregator.page_archive.count() == 1
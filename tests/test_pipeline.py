@@ -0,0 +1,159 @@
+"""
+Source pipeline: budgets follow per-source yield and unused budget carries over, an
+interrupted run resumes from its checkpoint, work deferred by a deadline stays out of
+the yield history, every source finishes (yield recorded, checkpoint marked done) even
+when a storage write fails, and per-source scheduler jobs are kept in the run history
+"""
+import asyncio
+import time
+
+import pytest
+
+import aggregator
+import parsers
+from models import NewsArticle, RunCheckpoint
+from parsers import FetchedPage
+
+SOURCES = [{'name': f"Source {n}", 'url': f"https://source{n}.kz", 'lang': 'ru'} for n in range(3)]
+
+
+class FakeParser:
+    """Lists `links` (after `listing_seconds`) and serves a page for every one of them, counting requests"""
+
+    def __init__(self, links, listing_seconds: float = 0):
+        self.links = links
+        self.listing_seconds = listing_seconds
+        self.archive = None
+        self.request_count = 0
+
+    async def get_article_links(self, client):
+        self.request_count += 1
+        await asyncio.sleep(self.listing_seconds)
+        return list(self.links)
+
+    async def fetch_page(self, url, client):
+        self.request_count += 1
+        return FetchedPage(url=url, content=b"<html></html>", encoding="utf-8")
+
+
+@pytest.fixture
+def pipeline(news_aggregator, monkeypatch):
+    """news_aggregator wired to fake parsers with 4 links per source; every article matches and none is submitted"""
+    links = {s['name']: [f"{s['url']}/news/{i}" for i in range(4)] for s in SOURCES}
+    monkeypatch.setattr(parsers, 'get_parser', lambda name, url: FakeParser(links[name]))
+    monkeypatch.setattr(aggregator, 'PIPELINE_FETCH_DELAY', 0)
+    monkeypatch.setattr(news_aggregator, 'extract_article', lambda parser, page, url: {'title': url})
+    monkeypatch.setattr(news_aggregator, 'build_article', lambda source, url, data: NewsArticle(
+        title=data['title'], source_url=url, source_name=source['name'], matched_keywords=["грант"]))
+    monkeypatch.setattr(news_aggregator, 'submission_targets', lambda article: [])
+    news_aggregator.links = links
+    return news_aggregator
+
+
+def test_failed_storage_write_still_finishes_every_source(pipeline, monkeypatch, tmp_path):
+    def add_many(articles):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pipeline.storage, 'add_many', add_many)
+    checkpoint = RunCheckpoint(str(tmp_path / "checkpoint.json"))
+    plan = [(source, 4) for source in SOURCES]
+    checkpoint.start(plan)
+
+    articles, _ = asyncio.run(pipeline.process_sources(plan, client=None, checkpoint=checkpoint))
+
+    assert articles == []
+    for source in SOURCES:
+        stats = pipeline.source_stats[source['name']]
+        assert stats['processed'] == 4
+        assert stats['errors'] == 4
+        assert stats['matched'] == 0
+        assert source['name'] in pipeline.source_yield.sources
+        assert source['name'] in checkpoint.state['completed_sources']
+        # Nothing was stored, so the next run fetches the same URLs again
+        assert not any(pipeline.seen_urls.is_seen(url) for url in pipeline.links[source['name']])
+
+
+def test_scheduler_source_job_is_recorded_in_history(pipeline):
+    stats = asyncio.run(pipeline.run_source(SOURCES[0], client=None))
+
+    runs = pipeline.history.runs()
+    assert len(runs) == 1
+    assert runs[0]['new_articles'] == stats['matched'] == 4
+    assert pipeline.history.sources() == [SOURCES[0]['name']]
+    assert pipeline.history.source_runs(SOURCES[0]['name'])[0]['processed'] == 4
+
+
+def test_budgets_follow_yield_history(news_aggregator, monkeypatch):
+    monkeypatch.setattr(aggregator, 'MIN_ARTICLES_PER_SOURCE', 2)
+    monkeypatch.setattr(aggregator, 'MAX_ARTICLES_PER_SOURCE', 10)
+    # Source 1 matches often but usually has only 5 new links; Source 2 never matches; Source 0 is new
+    news_aggregator.source_yield.record("Source 1", requests=10, processed=9, matched=8, new_links=5, seconds=1)
+    news_aggregator.source_yield.record("Source 2", requests=10, processed=9, matched=0, new_links=9, seconds=1)
+
+    plan = news_aggregator.plan_budgets(SOURCES, total=15)
+
+    assert [(source['name'], budget) for source, budget in plan] == [
+        ("Source 1", 5), ("Source 0", 8), ("Source 2", 2),
+    ]
+
+
+def test_unused_budget_carries_over_to_next_source(pipeline, monkeypatch):
+    monkeypatch.setattr(aggregator, 'PIPELINE_WORKERS', {**aggregator.PIPELINE_WORKERS, 'discover': 1})
+    pipeline.links["Source 0"] = pipeline.links["Source 0"][:1]
+    pipeline.links["Source 1"] = [f"https://source1.kz/news/{i}" for i in range(10)]
+    plan = [(source, 3) for source in SOURCES]
+
+    asyncio.run(pipeline.process_sources(plan, client=None))
+
+    # Source 0 used 1 of its 3, so Source 1 may fetch 5 and Source 2 gets only its own 3
+    assert [pipeline.source_stats[s['name']]['budget'] for s in SOURCES] == [3, 5, 3]
+    assert [pipeline.source_stats[s['name']]['processed'] for s in SOURCES] == [1, 5, 3]
+
+
+def test_resume_skips_finished_work_and_resubmits_stored_articles(pipeline, monkeypatch):
+    monkeypatch.setattr(aggregator, 'SOURCES', SOURCES)
+    sent = []
+
+    async def send_to_api(article, client):
+        sent.append(article.id)
+        return True
+
+    monkeypatch.setattr(pipeline, 'send_to_api', send_to_api)
+    # Stopped after Source 0 finished, two of Source 1's URLs were handled and article 1
+    # was stored but not yet submitted
+    pipeline.storage.add_many([NewsArticle(title="Stored", source_url="https://source0.kz/news/0",
+                                           source_name="Source 0")])
+    pipeline.checkpoint.start([(source, 4) for source in SOURCES])
+    pipeline.checkpoint.mark_source_done("Source 0")
+    for url in pipeline.links["Source 1"][:2]:
+        pipeline.checkpoint.mark_url_done("Source 1", url)
+    pipeline.checkpoint.add_unsubmitted([1])
+    pipeline.checkpoint.save()
+
+    result = asyncio.run(pipeline.run())
+
+    assert sent == [1]
+    assert "Source 0" not in pipeline.source_stats
+    assert [pipeline.seen_urls.is_seen(url) for url in pipeline.links["Source 1"]] == [False, False, True, True]
+    assert pipeline.source_stats["Source 2"]['processed'] == 4
+    assert result['new_articles'] == 6
+    # The finished run leaves no checkpoint behind
+    assert not pipeline.checkpoint.active
+
+
+def test_work_deferred_by_deadline_is_left_out_of_yield_history(pipeline, monkeypatch):
+    monkeypatch.setattr(aggregator, 'PIPELINE_WORKERS', {**aggregator.PIPELINE_WORKERS, 'discover': 1})
+    # Source 0 is fetched in time; Source 1's listing outlasts the deadline, so its articles
+    # are deferred; Source 2 is not started at all
+    monkeypatch.setattr(parsers, 'get_parser', lambda name, url: FakeParser(
+        pipeline.links[name], listing_seconds=0.3 if name == "Source 1" else 0))
+    plan = [(source, 4) for source in SOURCES]
+
+    async def run():
+        return await pipeline.process_sources(plan, client=None, stop_at=time.monotonic() + 0.15)
+
+    articles, _ = asyncio.run(run())
+
+    assert len(articles) == 4
+    assert pipeline.deferred == {'sources': ["Source 2"], 'articles': {"Source 1": 4}}
+    assert list(pipeline.source_yield.sources) == ["Source 0"]
@@ -0,0 +1,135 @@
+"""
+Proxy pool against local stand-in proxies: a failing proxy is ejected, comes back
+after its cooldown, and requests still go out while every proxy is down
+"""
+import asyncio
+import socket
+import time
+
+import pytest
+
+import proxy_pool as proxy_pool_module
+from http_client import create_client
+from proxy_pool import ProxyPool
+
+TARGET = "http://news.example.kz/article"
+HOST = "news.example.kz"
+COOLDOWN = 0.5
+
+
+class StandInProxy:
+    """Forward proxy on 127.0.0.1 that answers every request itself with `status` and its name"""
+
+    def __init__(self, name: str, status: int = 200):
+        self.name = name
+        self.status = status
+        self.hits = 0
+        self.server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.readuntil(b"\r\n\r\n")
+        self.hits += 1
+        body = self.name.encode()
+        writer.write(f"HTTP/1.1 {self.status} X\r\nContent-Length: {len(body)}\r\n"
+                     "Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+
+def _closed_port_url() -> str:
+    """A proxy URL nothing listens on - connections are refused"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture(autouse=True)
+def short_cooldown(monkeypatch):
+    monkeypatch.setattr(proxy_pool_module, "PROXY_EJECT_AFTER", 2)
+    monkeypatch.setattr(proxy_pool_module, "PROXY_EJECT_COOLDOWN", COOLDOWN)
+    monkeypatch.setattr(proxy_pool_module, "PROXY_EJECT_MAX_COOLDOWN", COOLDOWN * 4)
+
+
+async def _get(client, session: str):
+    """One request in its own proxy session, so every request is balanced afresh"""
+    return await client.get(TARGET, extensions={"proxy_session": session})
+
+
+def test_unreachable_proxy_is_ejected_and_traffic_moves_on():
+    async def run():
+        dead = _closed_port_url()
+        async with StandInProxy("good") as good:
+            pool = ProxyPool([dead, good.url], seed=1)
+            async with create_client(proxy_pool=pool) as client:
+                bodies = [(await _get(client, f"s{i}")).text for i in range(20)]
+                errors = pool.health[(dead, HOST)].errors
+                ejected = not pool.health[(dead, HOST)].is_admitted(time.monotonic())
+                more = [(await _get(client, f"t{i}")).text for i in range(20)]
+                return bodies + more, errors, ejected, pool.health[(dead, HOST)].errors
+
+    bodies, errors, ejected, errors_after = asyncio.run(run())
+    # Failed attempts were retried through the healthy proxy
+    assert set(bodies) == {"good"}
+    assert errors >= 2 and ejected
+    # Ejected: nothing more was sent through it during the cooldown
+    assert errors_after == errors
+
+
+def test_blocked_proxy_is_readmitted_after_cooldown():
+    async def run():
+        async with StandInProxy("a") as a, StandInProxy("b", status=403) as b:
+            pool = ProxyPool([a.url, b.url], seed=2)
+            async with create_client(proxy_pool=pool) as client:
+                for i in range(20):
+                    await _get(client, f"s{i}")
+                health = pool.health[(b.url, HOST)]
+                ejected_for = health.ejected_until - time.monotonic()
+
+                b.status = 200
+                hits = b.hits
+                for i in range(10):
+                    assert (await _get(client, f"t{i}")).text == "a"
+                assert b.hits == hits
+
+                await asyncio.sleep(COOLDOWN + 0.1)
+                bodies = [(await _get(client, f"u{i}")).text for i in range(40)]
+                return ejected_for, bodies
+
+    ejected_for, bodies = asyncio.run(run())
+    assert 0 < ejected_for <= COOLDOWN
+    assert "b" in bodies
+
+
+def test_requests_go_out_when_every_proxy_is_down():
+    async def run():
+        async with StandInProxy("a", status=429) as a, StandInProxy("b", status=403) as b:
+            pool = ProxyPool([a.url, b.url], seed=3)
+            async with create_client(proxy_pool=pool) as client:
+                for i in range(10):
+                    await _get(client, f"s{i}")
+                now = time.monotonic()
+                all_ejected = not any(pool.health[(p, HOST)].is_admitted(now) for p in pool.proxies)
+
+                # Still ejected, but the proxies recovered: requests must reach them
+                a.status = b.status = 200
+                hits = a.hits + b.hits
+                responses = [await _get(client, f"t{i}") for i in range(5)]
+                return all_ejected, responses, a.hits + b.hits - hits
+
+    all_ejected, responses, sent = asyncio.run(run())
+    assert all_ejected
+    assert sent >= 5
+    assert all(r.status_code == 200 for r in responses)
@@ -0,0 +1,82 @@
+"""
+Full-text search: title hits rank first, prefix search finds inflected forms, filters
+narrow the hits, and the index follows status changes made through the store
+"""
+from models import NewsArticle
+from search_index import SearchIndex
+
+
+def _article(article_id: int, title: str, content: str = "", **fields) -> NewsArticle:
+    fields = {'source_name': "Stan.kz", 'category': "education", 'status': "pending",
+              'fetched_at': "2026-10-01T12:00:00", **fields}
+    return NewsArticle(id=article_id, title=title, content_text=content,
+                       source_url=f"https://stan.kz/news/{article_id}", **fields)
+
+
+def test_title_hits_rank_above_body_hits(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add([
+        _article(1, "Форум в Караганде", "Студентам выдали гранты на обучение."),
+        _article(2, "Гранты для студентов", "Итоги конкурса объявлены."),
+    ] + [_article(i, f"Погода на неделю {i}", "Без осадков.") for i in range(3, 9)])
+
+    total, hits = index.search("гранты")
+
+    assert total == 2
+    assert [hit['id'] for hit in hits] == [2, 1]
+    assert hits[0]['score'] > hits[1]['score']
+    assert "[Гранты]" in hits[0]['snippet']
+    index.close()
+
+
+def test_prefix_search_finds_inflected_forms(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add([
+        _article(1, "Жастар форумы", "Студенттерге грант берілді."),
+        _article(2, "Стипендия студентов", "Выплаты растут."),
+        _article(3, "Новый учебный год", "Школы готовы."),
+    ])
+
+    assert index.search("студент") == (0, [])
+    total, hits = index.search("студент", prefix=True)
+    assert total == 2
+    assert sorted(hit['id'] for hit in hits) == [1, 2]
+    # ё and е are one letter, and case does not matter
+    index.add([_article(4, "Ёлка в Астане")])
+    assert [hit['id'] for hit in index.search("ЕЛКА")[1]] == [4]
+    index.close()
+
+
+def test_filters_and_pages(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add([
+        _article(1, "Грант для школ"),
+        _article(2, "Грант для вузов", source_name="Akorda"),
+        _article(3, "Грант для села", category="economy"),
+        _article(4, "Грант молодым ученым", status="approved", fetched_at="2026-10-10T09:00:00"),
+        _article(5, "Прогноз погоды"),
+    ])
+
+    assert index.search("грант", source="Akorda")[0] == 1
+    assert index.search("грант", category="economy")[0] == 1
+    assert [hit['id'] for hit in index.search("грант", status="approved")[1]] == [4]
+    assert [hit['id'] for hit in index.search("грант", since="2026-10-05")[1]] == [4]
+    # Without a query the newest matching articles come first
+    total, hits = index.search(status="pending", limit=2, offset=1)
+    assert total == 4
+    assert [hit['id'] for hit in hits] == [3, 2]
+    assert index.search("!?") == (0, [])
+    index.close()
+
+
+def test_index_follows_moderation(news_aggregator):
+    news_aggregator.storage.add_many([
+        NewsArticle(title=f"Грант {i}", source_url=f"https://stan.kz/news/{i}", source_name="Stan.kz")
+        for i in range(1, 4)
+    ])
+    news_aggregator.moderate('approved', [2])
+
+    total, hits = news_aggregator.search_index.search("грант", status="approved")
+    assert total == 1
+    assert hits[0]['id'] == 2
+    assert news_aggregator.search_index.search("грант", status="pending")[0] == 2
@@ -0,0 +1,119 @@
+"""
+Source leases across several local worker processes: even split, failover when a
+worker dies, and the scheduler's heartbeat job actually renewing
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from sharding import LeaseStore
+
+SOURCES = [f"source-{i}" for i in range(7)]
+TTL = 1.0
+
+# One sharded worker: claims every 0.1s, as lease_job does between fetches
+WORKER = textwrap.dedent("""
+    import sys, time
+    from sharding import LeaseStore
+    path, worker, ttl, sources = sys.argv[1], sys.argv[2], float(sys.argv[3]), sys.argv[4].split(',')
+    leases = LeaseStore(path, ttl=ttl)
+    leases.heartbeat(worker)
+    time.sleep(0.3)
+    while True:
+        leases.claim(worker, sources)
+        time.sleep(0.1)
+""")
+
+
+def _start_worker(path: str, name: str) -> subprocess.Popen:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-c", WORKER, path, name, str(TTL), ','.join(SOURCES)],
+        cwd=root, env={**os.environ, "PYTHONPATH": root}
+    )
+
+
+def _wait_for(condition, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _owners(store: LeaseStore) -> dict:
+    """worker -> sources it holds a live lease on"""
+    owners = {}
+    for source, (worker, _) in store.leases().items():
+        owners.setdefault(worker, set()).add(source)
+    return owners
+
+
+def _evenly_split(store: LeaseStore, workers: set) -> bool:
+    owners = _owners(store)
+    share = -(-len(SOURCES) // len(workers))
+    return (set(owners) == workers
+            and set().union(*owners.values()) == set(SOURCES)
+            and all(len(sources) <= share for sources in owners.values()))
+
+
+def test_workers_split_sources_and_take_over_from_a_dead_one(tmp_path):
+    path = str(tmp_path / "leases.db")
+    store = LeaseStore(path, ttl=TTL)
+    workers = {name: _start_worker(path, name) for name in ("w1", "w2", "w3")}
+    try:
+        assert _wait_for(lambda: _evenly_split(store, {"w1", "w2", "w3"}))
+
+        # Killed without releasing: its leases must lapse and move to the survivors
+        workers["w2"].send_signal(signal.SIGKILL)
+        workers["w2"].wait()
+        assert _wait_for(lambda: _evenly_split(store, {"w1", "w3"}))
+    finally:
+        for process in workers.values():
+            process.kill()
+            process.wait()
+        store.close()
+
+
+def test_released_leases_are_taken_over_immediately(tmp_path):
+    path = str(tmp_path / "leases.db")
+    store = LeaseStore(path, ttl=60)
+    first = store.claim("w1", SOURCES)
+    assert first == SOURCES
+    assert store.claim("w2", SOURCES) == []
+
+    store.release("w1")
+    assert store.claim("w2", SOURCES) == SOURCES
+    store.close()
+
+
+def test_scheduler_lease_job_heartbeats_from_the_scheduler(tmp_path):
+    """lease_job runs under AsyncIOScheduler against a connection opened on the loop thread"""
+    from scheduler import NewsScheduler, SOURCES as CONFIGURED
+
+    async def run():
+        news = NewsScheduler()
+        news.leases = LeaseStore(str(tmp_path / "leases.db"), ttl=TTL)
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(news.lease_job, trigger=IntervalTrigger(seconds=0.2), id='leases')
+        scheduler.start()
+        try:
+            # Several renewals: leases stay live well past the TTL
+            await asyncio.sleep(TTL * 2)
+            return news.owned, news.leases.leases()
+        finally:
+            scheduler.shutdown(wait=False)
+            news.leases.close()
+
+    owned, leases = asyncio.run(run())
+    names = [s['name'] for s in CONFIGURED]
+    assert owned == names
+    assert set(leases) == set(names)